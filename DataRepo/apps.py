@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class DatarepoConfig(AppConfig):
     name = "DataRepo"
+
+    def ready(self):
+        from DataRepo.formats.search_group import check_search_formats
+
+        checks.register(check_search_formats)
@@ -1,4 +1,3 @@
-import warnings
 from copy import deepcopy
 from datetime import timedelta
 from typing import Dict, List, Optional
@@ -12,13 +11,9 @@ from DataRepo.formats.dataformat_group_query import (
     createFilterGroup,
     extractFldPaths,
     getChildren,
-    getComparison,
     getField,
     getFilterType,
     getSearchTree,
-    getUnits,
-    getValue,
-    isAllGroup,
     isQuery,
     isQueryGroup,
     setField,
@@ -31,8 +26,6 @@ from DataRepo.models.utilities import dereference_field, get_model_by_name
 class Format:
     """
     This class holds common data/functions for search output formats.
-
-    Note that any comparison types added to ncmp_choices must also be implemented in meetsCondition().
     """
 
     id = ""
@@ -40,6 +33,13 @@ class Format:
     model_instances: Dict[str, Dict] = {}
     rootmodel: Model = None
     stats: Optional[List[Dict]] = None
+    # Key paths (from the rootmodel) mapped to shorter equivalent key paths (e.g. through denormalized foreign keys)
+    # that are substituted when generating query filters and stats
+    path_shortcuts: Dict[str, str] = {}
+    # The columns of the format's downloads (see DataRepo.formats.dataformat_export.FormatExporter)
+    download_columns: List[Dict] = []
+    # The FormatMetadata of every Format class (see getMetadata), shared by all classes
+    metadata_registry: Dict[type, "FormatMetadata"] = {}
     ncmp_choices = {
         "number": [
             ("exact", "is"),
@@ -253,7 +253,25 @@ class Format:
     # }
 
     @classmethod
-    def getSearchFieldChoices(self):
+    def getMetadata(cls):
+        """
+        Returns the format's FormatMetadata, which is built (and thereby validated) once per process, the first time it
+        is needed.
+        """
+        metadata = cls.metadata_registry.get(cls)
+        if metadata is None:
+            metadata = FormatMetadata(cls())
+            cls.metadata_registry[cls] = metadata
+        return metadata
+
+    @classmethod
+    def getSearchFieldChoices(cls):
+        """
+        Returns the tuple to populate the select list choices for the AdvSearchForm fld field.
+        """
+        return cls.getMetadata().search_field_choices
+
+    def buildSearchFieldChoices(self):
         """
         This generates the tuple to populate the select list choices for the AdvSearchForm fld field.
         """
@@ -276,6 +294,12 @@ class Format:
         return tuple(sorted(choices, key=lambda x: x[1]))
 
     def getFieldUnitsLookup(self):
+        """
+        Returns the field units lookup (see buildFieldUnitsLookup).  It is shared, so it must not be modified.
+        """
+        return self.getMetadata().field_units_lookup
+
+    def buildFieldUnitsLookup(self):
         """
         This method is used in the backend to handle a user's search selections (i.e. it's main utility is to be used
         to call the correct convert function on the value the user entered in the val field to convert what they
@@ -340,6 +364,12 @@ class Format:
         return units_lookup
 
     def getFieldUnitsDict(self):
+        """
+        Returns the field units dict (see buildFieldUnitsDict).  It is shared, so it must not be modified.
+        """
+        return self.getMetadata().field_units_dict
+
+    def buildFieldUnitsDict(self):
         """
         This method is used in the frontend to populate the search interface (i.e. it's main utility is to be used to
         create the units select list, update the val field's placeholder with a units example, and optionally provide
@@ -418,13 +448,7 @@ class Format:
                             )
                     else:
                         opt_keys = self.unit_options[key]["entry_options"].keys()
-                    print(
-                        f"Setting default of {key} units to '{default}' for field {self.id}.{mdl}.{fld}"
-                    )
                 else:
-                    print(
-                        f"Setting default of 'identity' units to 'identity' for field {self.id}.{mdl}.{fld}"
-                    )
                     key = "identity"
                     default = "identity"
                     opt_keys = ["identity"]
@@ -462,6 +486,12 @@ class Format:
         return unitsdict
 
     def getAllFieldUnitsChoices(self):
+        """
+        Returns the union of all unit_options (see buildAllFieldUnitsChoices).
+        """
+        return self.getMetadata().all_field_units_choices
+
+    def buildAllFieldUnitsChoices(self):
         """
         Returns the union of all unit_options, ignoring differences in the second value. This is mainly only for form
         validation because it only validates known values (the first value in each tuple) regardless of the particular
@@ -486,6 +516,12 @@ class Format:
         return self.ncmp_choices
 
     def getAllComparisonChoices(self):
+        """
+        Returns the union of all ncmp_choices (see buildAllComparisonChoices).
+        """
+        return self.getMetadata().all_comparison_choices
+
+    def buildAllComparisonChoices(self):
         """
         Returns the union of all ncmp_choices, ignoring differences in the second value. This is mainly only for form
         validation because it only validates known values (the first value in each tuple) regardless of the particular
@@ -504,9 +540,15 @@ class Format:
         """
         Returns a list of foreign key names for a composite view from the root table to the supplied table.
         """
-        return self.model_instances[mdl]["path"].split("__")
+        return list(self.getMetadata().key_path_lists[mdl])
 
     def getPrefetches(self):
+        """
+        Returns a list of prefetch strings (see buildPrefetches).
+        """
+        return list(self.getMetadata().prefetches)
+
+    def buildPrefetches(self):
         """
         Returns a list of prefetch strings for a composite view from the root table to the supplied table.  It includes
         a unique set of "foreign key paths" that encompass all tables.
@@ -563,7 +605,8 @@ class Format:
         # compounds.  This migth be a false assumption.
         fld_paths = sorted(extractFldPaths(qry), key=len)
 
-        new_units_lookup = deepcopy(self.getFieldUnitsLookup())
+        # The rerooted fld paths are added to a copy of the units lookup (whose values are not modified)
+        new_units_lookup = dict(self.getFieldUnitsLookup())
 
         # Identify the fld paths that need a subquery in its prefetch and collect those paths associated with their
         # rerooted qry objects
@@ -755,13 +798,9 @@ class Format:
         Given a string that is either a model instance name or a model name, return the corresponding model instance
         name or report an error if it is ambiguous or not found.
         """
-        mdl_instance_names = self.getModelInstances()
-        if mdl not in mdl_instance_names:
-            # Look through the actual model names (instead of the instance names) to see if there's a unique match.
-            inst_names = []
-            for inst_name in mdl_instance_names:
-                if self.model_instances[inst_name]["model"] == mdl:
-                    inst_names.append(inst_name)
+        if mdl not in self.model_instances:
+            # Look up the actual model names (instead of the instance names) to see if there's a unique match.
+            inst_names = self.getMetadata().model_instance_names.get(mdl, [])
             if len(inst_names) == 1:
                 return inst_names[0]
             elif len(inst_names) > 1:
@@ -770,11 +809,17 @@ class Format:
                 )
             else:
                 raise KeyError(
-                    f"Invalid model instance [{mdl}].  Must be one of [{','.join(mdl_instance_names)}]."
+                    f"Invalid model instance [{mdl}].  Must be one of [{','.join(self.getModelInstances())}]."
                 )
         return mdl
 
     def getFieldTypes(self):
+        """
+        Returns the field types dict (see buildFieldTypes).  It is shared, so it must not be modified.
+        """
+        return self.getMetadata().field_types
+
+    def buildFieldTypes(self):
         """
         Returns a dict of path__field -> {type -> field_type (number, string, enumeration), choices -> list of tuples}.
 
@@ -809,6 +854,12 @@ class Format:
         return typedict
 
     def getSearchFields(self, mdl):
+        """
+        Returns the searchable fields of a model instance (see buildSearchFields).
+        """
+        return dict(self.getMetadata().search_fields[mdl])
+
+    def buildSearchFields(self, mdl):
         """
         Returns a dict of searchable fields for a given model/table whose keys are the field names and whose values are
         strings of the full foreign key path (delimited by dunderscores).
@@ -824,6 +875,12 @@ class Format:
         return fielddict
 
     def getDisplayFields(self, mdl):
+        """
+        Returns the displayed fields of a model instance (see buildDisplayFields).
+        """
+        return dict(self.getMetadata().display_fields[mdl])
+
+    def buildDisplayFields(self, mdl):
         """
         Returns a dict of displayed fields for a given model/table whose keys are the field names and whose values are
         searchable field names in the same model/table that should be displayed in their stead.  The values of the
@@ -852,11 +909,11 @@ class Format:
 
     def pathToModelInstanceName(self, fld_path):
         """
-        Takes a model instance name (i.e. a key to the model_instances dict) and returns its key path
+        Takes a key path and returns the name of its model instance (i.e. a key to the model_instances dict)
         """
-        for mdl in self.model_instances.keys():
-            if fld_path == self.model_instances[mdl]["path"]:
-                return mdl
+        path_model_instances = self.getMetadata().path_model_instances
+        if fld_path in path_model_instances:
+            return path_model_instances[fld_path]
         # This should raise an exception if we got here
         self.checkPath(fld_path)
 
@@ -951,6 +1008,21 @@ class Format:
             )
 
     def getOrderByFields(self, mdl_inst_nm=None, model_name=None):
+        """
+        Retrieves a model's default order by fields, given a model instance name (or a model name).  The fields of the
+        format's models are precomputed (see buildOrderByFields).
+        """
+        if mdl_inst_nm is not None and model_name is None:
+            return list(self.getMetadata().order_by_fields[mdl_inst_nm])
+        elif (
+            model_name is not None
+            and mdl_inst_nm is None
+            and model_name in self.getMetadata().model_order_by_fields
+        ):
+            return list(self.getMetadata().model_order_by_fields[model_name])
+        return self.buildOrderByFields(mdl_inst_nm, model_name)
+
+    def buildOrderByFields(self, mdl_inst_nm=None, model_name=None):
         """
         Retrieves a model's default order by fields, given a model instance name.
         """
@@ -989,7 +1061,7 @@ class Format:
                     # Get the model name of the linked model
                     linked_model = self.getFKModelName(mdl, ob_field)
                     # Recursively get that model's ordering fields
-                    add_flds = self.getOrderByFields(model_name=linked_model)
+                    add_flds = self.buildOrderByFields(model_name=linked_model)
                     if len(add_flds) == 0:
                         # Default when the linking model says to order by an FK that has no custom ordering is to order
                         # by that model's primary key
@@ -1029,6 +1101,7 @@ class Format:
         case, this method returns an empty list (as the parameters to .distinct()).  This is the default behavior.  If
         that assumption is false, supply assume_distinct=False.
         """
+        metadata = self.getMetadata()
         distinct_fields = []
         for mdl_inst_nm in self.model_instances:
             custom_distinct_fields_exist = (
@@ -1043,24 +1116,7 @@ class Format:
 
             # If the split_all override in false and there exist custom distinct fields defined
             if not split_all and custom_distinct_fields_exist:
-
-                for distinct_fld_nm in self.model_instances[mdl_inst_nm][
-                    "fields"
-                ].keys():
-                    try:
-                        fld = (
-                            self.model_instances[mdl_inst_nm]["path"]
-                            + "__"
-                            + dereference_field(
-                                distinct_fld_nm,
-                                self.model_instances[mdl_inst_nm]["model"],
-                            )
-                        )
-                        distinct_fields.append(fld)
-                    except AttributeError as ae:
-                        # We can ignore/skip "fields" that are properties
-                        if "'property' object" not in str(ae):
-                            raise ae
+                distinct_fields.extend(metadata.custom_distinct_fields[mdl_inst_nm])
 
             elif (
                 # TODO: See: https://github.com/Princeton-LSI-ResearchComputing/tracebase/issues/484
@@ -1075,40 +1131,7 @@ class Format:
                 # intentionally returning nothing because we want to split records that are otherwise combined by the
                 # custom fields
             ):
-                # Django's ordering fields are required when any field is provided to .distinct().  Otherwise, you
-                # get the error: `ProgrammingError: SELECT DISTINCT ON expressions must match initial ORDER BY
-                # expressions`
-                tmp_distincts = self.getOrderByFields(mdl_inst_nm)
-                for fld_nm in tmp_distincts:
-
-                    # Remove potential loop added to the path when ordering_fields are dereferenced
-                    # E.g. This changes "peak_data__labels__peak_data__peak_group__name" to
-                    # "peak_data__peak_group__name"
-                    field_path_array = fld_nm.split("__")
-                    model_path_array = self.model_instances[mdl_inst_nm]["path"].split(
-                        "__"
-                    )
-                    if (
-                        len(field_path_array) > 1
-                        and field_path_array[0] in model_path_array
-                    ):
-                        path_array = []
-                        first = model_path_array.index(field_path_array[0])
-                        path_array = model_path_array[0:first]
-                        path_array += field_path_array
-                        fld = "__".join(path_array)
-                    else:
-                        fld = self.model_instances[mdl_inst_nm]["path"] + "__" + fld_nm
-
-                    distinct_fields.append(fld)
-
-                # Don't assume the ordering fields are populated/unique, so include the primary key.  Duplicate
-                # fields should be OK (though I haven't tested it).
-                # Note, this assumes that being here means we're in a related table and not the root table, so path
-                # is not an empty string
-                distinct_fields.append(
-                    self.model_instances[mdl_inst_nm]["path"] + "__pk"
-                )
+                distinct_fields.extend(metadata.split_distinct_fields[mdl_inst_nm])
 
         # If there are any split_rows manytomany related tables, we will need to prepend the ordering (and pk) fields
         # of the root model
@@ -1127,116 +1150,177 @@ class Format:
 
         return distinct_fields
 
+    def buildCustomDistinctFields(self, mdl_inst_nm):
+        """
+        Returns the distinct fields of a model instance with custom distinct fields (i.e. its fields, excluding
+        properties), used by getDistinctFields.
+        """
+        distinct_fields = []
+        for distinct_fld_nm in self.model_instances[mdl_inst_nm]["fields"].keys():
+            try:
+                fld = (
+                    self.model_instances[mdl_inst_nm]["path"]
+                    + "__"
+                    + dereference_field(
+                        distinct_fld_nm,
+                        self.model_instances[mdl_inst_nm]["model"],
+                    )
+                )
+                distinct_fields.append(fld)
+            except AttributeError as ae:
+                # We can ignore/skip "fields" that are properties
+                if "'property' object" not in str(ae):
+                    raise ae
+        return distinct_fields
+
+    def buildSplitDistinctFields(self, mdl_inst_nm):
+        """
+        Returns the distinct fields that split root records on a related model instance (i.e. its ordering fields and
+        primary key), used by getDistinctFields.
+        """
+        distinct_fields = []
+
+        # Django's ordering fields are required when any field is provided to .distinct().  Otherwise, you get the
+        # error: `ProgrammingError: SELECT DISTINCT ON expressions must match initial ORDER BY expressions`
+        tmp_distincts = self.buildOrderByFields(mdl_inst_nm)
+        for fld_nm in tmp_distincts:
+
+            # Remove potential loop added to the path when ordering_fields are dereferenced
+            # E.g. This changes "peak_data__labels__peak_data__peak_group__name" to "peak_data__peak_group__name"
+            field_path_array = fld_nm.split("__")
+            model_path_array = self.model_instances[mdl_inst_nm]["path"].split("__")
+            if len(field_path_array) > 1 and field_path_array[0] in model_path_array:
+                path_array = []
+                first = model_path_array.index(field_path_array[0])
+                path_array = model_path_array[0:first]
+                path_array += field_path_array
+                fld = "__".join(path_array)
+            else:
+                fld = self.model_instances[mdl_inst_nm]["path"] + "__" + fld_nm
+
+            distinct_fields.append(fld)
+
+        # Don't assume the ordering fields are populated/unique, so include the primary key.  Duplicate fields should
+        # be OK (though I haven't tested it).
+        # Note, this assumes that being here means we're in a related table and not the root table, so path is not an
+        # empty string
+        distinct_fields.append(self.model_instances[mdl_inst_nm]["path"] + "__pk")
+
+        return distinct_fields
+
+    def getKeysetFields(self, order_by=None):
+        """
+        Returns the fields that totally order this format's (distinct) rows, i.e. whose values identify a row's position
+        for keyset paging: the distinct fields (which start with order_by, if supplied) or, if there are none,
+        order_by, the root model's ordering fields, and the primary key.
+        """
+        keyset_fields = self.getDistinctFields(order_by)
+        if len(keyset_fields) == 0:
+            if order_by is not None:
+                keyset_fields.append(order_by)
+            for fld in self.getOrderByFields(model_name=self.rootmodel.__name__):
+                if fld not in keyset_fields:
+                    keyset_fields.append(fld)
+        if "pk" not in keyset_fields:
+            keyset_fields.append("pk")
+        return keyset_fields
+
     def getStatsParams(self):
         """Stats getter"""
         return deepcopy(self.stats)
 
-    def statsAvailable(self):
-        return self.stats is not None
+    def getPathShortcuts(self):
+        """Path shortcuts getter"""
+        return self.path_shortcuts
 
-    def meetsAllConditionsByValList(self, rootrec, query, field_order):
+    def getDownloadColumns(self):
+        """Download columns getter"""
+        return self.download_columns
+
+    def getSplitRowsAnnotations(self):
         """
-        This is a python-code version of a complex Q expression, necessary for checking filters in aggregate count
-        annotations, because the Django ORM does not support .distinct(fields).annotate(Count) when duplicate root
-        table records exist.
+        Returns a dict of the key paths of the many-related model instances that rows are split on, mapped to the name
+        of the root record annotation holding the primary key of the related record of each (split) row.
         """
-        if isQuery(query):
-            fld = getField(query)
-            val = getValue(query)
-            ncmp = getComparison(query)
-            units = getUnits(query)
-            recval = rootrec[field_order.index(fld)]
-            searchterm = self.matchUnits(fld, val, units)
-            return self.meetsCondition(recval, ncmp, searchterm)
-        else:
-            if isAllGroup(query):
-                for subquery in getChildren(query):
-                    if not self.meetsAllConditionsByValList(
-                        rootrec, subquery, field_order
-                    ):
-                        return False
-                return True
-            else:
-                for subquery in getChildren(query):
-                    if self.meetsAllConditionsByValList(rootrec, subquery, field_order):
-                        return True
-                return False
-
-    def matchUnits(self, fld, val, units):
-        """
-        This is a python code version of matching units of the search term with the value returned from a query.  It
-        takes the field path, the search term value, and the units, and returns the search term value in the units/
-        format that the database returns so that they can be compared in `self.meetsCondition()`.
-
-        If
-        """
-        units_lookup = self.getFieldUnitsLookup()
-        if fld in units_lookup.keys():
-            if units in units_lookup[fld].keys():
-                try:
-                    return units_lookup[fld][units]["pyconvert"](val)
-                except Exception as e:
-                    # Gracefully fail and log the problem
-                    warnings.warn(
-                        f"Python conversion of units [{units}] for field [{fld}] value [{val}] in format "
-                        f"[{self.name}] failed with an exception: {str(e)}.  Returning original value.  Fix the "
-                        "[pyconvert] function in Format.unit_options to better handle this value."
-                    )
-            warnings.warn(
-                f"Units [{units}] dict for field [{fld}] not found for format [{self.name}]."
-            )
-        warnings.warn(
-            f"Units lookup is missing field key [{fld}] not found for format [{self.name}]."
-        )
-        return val
-
-    def meetsCondition(self, recval, condition, searchterm):
-        """
-        Determines whether the recval and search term match, given the matching condition.
-        This is only useful for re-filtering records in a template when the qry includes a fld from a many-to-many
-        related model relative to the root model.
-        Note that any changes to ncmp_choices must also be implemented here.
-        """
-        if condition == "iexact":
-            return recval.lower() == searchterm.lower()
-        elif condition == "not_iexact":
-            return recval.lower() != searchterm.lower()
-        elif condition == "exact":
-            return recval == searchterm
-        elif condition == "not_exact":
-            return recval != searchterm
-        elif condition == "lt":
-            return recval < searchterm
-        elif condition == "lte":
-            return recval <= searchterm
-        elif condition == "gt":
-            return recval > searchterm
-        elif condition == "gte":
-            return recval >= searchterm
-        elif condition == "isnull":
-            return recval is None
-        elif condition == "not_isnull":
-            return recval is not None
-        elif condition == "icontains":
-            return searchterm.lower() in recval.lower()
-        elif condition == "not_icontains":
-            return searchterm.lower() not in recval.lower()
-        elif condition == "istartswith":
-            return recval.lower().startswith(searchterm.lower())
-        elif condition == "not_istartswith":
-            return not recval.lower().startswith(searchterm.lower())
-        elif condition == "iendswith":
-            return recval.lower().endswith(searchterm.lower())
-        elif condition == "not_iendswith":
-            return not recval.lower().endswith(searchterm.lower())
-        else:
-            raise UnknownComparison(
-                f"Unrecognized negatable comparison (ncmp) value: {condition}."
+        split_annotations = {}
+        for mdl_inst in self.model_instances.values():
+            if mdl_inst["manyrelated"]["split_rows"]:
+                # The same default as in getFullJoinAnnotations
+                split_annotations[mdl_inst["path"]] = mdl_inst["manyrelated"].get(
+                    "root_annot_fld", mdl_inst["model"].lower()
+                )
+        return split_annotations
+
+    def statsAvailable(self):
+        return self.stats is not None
+
+
+class FormatMetadata:
+    """
+    The metadata derived from a Format's model_instances (and the models' ordering), computed once per process (see
+    Format.getMetadata), so that the Format's accessors are lookups.  Building it validates the format's field
+    configurations (e.g. units).  It is shared, so it must be treated as read-only.
+
+    Note that split_rows-dependent metadata (e.g. the distinct fields and the full join annotations) is still
+    assembled per call (from the precomputed fields of each model instance), because split_rows can be changed.
+    """
+
+    def __init__(self, fmt):
+        # Indexes of the fld (field path) values of all of the format's fields
+        self.search_field_choices = fmt.buildSearchFieldChoices()
+        self.field_types = fmt.buildFieldTypes()
+        self.field_units_dict = fmt.buildFieldUnitsDict()
+        self.field_units_lookup = fmt.buildFieldUnitsLookup()
+
+        self.all_field_units_choices = fmt.buildAllFieldUnitsChoices()
+        self.all_comparison_choices = fmt.buildAllComparisonChoices()
+        self.prefetches = tuple(fmt.buildPrefetches())
+
+        # Indexes of the model instances by key path and by model name
+        self.path_model_instances = {}
+        self.model_instance_names = {}
+
+        # Model instance name-keyed metadata
+        self.key_path_lists = {}
+        self.search_fields = {}
+        self.display_fields = {}
+        self.order_by_fields = {}
+        self.custom_distinct_fields = {}
+        self.split_distinct_fields = {}
+
+        for mdl_inst_nm, mdl_inst in fmt.model_instances.items():
+            path = mdl_inst["path"]
+            if path not in self.path_model_instances:
+                self.path_model_instances[path] = mdl_inst_nm
+            self.model_instance_names.setdefault(mdl_inst["model"], []).append(
+                mdl_inst_nm
             )
 
+            self.key_path_lists[mdl_inst_nm] = tuple(path.split("__"))
+            self.search_fields[mdl_inst_nm] = fmt.buildSearchFields(mdl_inst_nm)
+            self.display_fields[mdl_inst_nm] = fmt.buildDisplayFields(mdl_inst_nm)
+            self.order_by_fields[mdl_inst_nm] = tuple(
+                fmt.buildOrderByFields(mdl_inst_nm)
+            )
+            if "distinct" in mdl_inst and mdl_inst["distinct"]:
+                self.custom_distinct_fields[mdl_inst_nm] = tuple(
+                    fmt.buildCustomDistinctFields(mdl_inst_nm)
+                )
+            # Only related model instances can split root records
+            if path != "":
+                self.split_distinct_fields[mdl_inst_nm] = tuple(
+                    fmt.buildSplitDistinctFields(mdl_inst_nm)
+                )
 
-class UnknownComparison(Exception):
-    pass
+        # The ordering fields of the format's models (including the root model), keyed on model name
+        self.model_order_by_fields = {}
+        mdl_nms = list(self.model_instance_names.keys())
+        if fmt.rootmodel is not None:
+            mdl_nms.append(fmt.rootmodel.__name__)
+        for mdl_nm in mdl_nms:
+            self.model_order_by_fields[mdl_nm] = tuple(
+                fmt.buildOrderByFields(model_name=mdl_nm)
+            )
 
 
 class TypeUnitsMismatch(Exception):
@@ -0,0 +1,733 @@
+import csv
+import zlib
+from collections import defaultdict
+from io import StringIO
+from typing import Dict, Type
+
+import numpy as np
+from django.db.models import Count, F
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    # pyarrow is optional.  Without it, Parquet and Arrow downloads are unavailable (see isArrowAvailable).
+    pyarrow = None
+
+from DataRepo.formats.dataformat_group_query import shortenFldPath
+from DataRepo.models import (
+    Animal,
+    FCirc,
+    InfusateTracer,
+    PeakData,
+    PeakGroup,
+    Study,
+    TracerLabel,
+)
+from DataRepo.utils.isotopologue_cube import (
+    IsotopologueCube,
+    enrichment_abundances,
+    normalized_labelings,
+)
+
+
+class RecordsEngine:
+    """
+    Batch engine that resolves the properties of a chunk of records by loading the records with a single query and
+    calling the properties.
+    """
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def resolve(self, model, pks, props):
+        return {
+            rec.pk: {prop: getattr(rec, prop) for prop in props}
+            for rec in model.objects.filter(pk__in=pks)
+        }
+
+
+class IsotopologueCubeEngine:
+    """
+    Batch engine that resolves the enrichment_fraction, enrichment_abundance, and normalized_labeling of a chunk of
+    PeakGroupLabel records from the isotopologue cube of the export's scope (see FormatExporter.getCubeScope), instead
+    of re-walking their peak data through the ORM.  The cube and its metric arrays are loaded once per export.
+    """
+
+    metrics = {
+        "enrichment_fraction": lambda cube: cube.enrichment_fraction_array,
+        "enrichment_abundance": enrichment_abundances,
+        "normalized_labeling": lambda cube: normalized_labelings(
+            cube, cube.serum_tracers_enrichment_fractions()
+        ),
+    }
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.cube = None
+        self.arrays = {}
+
+    def getCube(self):
+        if self.cube is None:
+            self.cube = IsotopologueCube.get(**self.exporter.getCubeScope())
+        return self.cube
+
+    def getArray(self, metric):
+        if metric not in self.arrays:
+            self.arrays[metric] = self.metrics[metric](self.getCube())
+        return self.arrays[metric]
+
+    def resolve(self, model, pks, props):
+        cube = self.getCube()
+        values = {}
+        for pk, msrun_id, peak_group_name, element in model.objects.filter(
+            pk__in=pks
+        ).values_list("pk", "peak_group__msrun_id", "peak_group__name", "element"):
+            try:
+                pos = cube.get_position(msrun_id, peak_group_name, element)
+            except KeyError:
+                # There is no peak data for this peak group/element
+                pos = None
+            values[pk] = {}
+            for prop in props:
+                value = np.nan if pos is None else self.getArray(prop)[pos]
+                values[pk][prop] = None if np.isnan(value) else float(value)
+        return values
+
+
+class FCircRatesEngine(IsotopologueCubeEngine):
+    """
+    Batch engine that resolves the average and intact rates of appearance and disappearance (e.g.
+    FCirc.rate_appearance_average_per_gram) of a chunk of FCirc records.  The last peak group of each record's serum
+    sample and tracer (see FCirc.last_peak_group_in_sample) is determined from the chunk's tracer peak groups.  Its
+    enrichment fraction is retrieved from the isotopologue cube of the export's scope and its intact fraction is
+    computed from its peak data's labels, like PeakGroupLabel.intact_fraction (see PeakData.get_intact_fraction).  A
+    chunk is resolved using a constant number of queries, instead of computing each record's rates through the ORM.
+    """
+
+    metrics = {
+        "enrichment_fraction": lambda cube: cube.enrichment_fraction_array,
+    }
+
+    def resolve(self, model, pks, props):
+        fcircs = list(
+            model.objects.filter(pk__in=pks).values_list(
+                "pk",
+                "element",
+                "tracer__id",
+                "tracer__compound__id",
+                "serum_sample__id",
+                "serum_sample__is_serum_sample",
+                "serum_sample__animal__infusate__id",
+                "serum_sample__animal__infusion_rate",
+                "serum_sample__animal__body_weight",
+            )
+        )
+
+        # The concentration of each of the infusates' tracers, keyed on tracer compound ID
+        concentrations = defaultdict(dict)
+        for infusate_id, compound_id, concentration in InfusateTracer.objects.filter(
+            infusate__id__in={row[6] for row in fcircs}
+        ).values_list("infusate__id", "tracer__compound__id", "concentration"):
+            concentrations[infusate_id][compound_id] = concentration
+
+        label_counts = {
+            (tracer_id, element): count
+            for tracer_id, element, count in TracerLabel.objects.filter(
+                tracer__id__in={row[2] for row in fcircs}
+            ).values_list("tracer__id", "element", "count")
+        }
+
+        # The last peak group of each serum sample for each tracer compound: (id, compound id, sample id, msrun date,
+        # msrun id, name)
+        last_peak_groups = defaultdict(dict)
+        for row in (
+            PeakGroup.objects.filter(
+                msrun__sample__id__in={row[4] for row in fcircs},
+                compounds__id__in={
+                    cid for cmpd_concs in concentrations.values() for cid in cmpd_concs
+                },
+            )
+            .values_list(
+                "id",
+                "compounds__id",
+                "msrun__sample__id",
+                "msrun__date",
+                "msrun__id",
+                "name",
+            )
+            .distinct()
+        ):
+            cur = last_peak_groups[row[2]].get(row[1])
+            if cur is None or FCirc.peak_group_in_sample_sort_key(
+                row
+            ) > FCirc.peak_group_in_sample_sort_key(cur):
+                last_peak_groups[row[2]][row[1]] = row
+
+        # The abundance and labels ({element: count}) of each peak data of the last peak groups, keyed on peak group ID
+        # and peak data ID.  The rows are per peak data label, and unlabeled peak data have a row with a null element.
+        peak_data = defaultdict(dict)
+        for pg_id, pd_id, abundance, element, count in PeakData.objects.filter(
+            peak_group__id__in={
+                row[0]
+                for sample_pgs in last_peak_groups.values()
+                for row in sample_pgs.values()
+            }
+        ).values_list(
+            "peak_group_id",
+            "id",
+            "corrected_abundance",
+            "labels__element",
+            "labels__count",
+        ):
+            if pd_id not in peak_data[pg_id]:
+                peak_data[pg_id][pd_id] = (abundance, {})
+            if element is not None:
+                peak_data[pg_id][pd_id][1][element] = count
+
+        values = {}
+        for (
+            pk,
+            element,
+            tracer_id,
+            compound_id,
+            sample_id,
+            is_serum_sample,
+            infusate_id,
+            infusion_rate,
+            body_weight,
+        ) in fcircs:
+            rates = self.getRates(
+                element,
+                last_peak_groups[sample_id],
+                peak_data,
+                concentrations[infusate_id],
+                compound_id,
+                label_counts.get((tracer_id, element)),
+                is_serum_sample,
+                infusion_rate,
+                body_weight,
+            )
+            values[pk] = {prop: rates.get(prop) for prop in props}
+        return values
+
+    def getRates(
+        self,
+        element,
+        sample_peak_groups,
+        peak_data,
+        concentrations,
+        compound_id,
+        label_count,
+        is_serum_sample,
+        infusion_rate,
+        body_weight,
+    ):
+        """
+        Returns a dict of the rates that can be computed (see PeakGroupLabel.can_compute_tracer_label_rates, etc.) for
+        an FCirc record, keyed on property name.
+        """
+        concentration = concentrations.get(compound_id)
+        # A sample's last tracer peak groups are only defined when it has a peak group for every tracer
+        if (
+            not all(cid in sample_peak_groups for cid in concentrations.keys())
+            or not label_count
+            or not is_serum_sample
+            or not infusion_rate
+            or not concentration
+        ):
+            return {}
+        pg_id, _, _, _, msrun_id, peak_group_name = sample_peak_groups[compound_id]
+        cube = self.getCube()
+        try:
+            pos = cube.get_position(msrun_id, peak_group_name, element)
+        except KeyError:
+            # There is no peak data for this peak group/element
+            return {}
+
+        rates = {}
+        infused = infusion_rate * concentration
+        enrichment_fraction = self.getArray("enrichment_fraction")[pos]
+        if enrichment_fraction > 0:
+            rates["rate_disappearance_average_per_gram"] = float(
+                infused / enrichment_fraction
+            )
+            rates["rate_appearance_average_per_gram"] = float(
+                infused / enrichment_fraction - infused
+            )
+        intact_fraction = PeakData.get_intact_fraction(
+            list(peak_data[pg_id].values()), element, label_count
+        )
+        if intact_fraction is not None and intact_fraction > 0:
+            rates["rate_disappearance_intact_per_gram"] = float(
+                infused / intact_fraction
+            )
+            rates["rate_appearance_intact_per_gram"] = float(
+                infused / intact_fraction - infused
+            )
+        if body_weight:
+            for rate in list(rates.keys()):
+                rates[rate.replace("_per_gram", "_per_animal")] = (
+                    rates[rate] * body_weight
+                )
+        return rates
+
+
+class FormatExporter:
+    """
+    Exports the results of a search format's query (see FormatGroup.performQuery), driven by the format's declarative
+    column spec (Format.download_columns).  Each column is a dict with a "header" and one of:
+
+        field       A single-valued lookup from the root model.
+        expression  A query expression on the root model.
+        property    A (computed) property of the root model, resolved by a batch engine.
+
+    A column with a "path" (a many-related key path from the root model, e.g. "labels") holds the list of values of
+    the related records instead (in the related model's default order), and its field, expression, or property is
+    relative to the related model.  If the format splits rows on that path (see Format.getSplitRowsAnnotations), only
+    the related record of the (split) row is included.  A related field that crosses another to-many relation (e.g.
+    "synonyms__name") must set a "nested_delimiter", in which case the value of each related record is the list of its
+    case-insensitively unique values.
+
+    Properties are resolved by the batch engine named by the column's "engine" (default: "records").  Text output is
+    controlled by "delimiter" (which joins the values of many-related columns) and "convert" (the name of a
+    text_converters function applied to every value).  Typed (Parquet and Arrow) output uses the column's "type" (one
+    of the arrow_types keys), which defaults to the type of the field or the expression's output field (see
+    field_types).  Property columns must set a type.
+
+    Rows are fetched (with values_list) in chunks of chunk_size rows through a server-side cursor.  The related and
+    computed values of a chunk's rows are fetched all at once, using a constant number of queries per chunk.
+    """
+
+    chunk_size = 2000
+    default_delimiter = ";"
+    batch_engines: Dict[str, Type] = {
+        "records": RecordsEngine,
+        "isotopologue_cube": IsotopologueCubeEngine,
+        "fcirc_rates": FCircRatesEngine,
+    }
+    text_converters = {
+        "weeks": lambda td: td.total_seconds() // 604800,
+        "minutes": lambda td: td.total_seconds() // 60,
+    }
+    # Model field internal types mapped to column types.  Other fields are exported as strings.
+    field_types = {
+        "AutoField": "integer",
+        "BigAutoField": "integer",
+        "BigIntegerField": "integer",
+        "BooleanField": "boolean",
+        "CharField": "string",
+        "DateField": "date",
+        "DateTimeField": "datetime",
+        "DurationField": "duration",
+        "FloatField": "float",
+        "IntegerField": "integer",
+        "PositiveIntegerField": "integer",
+        "PositiveSmallIntegerField": "integer",
+        "SmallIntegerField": "integer",
+        "TextField": "string",
+    }
+    # Column types mapped to the names of the functions that create their arrow data types
+    arrow_types = {
+        "boolean": ("bool_",),
+        "date": ("date32",),
+        "datetime": ("timestamp", "us"),
+        "duration": ("duration", "us"),
+        "float": ("float64",),
+        "integer": ("int64",),
+        "string": ("string",),
+    }
+    # File types of typed output: Parquet files and Arrow IPC streams
+    arrow_filetypes = ["parquet", "arrow"]
+
+    def __init__(self, fmtobj, results, chunk_size=None):
+        self.fmtobj = fmtobj
+        self.results = results
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self.columns = fmtobj.getDownloadColumns()
+        self.engines = {}
+
+        # The paths of the many-related columns and the row annotations of those that rows are split on
+        split_annotations = fmtobj.getSplitRowsAnnotations()
+        self.paths = []
+        for col in self.columns:
+            if "path" in col and col["path"] not in self.paths:
+                self.paths.append(col["path"])
+        self.split_annotations = {
+            path: split_annotations[path]
+            for path in self.paths
+            if path in split_annotations
+        }
+
+    def getHeaders(self):
+        return [col["header"] for col in self.columns]
+
+    def getColumnType(self, col):
+        """Returns the type of a column's (related) values"""
+        if "type" in col:
+            return col["type"]
+        if "expression" in col:
+            field = col["expression"].output_field
+        elif "field" in col:
+            model = (
+                self.fmtobj.rootmodel
+                if "path" not in col
+                else self.getPathModel(col["path"])
+            )
+            for fld in col["field"].split("__"):
+                field = model._meta.get_field(fld)
+                if field.is_relation:
+                    model = field.related_model
+        else:
+            raise ValueError(f"Column [{col['header']}] must have a type.")
+        return self.field_types.get(field.get_internal_type(), "string")
+
+    def getEngine(self, name):
+        """Returns this export's instance of the named batch engine"""
+        if name not in self.engines:
+            self.engines[name] = self.batch_engines[name](self)
+        return self.engines[name]
+
+    def getCubeScope(self):
+        """
+        Returns the IsotopologueCube.get keyword arguments of the narrowest scope containing the animals of all of the
+        results: the animal, if there is only 1, otherwise a study containing all of them.  If there is no such study,
+        an empty dict (i.e. the whole database) is returned.
+        """
+        animal_inst = self.fmtobj.getModelInstance("Animal")
+        animal_path = shortenFldPath(
+            self.fmtobj.model_instances[animal_inst]["path"],
+            self.fmtobj.getPathShortcuts(),
+        )
+        animal_ids = (
+            self.results.order_by().distinct().values_list(animal_path, flat=True)
+        )
+        animals = Animal.objects.filter(id__in=animal_ids)
+        animal_count = animals.count()
+        if animal_count == 1:
+            return {"animal_id": animals.get().id}
+        study_id = (
+            Study.objects.filter(animals__in=animals)
+            .annotate(scope_animal_count=Count("animals"))
+            .filter(scope_animal_count=animal_count)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if study_id is not None:
+            return {"study_id": study_id}
+        return {}
+
+    def iterChunks(self):
+        """
+        Yields the rows of the results in lists of up to chunk_size rows.  Each row is a list of column values (lists
+        for many-related columns).
+        """
+        # Positions in the values_list rows of the primary key, split annotations, and single-valued columns
+        value_names = ["pk"]
+        annot_positions = {}
+        for path, annot in self.split_annotations.items():
+            annot_positions[path] = len(value_names)
+            value_names.append(annot)
+        annotations = {}
+        col_positions = {}
+        for i, col in enumerate(self.columns):
+            if "path" in col or "property" in col:
+                continue
+            col_positions[i] = len(value_names)
+            if "expression" in col:
+                annotations[f"export_column_{i}"] = col["expression"]
+                value_names.append(f"export_column_{i}")
+            else:
+                value_names.append(col["field"])
+
+        # Prefetches do not apply to values_list rows
+        qs = self.results.prefetch_related(None)
+        if len(annotations) > 0:
+            qs = qs.annotate(**annotations)
+
+        chunk = []
+        for row in qs.values_list(*value_names).iterator(chunk_size=self.chunk_size):
+            chunk.append(row)
+            if len(chunk) == self.chunk_size:
+                yield self.getChunkRows(chunk, annot_positions, col_positions)
+                chunk = []
+        if len(chunk) > 0:
+            yield self.getChunkRows(chunk, annot_positions, col_positions)
+
+    def getChunkRows(self, chunk, annot_positions, col_positions):
+        """
+        Resolves the many-related and computed column values of a chunk of values_list rows and returns the rows.
+        """
+        rootmodel = self.fmtobj.rootmodel
+        root_pks = [row[0] for row in chunk]
+
+        # The primary keys of the related records of each row, for each path
+        row_related_pks = {}
+        related_values = {}
+        for path in self.paths:
+            if path in annot_positions:
+                pos = annot_positions[path]
+                row_related_pks[path] = [
+                    [] if row[pos] is None else [row[pos]] for row in chunk
+                ]
+            else:
+                related_pks = self.getRelatedPks(path, root_pks)
+                row_related_pks[path] = [related_pks[row[0]] for row in chunk]
+            model = self.getPathModel(path)
+            pks = {pk for related_pks in row_related_pks[path] for pk in related_pks}
+            related_values[path] = self.getColumnValues(model, path, pks)
+
+        root_values = self.getColumnValues(rootmodel, None, root_pks)
+
+        rows = []
+        for rownum, row in enumerate(chunk):
+            values = []
+            for i, col in enumerate(self.columns):
+                if "path" in col:
+                    values.append(
+                        [
+                            related_values[col["path"]][i].get(pk)
+                            for pk in row_related_pks[col["path"]][rownum]
+                        ]
+                    )
+                elif i in col_positions:
+                    values.append(row[col_positions[i]])
+                else:
+                    values.append(root_values[i].get(row[0]))
+            rows.append(values)
+        return rows
+
+    def getColumnValues(self, model, path, pks):
+        """
+        Returns the values of the (many-related, if path is not None, otherwise root) columns that are not fetched with
+        the rows, for the records of model with the supplied primary keys, as a dict keyed on column index of dicts
+        keyed on primary key.
+        """
+        values = defaultdict(dict)
+        if len(pks) == 0:
+            return values
+
+        annotations = {}
+        annotation_columns = {}
+        engine_props = defaultdict(list)
+        for i, col in enumerate(self.columns):
+            if col.get("path") != path:
+                continue
+            if "property" in col:
+                engine_props[col.get("engine", "records")].append((i, col["property"]))
+            elif path is None:
+                # Root fields and expressions are fetched with the rows
+                continue
+            elif "nested_delimiter" in col:
+                for pk, value in (
+                    model.objects.filter(pk__in=pks)
+                    .order_by(col["field"])
+                    .values_list("pk", col["field"])
+                ):
+                    values[i].setdefault(pk, [])
+                    if value is not None:
+                        values[i][pk].append(value)
+            else:
+                annotations[f"export_column_{i}"] = col.get(
+                    "expression", F(col.get("field"))
+                )
+                annotation_columns[f"export_column_{i}"] = i
+
+        if len(annotations) > 0:
+            for rec in (
+                model.objects.filter(pk__in=pks)
+                .annotate(**annotations)
+                .values("pk", *annotations.keys())
+            ):
+                for name, i in annotation_columns.items():
+                    values[i][rec["pk"]] = rec[name]
+
+        for engine_name, col_props in engine_props.items():
+            props = list(dict.fromkeys(prop for _, prop in col_props))
+            resolved = self.getEngine(engine_name).resolve(model, pks, props)
+            for i, prop in col_props:
+                values[i] = {pk: resolved[pk][prop] for pk in resolved.keys()}
+
+        return values
+
+    def getRelatedPks(self, path, root_pks):
+        """
+        Returns a dict of the supplied root record primary keys mapped to the primary keys of their records related via
+        path, ordered by the related model's default ordering.
+        """
+        ordering = []
+        for ob_field in self.getPathModel(path)._meta.ordering:
+            if ob_field.startswith("-"):
+                ordering.append(f"-{path}__{ob_field[1:]}")
+            else:
+                ordering.append(f"{path}__{ob_field}")
+        ordering.append(f"{path}__pk")
+
+        related_pks = defaultdict(list)
+        for root_pk, related_pk in (
+            self.fmtobj.rootmodel.objects.filter(
+                pk__in=root_pks, **{f"{path}__isnull": False}
+            )
+            .order_by(*ordering)
+            .values_list("pk", f"{path}__pk")
+        ):
+            if related_pk not in related_pks[root_pk]:
+                related_pks[root_pk].append(related_pk)
+        return related_pks
+
+    def getPathModel(self, path):
+        """Returns the model at the end of a key path from the root model"""
+        model = self.fmtobj.rootmodel
+        for fld in path.split("__"):
+            model = model._meta.get_field(fld).related_model
+        return model
+
+    def getArrowSchema(self, metadata=None):
+        """
+        Returns the pyarrow schema of the export.  Many-related columns are lists (of lists, if nested) of the column
+        type.
+        """
+        fields = []
+        for col in self.columns:
+            func_name, *args = self.arrow_types[self.getColumnType(col)]
+            arrow_type = getattr(pyarrow, func_name)(*args)
+            if "path" in col:
+                if "nested_delimiter" in col:
+                    arrow_type = pyarrow.list_(arrow_type)
+                arrow_type = pyarrow.list_(arrow_type)
+            fields.append(pyarrow.field(col["header"], arrow_type))
+        return pyarrow.schema(fields, metadata=metadata)
+
+    def iterArrow(self, filetype="parquet", metadata=None, compression=None):
+        """
+        Yields the export as a Parquet file (one row group per chunk of rows) or an Arrow IPC stream (one record batch
+        per chunk of rows), in bytes, one chunk at a time.  Requires pyarrow.  metadata is a dict of strings added to
+        the schema.  compression is the name of a codec supported by the writer (e.g. "zstd").  By default, Parquet
+        files are compressed with snappy and Arrow streams are not compressed.
+        """
+        if filetype not in self.arrow_filetypes:
+            raise ValueError(
+                f"Invalid file type: [{filetype}].  Must be one of {self.arrow_filetypes}."
+            )
+        schema = self.getArrowSchema(metadata)
+        sink = ChunkSink()
+        if filetype == "parquet":
+            writer = pyarrow.parquet.ParquetWriter(
+                sink, schema, compression=compression or "snappy"
+            )
+        else:
+            writer = pyarrow.ipc.new_stream(
+                sink,
+                schema,
+                options=pyarrow.ipc.IpcWriteOptions(compression=compression),
+            )
+        for chunk in self.iterChunks():
+            batch = pyarrow.record_batch(
+                [
+                    pyarrow.array([row[i] for row in chunk], type=field.type)
+                    for i, field in enumerate(schema)
+                ],
+                schema=schema,
+            )
+            writer.write_batch(batch)
+            yield sink.pop()
+        writer.close()
+        yield sink.pop()
+
+    def getTextValue(self, col, value):
+        """Returns the text of a column value"""
+        if "path" not in col:
+            return self.getTextScalar(col, value)
+        if "nested_delimiter" in col:
+            texts = [
+                col["nested_delimiter"].join(getCaseInsensitiveUniques(vals))
+                for vals in value
+            ]
+        else:
+            texts = [self.getTextScalar(col, val) for val in value]
+        return col.get("delimiter", self.default_delimiter).join(texts)
+
+    def getTextScalar(self, col, value):
+        if value is None:
+            return "None"
+        if "convert" in col:
+            value = self.text_converters[col["convert"]](value)
+        return str(value)
+
+    def iterDelimited(self, delimiter="\t", preamble=""):
+        """
+        Yields the export as delimited text (written with the csv module), one string per chunk of rows, after the
+        preamble and the header row.
+        """
+        buffer = StringIO()
+        writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+        buffer.write(preamble)
+        writer.writerow(self.getHeaders())
+        yield buffer.getvalue()
+        for chunk in self.iterChunks():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                [self.getTextValue(col, value) for col, value in zip(self.columns, row)]
+                for row in chunk
+            )
+            yield buffer.getvalue()
+
+
+class ChunkSink:
+    """
+    A write-only file-like object that holds the bytes written to it until they are popped, so that the output of a
+    pyarrow writer can be streamed.
+    """
+
+    def __init__(self):
+        self.data = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.data.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def pop(self):
+        """Returns and removes the bytes written since the last pop"""
+        data = b"".join(self.data)
+        self.data = []
+        return data
+
+
+def isArrowAvailable():
+    """Returns whether Parquet and Arrow exports are available, i.e. whether pyarrow is installed"""
+    return pyarrow is not None
+
+
+def getCaseInsensitiveUniques(values):
+    """
+    Returns the case-insensitively unique values.  The same value is kept as the get_case_insensitive_synonyms template
+    tag does.
+    """
+    uniques = {}
+    for value in sorted(values):
+        uniques[value.lower()] = value
+    return list(uniques.values())
+
+
+def iterGzipped(strings, encoding="utf-8"):
+    """Gzip-compresses a stream of strings"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for string in strings:
+        data = compressor.compress(string.encode(encoding))
+        if data:
+            yield data
+    yield compressor.flush()
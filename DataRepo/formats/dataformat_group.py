@@ -1,18 +1,30 @@
+import hashlib
 import json
-from copy import deepcopy
+from collections import OrderedDict
+from copy import copy, deepcopy
+from threading import Lock
 from typing import Dict
 
-from django.db.models import Prefetch
-from django.db.utils import ProgrammingError
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, F, Func, Prefetch, TextField
 from django.http import Http404
 
 from DataRepo.formats.dataformat import Format
+from DataRepo.formats.dataformat_export import FormatExporter
 from DataRepo.formats.dataformat_group_query import (
     constructAdvancedQuery,
+    constructAdvancedQueryHelper,
+    constructKeysetQuery,
     getNumEmptyQueries,
     getSelectedFormat,
+    normalizeQry,
     setFirstEmptyQuery,
+    shortenFldPath,
 )
+from DataRepo.models.hier_cached_model import get_data_version
 from DataRepo.models.utilities import get_model_by_name
 
 
@@ -26,6 +38,12 @@ class FormatGroup:
     default_mode = "search"
     default_format = None
     modeldata: Dict[int, Format] = {}
+    # Prefix of the annotations holding each row's keyset (sort key) values
+    keyset_annotation_prefix = "keyset_value_"
+    # Compiled query plans (see getQueryPlan), in least recently used order, shared by all instances
+    query_plans: "OrderedDict[str, QueryPlan]" = OrderedDict()
+    query_plan_cache_size = 256
+    query_plan_lock = Lock()
 
     def addFormats(self, format_classes):
         """
@@ -230,11 +248,11 @@ class FormatGroup:
         issues like the one described in #229.
         """
         all_fld_choices = ()
-        seen = []
+        seen = set()
         for fmtid in self.modeldata.keys():
             for (fld_val, fld_name) in self.getSearchFieldChoices(fmtid):
                 if fld_val not in seen:
-                    seen.append(fld_val)
+                    seen.add(fld_val)
                     all_fld_choices = all_fld_choices + ((fld_val, fld_name),)
         return all_fld_choices
 
@@ -375,24 +393,66 @@ class FormatGroup:
             order_by, assume_distinct, split_all
         )
 
+    def getKeysetFields(self, fmt, order_by=None):
+        return self.modeldata[fmt].getKeysetFields(order_by)
+
+    def getPageKeyset(self, results):
+        """
+        Returns the keyset values (annotated by performQuery) of the first and last rows of a page of results, to be
+        supplied (via the Pager) to performQuery to seek to the next or previous page.  Returns None if there are no
+        results.
+        """
+        recs = list(results)
+        if len(recs) == 0:
+            return None
+
+        def get_key(rec):
+            key = []
+            while hasattr(rec, f"{self.keyset_annotation_prefix}{len(key)}"):
+                key.append(getattr(rec, f"{self.keyset_annotation_prefix}{len(key)}"))
+            return key
+
+        # Rows served from a result snapshot (see getResultSnapshot) are paged by offset and have no keyset values
+        if len(get_key(recs[0])) == 0:
+            return None
+
+        return {"first": get_key(recs[0]), "last": get_key(recs[-1])}
+
     def getFullJoinAnnotations(self, fmt):
         return self.modeldata[fmt].getFullJoinAnnotations()
 
+    def getSplitRowsAnnotations(self, fmt):
+        return self.modeldata[fmt].getSplitRowsAnnotations()
+
     def getStatsParams(self, fmt):
         return self.modeldata[fmt].getStatsParams()
 
-    def statsAvailable(self, fmt):
-        return self.modeldata[fmt].statsAvailable()
+    def getPathShortcuts(self, fmt):
+        return self.modeldata[fmt].getPathShortcuts()
 
-    def meetsAllConditionsByValList(self, fmt, rootrec, query, field_order):
+    def getExporter(self, fmt, results):
+        """Returns a FormatExporter of results of performQuery (or getAllBrowseData)"""
+        return FormatExporter(self.modeldata[fmt], results)
+
+    def getQueryExporter(self, fmt, qry=None):
         """
-        This is a python-code version of a complex Q expression, necessary for checking filters in aggregate count
-        annotations, because the Django ORM does not support .distinct(fields).annotate(Count) when duplicate root
-        table records exist.
+        Returns a FormatExporter of all of the results of a search of the supplied format using the supplied qry object
+        (or of all of the format's data if qry is None), in the order performQuery returns them.  The results are built
+        straight from the search's query plan (see getQueryPlan), so unlike performQuery, no count (or stats) query is
+        executed.
         """
-        return self.modeldata[fmt].meetsAllConditionsByValList(
-            rootrec, query, field_order
-        )
+        plan = self.getQueryPlan(fmt, qry)
+        if plan.q_exp is None:
+            results = self.getRootQuerySet(fmt)
+        else:
+            results = self.getRootQuerySet(fmt).filter(plan.q_exp)
+        results = results.order_by(*plan.keyset_fields).distinct(*plan.distinct_fields)
+        for annotation in plan.annotations:
+            results = results.annotate(**annotation)
+        return self.getExporter(fmt, results)
+
+    def statsAvailable(self, fmt):
+        return self.modeldata[fmt].statsAvailable()
 
     def searchFieldToDisplayField(self, mdl, fld, val, qry):
         """
@@ -475,12 +535,24 @@ class FormatGroup:
         order_by=None,
         order_direction=None,
         generate_stats=False,
+        keyset=None,
+        estimate_count=False,
+        snapshot=False,
     ):
         """
         Grabs all data without a filtering match for browsing.
         """
         return self.performQuery(
-            None, format, limit, offset, order_by, order_direction, generate_stats
+            None,
+            format,
+            limit,
+            offset,
+            order_by,
+            order_direction,
+            generate_stats,
+            keyset,
+            estimate_count,
+            snapshot,
         )
 
     def performQuery(
@@ -492,18 +564,33 @@ class FormatGroup:
         order_by=None,
         order_direction=None,
         generate_stats=False,
+        keyset=None,
+        estimate_count=False,
+        snapshot=False,
     ):
         """
         Executes an advanced search query.  The only required input is either a qry object or a format (fmt).
+
+        The returned count is exact (and cached, see getQueryCount), unless estimate_count is True, in which case it
+        may be an EstimatedCount.
+
+        Rows are ordered by the format's keyset fields (see getKeysetFields), whose values are annotated on each
+        returned record.  Pages are retrieved by offset, unless a keyset is supplied: a dict containing the keyset
+        "values" of a row and whether to "reverse".  In that case, the page of limit rows that follows (or, if reverse
+        is True, precedes) that row is retrieved using a seek predicate and offset is ignored.  Seeking is much faster
+        than offsetting on deep pages, because the database does not have to sort and skip all the preceding rows.
+
+        If snapshot is True and the count is exact, the page is retrieved from a cached snapshot of the ordered result
+        rows (see getResultSnapshot), if one is available, in which case the returned results are a list of records
+        without keyset values.  The snapshot takes precedence over the keyset: the snapshot page is taken by offset and
+        any supplied keyset is ignored.  Callers that seek must therefore also supply the offset of the requested page
+        (as the advanced search view does), so that the same page is returned whichever way it is retrieved.
         """
         results = None
         cnt = 0
-        q_exp = None
 
         if qry is not None:
             selfmt = getSelectedFormat(qry)
-            units_lookup = self.getFieldUnitsLookup(selfmt)
-            q_exp = constructAdvancedQuery(qry, units_lookup)
             if fmt is not None and fmt != selfmt:
                 raise Exception(
                     f"The selected format in the qry object: [{selfmt}] does not match the supplied format: [{fmt}]"
@@ -518,7 +605,20 @@ class FormatGroup:
         if fmt not in self.getFormatNames().keys():
             raise KeyError("Invalid selected format: {fmt}")
 
-        # If the Q expression is None, get all, otherwise filter
+        if order_direction is not None and order_direction not in ["asc", "desc"]:
+            raise Exception(
+                f"Invalid order direction: {order_direction}.  Must be 'asc' or 'desc'."
+            )
+        # Everything that depends only on the qry (or format) and the ordering is compiled once and cached.  Only the
+        # ordering direction, the seek predicate, and the limit/offset are bound per call.
+        plan = self.getQueryPlan(fmt, qry, order_by)
+        q_exp = plan.q_exp
+        keyset_fields = plan.keyset_fields
+        distinct_fields = plan.distinct_fields
+        descending = order_direction == "desc"
+
+        # If the Q expression is None, get all, otherwise filter.  Note that stats are generated before the seek
+        # predicate (if any) is added.
         if q_exp is None:
             results = self.getRootQuerySet(fmt)
         else:
@@ -536,25 +636,44 @@ class FormatGroup:
             stats["data"] = self.getQueryStats(results, fmt)
             stats["show"] = True
 
-        # Order by
-        if order_by is not None:
-            order_by_arg = order_by
-            if order_direction is not None:
-                if order_direction == "desc":
-                    order_by_arg = f"-{order_by}"
-                elif order_direction and order_direction != "asc":
-                    raise Exception(
-                        f"Invalid order direction: {order_direction}.  Must be 'asc' or 'desc'."
-                    )
-            results = results.order_by(order_by_arg)
-
-        # This ensures the number of records matches the number of rows desired in the html table based on the
-        # split_rows values configured in each format in SearchGroup
-        distinct_fields = self.getDistinctFields(fmt, order_by)
-        results = results.distinct(*distinct_fields)
+        # Order by the keyset fields, which include the order_by field and the distinct fields, so the ordering is
+        # total (i.e. deterministic) and each page's rows can be sought after the previous page's last row
+        def get_ordering(desc):
+            return [f"-{fld}" if desc else fld for fld in keyset_fields]
+
+        results = results.order_by(*get_ordering(descending)).distinct(*distinct_fields)
 
         # Count the total results after employing distinct.  Limit/offset are only used for paging.
-        cnt = results.count()
+        cnt = self.getQueryCount(results, fmt, qry, estimate=estimate_count)
+
+        # Retrieve the page from the snapshot of the result rows (taken on the first request), if available.  The
+        # snapshot wins over any keyset: its page is taken by offset and the seek below is skipped.  When the count is
+        # estimated, the results are too many to snapshot quickly.
+        if snapshot and not isinstance(cnt, EstimatedCount):
+            snap = self.getResultSnapshot(
+                results, fmt, qry, order_by, order_direction, plan
+            )
+            if snap is not None:
+                end_index = None if limit is None else offset + limit
+                page = snap[offset:end_index]
+                return self.getResultSnapshotRows(fmt, plan, page), cnt, stats
+
+        # Seek to the page after (or before) the keyset row.  The seek predicate must be added in the same filter call
+        # as the search's Q expression so that they (and the ordering) share the joins of M:M related tables.
+        seek_reverse = False
+        if keyset is not None:
+            seek_reverse = keyset.get("reverse", False)
+            seek_desc = descending != seek_reverse
+            seek_exp = constructKeysetQuery(keyset_fields, keyset["values"], seek_desc)
+            if q_exp is not None:
+                seek_exp &= q_exp
+            results = (
+                self.getRootQuerySet(fmt)
+                .filter(seek_exp)
+                .order_by(*get_ordering(seek_desc))
+                .distinct(*distinct_fields)
+            )
+            offset = 0
 
         # Limit
         if limit is not None:
@@ -562,10 +681,83 @@ class FormatGroup:
             end_index = offset + limit
             results = results[start_index:end_index]
 
+        prefetches = plan.getPrefetches()
+        if prefetches is not None:
+            results = results.prefetch_related(*prefetches)
+
+        for annotation in plan.annotations:
+            results = results.annotate(**annotation)
+
+        # Annotate the keyset values, so that the keyset of a page can be obtained (see getPageKeyset)
+        results = results.annotate(
+            **{
+                f"{self.keyset_annotation_prefix}{i}": F(fld)
+                for i, fld in enumerate(keyset_fields)
+            }
+        )
+
+        # A page sought in reverse was retrieved in reverse order
+        if seek_reverse:
+            results = list(results)[::-1]
+
+        return results, cnt, stats
+
+    def getQueryPlan(self, fmt, qry=None, order_by=None):
+        """
+        Returns the compiled QueryPlan of a search of the supplied format using the supplied qry object (or of all the
+        format's data when browsing, i.e. if qry is None), ordered by order_by.  Plans are cached (see
+        query_plan_cache_size) keyed on a hash of the format, the normalized qry, and order_by, so that repeated
+        searches and page turns do not recompile the Q expression, prefetches, distinct fields, and annotations.
+
+        Note, formats' model_instances are assumed not to change.  If they are changed (e.g. split_rows in tests),
+        clearQueryPlanCache must be called.
+        """
+        key = self.getQueryPlanKey(fmt, qry, order_by)
+        with self.query_plan_lock:
+            plan = self.query_plans.get(key)
+            if plan is not None:
+                self.query_plans.move_to_end(key)
+                return plan
+
+        plan = self.compileQueryPlan(fmt, qry, order_by)
+
+        with self.query_plan_lock:
+            self.query_plans[key] = plan
+            self.query_plans.move_to_end(key)
+            while len(self.query_plans) > self.query_plan_cache_size:
+                self.query_plans.popitem(last=False)
+
+        return plan
+
+    def getQueryPlanKey(self, fmt, qry=None, order_by=None):
+        """
+        Returns a stable hash of the parts of a search that a QueryPlan depends on.
+        """
+        key_data = json.dumps(
+            {
+                "format": fmt,
+                "qry": None if qry is None else normalizeQry(qry),
+                "order_by": order_by,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(key_data.encode()).hexdigest()
+
+    def compileQueryPlan(self, fmt, qry=None, order_by=None):
+        """
+        Builds a QueryPlan (see getQueryPlan).
+        """
+        q_exp = None
+
         # If prefetches have been defined in the base advanced search view
         if qry is None:
             prefetches = self.getPrefetches(fmt)
         else:
+            q_exp = constructAdvancedQuery(
+                qry, self.getFieldUnitsLookup(fmt), self.getPathShortcuts(fmt)
+            )
+
             # Retrieve the prefetch data
             prefetch_qrys = self.getTrueJoinPrefetchPathsAndQrys(qry, fmt)
 
@@ -595,132 +787,281 @@ class FormatGroup:
                 else:
                     prefetches.append(pfq)
 
-        if prefetches is not None:
-            results = results.prefetch_related(*prefetches)
+        return QueryPlan(
+            q_exp,
+            prefetches,
+            # This ensures the number of records matches the number of rows desired in the html table based on the
+            # split_rows values configured in each format in SearchGroup
+            self.getDistinctFields(fmt, order_by),
+            self.getKeysetFields(fmt, order_by),
+            self.getFullJoinAnnotations(fmt),
+        )
 
-        split_row_annotations = self.getFullJoinAnnotations(fmt)
-        for annotation in split_row_annotations:
-            results = results.annotate(**annotation)
+    @classmethod
+    def clearQueryPlanCache(cls):
+        with cls.query_plan_lock:
+            cls.query_plans.clear()
 
-        return results, cnt, stats
+    def getQueryCount(self, results, fmt, qry=None, estimate=False):
+        """
+        Returns the number of rows of the (ordered and distinct, but not limited) results queryset of a search of the
+        supplied format using the supplied qry object (or of all the format's data when browsing, i.e. if qry is None).
+
+        Exact counts are cached, keyed on the format, the normalized qry, the distinct fields, and the data version, so
+        that repeated searches and page turns do not recount.  If estimate is True and no exact count is cached, the
+        query planner's row estimate is returned (as an EstimatedCount) if it exceeds settings.COUNT_ESTIMATE_THRESHOLD
+        (i.e. when an exact count would be slow).
+        """
+        cache_key = self.getQueryCountCacheKey(results, fmt, qry)
+        if cache_key is not None:
+            cnt = cache.get(cache_key)
+            if cnt is not None:
+                return cnt
+
+        if estimate:
+            est = self.getEstimatedQueryCount(results)
+            if est is not None and est > settings.COUNT_ESTIMATE_THRESHOLD:
+                return EstimatedCount(est)
+
+        cnt = results.count()
+        if cache_key is not None:
+            cache.set(cache_key, cnt, timeout=None)
+        return cnt
+
+    def getQueryCountCacheKey(self, results, fmt, qry=None):
+        """
+        Returns the cache key of the exact count of a search's results (see getQueryCount), or None if the data version
+        is unavailable (e.g. the cache is down).
+        """
+        data_version = get_data_version()
+        if data_version is None:
+            return None
+        key_data = json.dumps(
+            {
+                "format": fmt,
+                "qry": None if qry is None else normalizeQry(qry),
+                "distinct": list(results.query.distinct_fields),
+                "version": data_version,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha1(key_data.encode()).hexdigest()
+        return ".".join([self.__class__.__name__, "count", digest])
+
+    def getResultSnapshot(
+        self, results, fmt, qry=None, order_by=None, order_direction=None, plan=None
+    ):
+        """
+        Returns a snapshot of the rows of the (ordered and distinct, but not limited) results queryset of a search: a
+        numpy array containing the root record primary key and the split row annotation values (see
+        getSplitRowsAnnotations, with -1 in place of None) of each row, in order.  Pages of the search can then be
+        retrieved by primary key (see getResultSnapshotRows) instead of re-executing the search.
+
+        Snapshots are taken on the first request and cached, keyed on the format, the normalized qry, the ordering, and
+        the data version, so they expire when the data changes.  Returns None if the data version is unavailable or if
+        there are more than settings.RESULT_SNAPSHOT_MAX_ROWS rows.
+        """
+        cache_key = self.getResultSnapshotCacheKey(fmt, qry, order_by, order_direction)
+        if cache_key is None:
+            return None
+        snap = cache.get(cache_key)
+        if snap is not None:
+            # False records that the results are too large to snapshot
+            return None if snap is False else snap
+
+        if plan is None:
+            plan = self.getQueryPlan(fmt, qry, order_by)
+        split_annots = list(self.getSplitRowsAnnotations(fmt).values())
+        for annotation in plan.annotations:
+            if any(name in split_annots for name in annotation.keys()):
+                results = results.annotate(**annotation)
+
+        max_rows = settings.RESULT_SNAPSHOT_MAX_ROWS
+        rows = list(results.values_list("pk", *split_annots)[: max_rows + 1])
+        if len(rows) > max_rows:
+            cache.set(cache_key, False, timeout=None)
+            return None
+
+        snap = np.array(
+            [[-1 if val is None else val for val in row] for row in rows],
+            dtype=np.int64,
+        ).reshape(len(rows), len(split_annots) + 1)
+        cache.set(cache_key, snap, timeout=None)
+        return snap
+
+    def getResultSnapshotCacheKey(
+        self, fmt, qry=None, order_by=None, order_direction=None
+    ):
+        """
+        Returns the cache key of a search's result snapshot (see getResultSnapshot), or None if the data version is
+        unavailable (e.g. the cache is down).
+        """
+        data_version = get_data_version()
+        if data_version is None:
+            return None
+        key_data = json.dumps(
+            {
+                "format": fmt,
+                "qry": None if qry is None else normalizeQry(qry),
+                "order_by": order_by,
+                "order_direction": order_direction,
+                "version": data_version,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha1(key_data.encode()).hexdigest()
+        return ".".join([self.__class__.__name__, "snapshot", digest])
+
+    def getResultSnapshotRows(self, fmt, plan, page):
+        """
+        Returns the records of a page (a slice) of a result snapshot (see getResultSnapshot), retrieved by primary key,
+        with the plan's prefetches and annotations.  Root records that occur in multiple (split) rows are copied for
+        each row, with that row's split row annotation values.
+        """
+        split_annots = list(self.getSplitRowsAnnotations(fmt).values())
+        recs = self.getRootQuerySet(fmt).filter(pk__in=set(page[:, 0].tolist()))
+        prefetches = plan.getPrefetches()
+        if prefetches is not None:
+            recs = recs.prefetch_related(*prefetches)
+        for annotation in plan.annotations:
+            # The split row annotations (which would multiply the records) come from the snapshot
+            if not any(name in split_annots for name in annotation.keys()):
+                recs = recs.annotate(**annotation)
+        recs_by_pk = {rec.pk: rec for rec in recs}
+
+        rows = []
+        used = set()
+        for snap_row in page.tolist():
+            rec = recs_by_pk.get(snap_row[0])
+            if rec is None:
+                continue
+            if rec.pk in used:
+                rec = copy(rec)
+            used.add(rec.pk)
+            for name, val in zip(split_annots, snap_row[1:]):
+                setattr(rec, name, None if val == -1 else val)
+            rows.append(rec)
+        return rows
+
+    def getEstimatedQueryCount(self, results):
+        """
+        Returns the query planner's estimate of the number of rows in the results queryset (from EXPLAIN, which does
+        not execute the query), or None if the database does not provide one.
+        """
+        connection = connections[results.db]
+        if connection.vendor != "postgresql":
+            return None
+        sql, params = results.query.get_compiler(using=results.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        return int(plan[0]["Plan"]["Plan Rows"])
 
     def getQueryStats(self, res, fmt):
         """
         This method takes a queryset (produced by performQuery) and a format (e.g. "pgtemplate") and returns a stats
         dict keyed on the stat name and containing the counts of the number of unique values for the fields defined in
         the basic advanced search view object for the supplied template.  E.g. The results contain 5 distinct tissues.
+
+        The stats are aggregated in the database (grouped COUNT(DISTINCT ...) queries per stats category), so only the
+        counts and the top 10 values of each category are retrieved.
         """
         # Obtain the metadata about what stats we will display
         params_arrays = self.getStatsParams(fmt)
         if params_arrays is None:
             return None
 
-        # Since `results.values(*distinct_fields).annotate(cnt=Count("pk"))` throws an exception if duplicate records
-        # result from the possible use of distinct(fields) in the res sent in, we must mix in the distinct fields that
-        # uniquely identify records.
-        stats_fields = [fld for d in params_arrays for fld in d["distincts"]]
+        path_shortcuts = self.getPathShortcuts(fmt)
+        units_lookup = self.getFieldUnitsLookup(fmt)
 
         # These are the distinct fields that that dictate the number of rows in the view's output table
         fmt_distinct_fields = self.getDistinctFields(fmt, assume_distinct=False)
-        # These are the distinct fields necessary to get an accurate count of unique values
+        # These are the distinct fields necessary to get an accurate count of unique rows (including M:M related rows)
         all_distinct_fields = self.getDistinctFields(
             fmt, assume_distinct=False, split_all=True
         )
-        all_fields = all_distinct_fields + stats_fields
+        fmt_row_key = self.getRowKey(
+            [shortenFldPath(fld, path_shortcuts) for fld in fmt_distinct_fields]
+        )
+        all_row_key = self.getRowKey(
+            [shortenFldPath(fld, path_shortcuts) for fld in all_distinct_fields]
+        )
+
+        # Any ordering and distinct fields (e.g. if res was returned by performQuery) would interfere with the grouping
+        res = res.order_by().distinct()
+
         stats = {}
-        cnt_dict = {}
 
-        try:
-            # order_by(*all_distinct_fields) and distinct(*all_distinct_fields) are required to get accurate row counts,
-            # otherwise, some duplicates will get counted
-            for rec in (
-                res.order_by(*all_distinct_fields)
-                .distinct(*all_distinct_fields)
-                .values_list(*all_fields)
-            ):
-                # This is a combination of field values whose unique count corresponds to the number of output rows of
-                # this format
-                reccombo = ";".join(
-                    # values_list is fast, but can only be indexed by number...
-                    list(str(rec[all_fields.index(fld)]) for fld in fmt_distinct_fields)
+        # For each stats category defined for this format
+        for params in params_arrays:
+
+            if "delimiter" in params:
+                delim = params["delimiter"]
+            else:
+                delim = " "
+
+            distinct_fields = [
+                shortenFldPath(fld, path_shortcuts) for fld in params["distincts"]
+            ]
+
+            # The filter is applied in the aggregates (not to res), so that it applies to the same (M:M related) rows
+            # whose values are counted
+            if params["filter"] is None:
+                filter_q = None
+            else:
+                filter_q = constructAdvancedQueryHelper(
+                    params["filter"], units_lookup, path_shortcuts
                 )
 
-                # For each stats category defined for this format
-                for params in params_arrays:
-
-                    if "delimiter" in params:
-                        delim = params["delimiter"]
-                    else:
-                        delim = " "
-
-                    # Get distinct fields for the count by taking the union of the record-identifying distinct fields
-                    # and the distinct fields whose repeated values we want to count.
-                    distinct_fields = params["distincts"]
-
-                    statskey = params["displayname"]
-                    valcombo = delim.join(
-                        # values_list is fast, but can only be indexed by number...
-                        list(str(rec[all_fields.index(fld)]) for fld in distinct_fields)
-                    )
-
-                    if statskey not in stats:
-                        stats[statskey] = {
-                            "count": 0,
-                            "filter": params["filter"],
-                        }
-                        cnt_dict[statskey] = {}
-
-                    # Update the stats
-                    if params["filter"] is None:
-                        # Count unique and duplicate values
-                        if valcombo not in cnt_dict[statskey]:
-                            cnt_dict[statskey][valcombo] = {}
-                            cnt_dict[statskey][valcombo][reccombo] = 1
-                            stats[statskey]["count"] += 1
-                        else:
-                            cnt_dict[statskey][valcombo][reccombo] = 1
-                    else:
-                        # Count values meeting a criteria/filter
-                        if self.meetsAllConditionsByValList(
-                            fmt, rec, params["filter"], all_fields
-                        ):
-                            stats[statskey]["count"] += 1
-                            if valcombo not in cnt_dict[statskey]:
-                                cnt_dict[statskey][valcombo] = {}
-                                cnt_dict[statskey][valcombo][reccombo] = 1
-                            else:
-                                cnt_dict[statskey][valcombo][reccombo] = 1
-
-            # For each stats category defined for this format
-            for params in params_arrays:
-                statskey = params["displayname"]
-
-                # For the top 10 unique values (delimited-combos), in order of descending number of occurrences
-                top10 = []
-                for valcombo in sorted(
-                    cnt_dict[statskey].keys(),
-                    key=lambda vc: -len(cnt_dict[statskey][vc].keys()),
-                )[0:10]:
-                    top10.append(
-                        {
-                            "val": valcombo,
-                            "cnt": len(cnt_dict[statskey][valcombo].keys()),
-                        }
-                    )
-
-                stats[statskey]["sample"] = top10
-        except ProgrammingError as pe:
-            if len(
-                all_distinct_fields
-            ) > 1 and "SELECT DISTINCT ON expressions must match initial ORDER BY expressions" in str(
-                pe
-            ):
-                raise UnsupportedDistinctCombo(all_distinct_fields) from pe
+            # The number of output rows containing each unique value (combo)
+            val_cnts = (
+                res.values(*distinct_fields)
+                .annotate(stats_cnt=Count(fmt_row_key, distinct=True, filter=filter_q))
+                .order_by()
+            )
+
+            if filter_q is None:
+                # Count unique values
+                count = val_cnts.count()
             else:
-                raise pe
+                # Count the (split) rows meeting the criteria/filter
+                val_cnts = val_cnts.filter(stats_cnt__gt=0)
+                count = res.aggregate(
+                    stats_cnt=Count(all_row_key, distinct=True, filter=filter_q)
+                )["stats_cnt"]
+
+            # The top 10 unique values (delimited-combos), in order of descending number of occurrences (ties are
+            # ordered by value, so that the result does not depend on the order of the database rows)
+            top10 = []
+            for rec in val_cnts.order_by("-stats_cnt", *distinct_fields)[0:10]:
+                top10.append(
+                    {
+                        "val": delim.join(str(rec[fld]) for fld in distinct_fields),
+                        "cnt": rec["stats_cnt"],
+                    }
+                )
+
+            stats[params["displayname"]] = {
+                "count": count,
+                "filter": params["filter"],
+                "sample": top10,
+            }
 
         return stats
 
+    def getRowKey(self, fields):
+        """
+        Returns an expression whose distinct values correspond to the distinct combinations of the values of the
+        supplied fields (i.e. a row value, if there are multiple fields), e.g. for counting distinct rows.
+        """
+        if len(fields) == 1:
+            return F(fields[0])
+        return Func(
+            *[F(fld) for fld in fields], function="ROW", output_field=TextField()
+        )
+
     def getDownloadQryList(self):
         """
         Returns a list of dicts where the keys are name and json and the values are the format name and the json-
@@ -778,13 +1119,36 @@ class FormatGroup:
         return qry
 
 
-class UnsupportedDistinctCombo(Exception):
-    def __init__(self, fields):
-        message = (
-            f"Unsupported combination of distinct fields: [{', '.join(fields)}].  The problem likely stems from the "
-            "usage of field references that are not real database fields, used in both .distinct() and .order_by().  "
-            "Those methods resolve foreign keys (to database fields) in models differently.  Be sure to supply actual "
-            "database fields and not foreign key object references."
-        )
-        super().__init__(message)
-        self.fields = fields
+class QueryPlan:
+    """
+    The compiled, reusable parts of a search (see FormatGroup.getQueryPlan): the Q expression (None when browsing), the
+    prefetches, the distinct and keyset fields (which depend on the ordering field), and the split row annotations.
+    """
+
+    def __init__(self, q_exp, prefetches, distinct_fields, keyset_fields, annotations):
+        self.q_exp = q_exp
+        self.prefetches = prefetches
+        self.distinct_fields = distinct_fields
+        self.keyset_fields = keyset_fields
+        self.annotations = annotations
+
+    def getPrefetches(self):
+        """
+        Returns the prefetches to supply to prefetch_related.  Prefetch objects are copied with their own querysets,
+        because prefetching modifies them.
+        """
+        if self.prefetches is None:
+            return None
+        return [
+            Prefetch(pf.prefetch_through, queryset=pf.queryset.all())
+            if isinstance(pf, Prefetch) and pf.queryset is not None
+            else pf
+            for pf in self.prefetches
+        ]
+
+
+class EstimatedCount(int):
+    """
+    An approximate number of search results (the query planner's estimate), returned by performQuery in place of the
+    exact count when counting exactly would be slow (see FormatGroup.getQueryCount).
+    """
@@ -50,6 +50,19 @@ def splitPathName(fld):
     return fld_path, fld_name
 
 
+def shortenFldPath(fld, path_shortcuts=None):
+    """
+    Replaces the longest leading key path of fld that has a shortcut (a shorter, equivalent key path, e.g. through a
+    denormalized foreign key) with that shortcut.  Returns fld unchanged if no shortcut applies.
+    """
+    if not path_shortcuts:
+        return fld
+    for path in sorted(path_shortcuts.keys(), key=len, reverse=True):
+        if fld == path or fld.startswith(f"{path}__"):
+            return fld.replace(path, path_shortcuts[path], 1)
+    return fld
+
+
 def splitCommon(fld_path, reroot_path):
     """
     Returns 2 strings: the beginning portion of fld_path that it has in common with the reroot_path and the remainder
@@ -438,6 +451,38 @@ def getNumEmptyQueriesHelper(filter):
         )
 
 
+def normalizeQry(qry):
+    """
+    Returns the part of a qry object that determines the search results: the selected format and its search tree,
+    stripped of form state (e.g. the "pos" and "static" keys).  Equivalent qry objects have equal normalized qry
+    objects, e.g. for use in cache keys.
+    """
+    fmt = getSelectedFormat(qry)
+    return {
+        "selectedtemplate": fmt,
+        "tree": normalizeQryHelper(getSearchTree(qry, fmt)),
+    }
+
+
+def normalizeQryHelper(filter):
+    """
+    Recursive helper to normalizeQry
+    """
+    if isQueryGroup(filter):
+        return {
+            "type": "group",
+            "val": filter["val"],
+            "queryGroup": [normalizeQryHelper(child) for child in getChildren(filter)],
+        }
+    return {
+        "type": "query",
+        "fld": getField(filter),
+        "ncmp": getComparison(filter),
+        "val": getValue(filter),
+        "units": getUnits(filter),
+    }
+
+
 def getSelectedFormat(qry):
     return qry["selectedtemplate"]
 
@@ -496,17 +541,48 @@ def setField(filter, fld):
     return filter
 
 
-def constructAdvancedQuery(qryRoot, units_lookup=None):
+def constructKeysetQuery(fields, values, descending=False):
+    """
+    Builds a Q expression equivalent to the row comparison `(fields) > (values)` (or `<` if descending), i.e. it
+    matches the rows that come after the row with the supplied values when ordered by fields.  Null values are placed
+    the way PostgreSQL orders them: last when ascending and first when descending.
+    """
+
+    def after(fld, val):
+        if descending:
+            if val is None:
+                return Q(**{f"{fld}__isnull": False})
+            return Q(**{f"{fld}__lt": val})
+        if val is None:
+            # Nothing comes after null when ascending
+            return Q(pk__in=[])
+        return Q(**{f"{fld}__gt": val}) | Q(**{f"{fld}__isnull": True})
+
+    def equal(fld, val):
+        if val is None:
+            return Q(**{f"{fld}__isnull": True})
+        return Q(**{fld: val})
+
+    q = Q(pk__in=[])
+    prefix = Q()
+    for fld, val in zip(fields, values):
+        q |= prefix & after(fld, val)
+        prefix &= equal(fld, val)
+    return q
+
+
+def constructAdvancedQuery(qryRoot, units_lookup=None, path_shortcuts=None):
     """
     Turns a qry object into a complex Q object by calling its helper and supplying the selected format's tree.
     """
     return constructAdvancedQueryHelper(
         qryRoot["searches"][qryRoot["selectedtemplate"]]["tree"],
         units_lookup,
+        path_shortcuts,
     )
 
 
-def constructAdvancedQueryHelper(qry, units_lookup=None):
+def constructAdvancedQueryHelper(qry, units_lookup=None, path_shortcuts=None):
     """
     Recursively build a complex Q object based on a hierarchical tree defining the search terms.
     """
@@ -545,7 +621,7 @@ def constructAdvancedQueryHelper(qry, units_lookup=None):
                     )
                 val = units_lookup[fld][units]["convert"](val)
 
-        criteria = {"{0}__{1}".format(fld, cmp): val}
+        criteria = {"{0}__{1}".format(shortenFldPath(fld, path_shortcuts), cmp): val}
         if negate is False:
             return Q(**criteria)
         else:
@@ -557,13 +633,13 @@ def constructAdvancedQueryHelper(qry, units_lookup=None):
         for elem in qry["queryGroup"]:
             gotone = True
             if qry["val"] == "all":
-                nq = constructAdvancedQueryHelper(elem, units_lookup)
+                nq = constructAdvancedQueryHelper(elem, units_lookup, path_shortcuts)
                 if nq is None:
                     return None
                 else:
                     q &= nq
             elif qry["val"] == "any":
-                nq = constructAdvancedQueryHelper(elem, units_lookup)
+                nq = constructAdvancedQueryHelper(elem, units_lookup, path_shortcuts)
                 if nq is None:
                     return None
                 else:
@@ -13,6 +13,93 @@ class FluxCircFormat(Format):
     name = "Fcirc"
     rootmodel = FCirc
     stats = None
+    # See FormatExporter
+    download_columns = [
+        {"header": "Animal", "field": "serum_sample__animal__name"},
+        {
+            "header": "Studies",
+            "path": "serum_sample__animal__studies",
+            "field": "name",
+            "delimiter": ", ",
+        },
+        {"header": "Genotype", "field": "serum_sample__animal__genotype"},
+        {"header": "Body Weight (g)", "field": "serum_sample__animal__body_weight"},
+        {
+            "header": "Age (weeks)",
+            "field": "serum_sample__animal__age",
+            "convert": "weeks",
+        },
+        {"header": "Sex", "field": "serum_sample__animal__sex"},
+        {"header": "Diet", "field": "serum_sample__animal__diet"},
+        {"header": "Feeding Status", "field": "serum_sample__animal__feeding_status"},
+        {"header": "Treatment", "field": "serum_sample__animal__treatment__name"},
+        {"header": "Tracer Compound", "field": "tracer__compound__name"},
+        {"header": "Labeled Element", "field": "element"},
+        {
+            "header": "Infusion Rate (ul/min/g)",
+            "field": "serum_sample__animal__infusion_rate",
+        },
+        {
+            "header": "Tracer Concentration (mM)",
+            "path": "serum_sample__animal__infusate__tracer_links",
+            "field": "concentration",
+            "delimiter": ",",
+        },
+        {
+            "header": "Time Collected (m)",
+            "field": "serum_sample__time_collected",
+            "convert": "minutes",
+        },
+        {
+            "header": "Average Ra (nmol/min/g)",
+            "property": "rate_appearance_average_per_gram",
+            "type": "float",
+            "engine": "fcirc_rates",
+        },
+        {
+            "header": "Average Rd (nmol/min/g)",
+            "property": "rate_disappearance_average_per_gram",
+            "type": "float",
+            "engine": "fcirc_rates",
+        },
+        {
+            "header": "Average Ra (nmol/min)",
+            "property": "rate_appearance_average_per_animal",
+            "type": "float",
+            "engine": "fcirc_rates",
+        },
+        {
+            "header": "Average Rd (nmol/min)",
+            "property": "rate_disappearance_average_per_animal",
+            "type": "float",
+            "engine": "fcirc_rates",
+        },
+        {
+            "header": "Intact Ra (nmol/min/g)",
+            "property": "rate_appearance_intact_per_gram",
+            "type": "float",
+            "engine": "fcirc_rates",
+        },
+        {
+            "header": "Intact Rd (nmol/min/g)",
+            "property": "rate_disappearance_intact_per_gram",
+            "type": "float",
+            "engine": "fcirc_rates",
+        },
+        {
+            "header": "Intact Ra (nmol/min)",
+            "property": "rate_appearance_intact_per_animal",
+            "type": "float",
+            "engine": "fcirc_rates",
+        },
+        {
+            "header": "Intact Rd (nmol/min)",
+            "property": "rate_disappearance_intact_per_animal",
+            "type": "float",
+            "engine": "fcirc_rates",
+        },
+    ]
+
     model_instances = {
         "FCirc": {
             "model": "FCirc",
@@ -1,3 +1,15 @@
+from django.db.models import (
+    CharField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, Concat, NullIf
+
 from DataRepo.formats.dataformat import Format
 from DataRepo.formats.dataformat_group_query import (
     appendFilterToGroup,
@@ -15,6 +27,10 @@ class PeakDataFormat(Format):
     id = "pdtemplate"
     name = "PeakData"
     rootmodel = PeakData
+    path_shortcuts = {
+        "peak_group__msrun__sample__animal": "peak_group__animal",
+        "peak_group__msrun__sample": "peak_group__sample",
+    }
     stats = [
         {
             "displayname": "Animals",
@@ -66,6 +82,119 @@ class PeakDataFormat(Format):
             "filter": None,
         },
     ]
+    # See FormatExporter
+    download_columns = [
+        {"header": "Sample", "field": "peak_group__msrun__sample__name"},
+        {"header": "Tissue", "field": "peak_group__msrun__sample__tissue__name"},
+        {"header": "Peak Group", "field": "peak_group__name"},
+        {
+            "header": "Measured Compound(s)",
+            "path": "peak_group__compounds",
+            "field": "name",
+        },
+        {
+            "header": "Measured Compound Synonym(s)",
+            "path": "peak_group__compounds",
+            "field": "synonyms__name",
+            "nested_delimiter": "/",
+        },
+        {"header": "Formula", "field": "peak_group__formula"},
+        {
+            "header": "Labeled Element:Count",
+            "path": "labels",
+            "expression": Concat(
+                F("element"),
+                Value(":"),
+                Cast(F("count"), output_field=CharField()),
+                output_field=CharField(),
+            ),
+            "delimiter": "; ",
+        },
+        {"header": "Raw Abundance", "field": "raw_abundance"},
+        {"header": "Corrected Abundance", "field": "corrected_abundance"},
+        {
+            "header": "Fraction",
+            "expression": ExpressionWrapper(
+                F("corrected_abundance")
+                / NullIf(
+                    Subquery(
+                        PeakData.objects.filter(peak_group=OuterRef("peak_group"))
+                        .order_by()
+                        .values("peak_group")
+                        .annotate(total=Sum("corrected_abundance"))
+                        .values("total")
+                    ),
+                    Value(0.0),
+                ),
+                output_field=FloatField(),
+            ),
+        },
+        {"header": "Median M/Z", "field": "med_mz"},
+        {"header": "Median RT", "field": "med_rt"},
+        {
+            "header": "Peak Group Set Filename",
+            "field": "peak_group__peak_group_set__filename",
+        },
+        {"header": "Animal", "field": "peak_group__msrun__sample__animal__name"},
+        {"header": "Genotype", "field": "peak_group__msrun__sample__animal__genotype"},
+        {
+            "header": "Body Weight (g)",
+            "field": "peak_group__msrun__sample__animal__body_weight",
+        },
+        {
+            "header": "Age (weeks)",
+            "field": "peak_group__msrun__sample__animal__age",
+            "convert": "weeks",
+        },
+        {"header": "Sex", "field": "peak_group__msrun__sample__animal__sex"},
+        {"header": "Diet", "field": "peak_group__msrun__sample__animal__diet"},
+        {
+            "header": "Feeding Status",
+            "field": "peak_group__msrun__sample__animal__feeding_status",
+        },
+        {
+            "header": "Treatment",
+            "field": "peak_group__msrun__sample__animal__treatment__name",
+        },
+        {
+            "header": "Infusate",
+            "expression": Coalesce(
+                NullIf(
+                    F("peak_group__msrun__sample__animal__infusate__tracer_group_name"),
+                    Value(""),
+                ),
+                F("peak_group__msrun__sample__animal__infusate__name"),
+                output_field=CharField(),
+            ),
+        },
+        {
+            "header": "Tracer(s)",
+            "path": "peak_group__msrun__sample__animal__infusate__tracer_links",
+            "field": "tracer__name",
+        },
+        {
+            "header": "Tracer Compound(s)",
+            "path": "peak_group__msrun__sample__animal__infusate__tracer_links",
+            "field": "tracer__compound__name",
+        },
+        {
+            "header": "Tracer Concentration(s)",
+            "path": "peak_group__msrun__sample__animal__infusate__tracer_links",
+            "field": "concentration",
+            "delimiter": ",",
+        },
+        {
+            "header": "Infusion Rate (ul/min/g)",
+            "field": "peak_group__msrun__sample__animal__infusion_rate",
+        },
+        {
+            "header": "Studies",
+            "path": "peak_group__msrun__sample__animal__studies",
+            "field": "name",
+            "delimiter": ", ",
+        },
+    ]
+
     model_instances = {
         "PeakData": {
             "model": "PeakData",
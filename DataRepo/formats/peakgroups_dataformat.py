@@ -1,5 +1,16 @@
+from django.db.models import (
+    CharField,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, NullIf
+
 from DataRepo.formats.dataformat import Format
-from DataRepo.models import Animal, ElementLabel, PeakGroup
+from DataRepo.models import Animal, ElementLabel, PeakData, PeakGroup
 
 
 class PeakGroupsFormat(Format):
@@ -10,6 +21,10 @@ class PeakGroupsFormat(Format):
     id = "pgtemplate"
     name = "PeakGroups"
     rootmodel = PeakGroup
+    path_shortcuts = {
+        "msrun__sample__animal": "animal",
+        "msrun__sample": "sample",
+    }
     stats = [
         {
             "displayname": "Animals",
@@ -66,6 +81,114 @@ class PeakGroupsFormat(Format):
             "delimiter": ":",
         },
     ]
+    # See FormatExporter
+    download_columns = [
+        {"header": "Sample", "field": "msrun__sample__name"},
+        {"header": "Tissue", "field": "msrun__sample__tissue__name"},
+        {"header": "Peak Group", "field": "name"},
+        {"header": "Measured Compound(s)", "path": "compounds", "field": "name"},
+        {
+            "header": "Measured Compound Synonym(s)",
+            "path": "compounds",
+            "field": "synonyms__name",
+            "nested_delimiter": "/",
+        },
+        {"header": "Formula", "field": "formula"},
+        {
+            "header": "Labeled Element",
+            "path": "labels",
+            "field": "element",
+            "delimiter": ",",
+        },
+        {
+            "header": "Total Abundance",
+            "expression": Coalesce(
+                Subquery(
+                    PeakData.objects.filter(peak_group=OuterRef("pk"))
+                    .order_by()
+                    .values("peak_group")
+                    .annotate(total=Sum("corrected_abundance"))
+                    .values("total")
+                ),
+                Value(0.0),
+                output_field=FloatField(),
+            ),
+        },
+        {
+            "header": "Enrichment Fraction",
+            "path": "labels",
+            "property": "enrichment_fraction",
+            "type": "float",
+            "engine": "isotopologue_cube",
+            "delimiter": ",",
+        },
+        {
+            "header": "Enrichment Abundance",
+            "path": "labels",
+            "property": "enrichment_abundance",
+            "type": "float",
+            "engine": "isotopologue_cube",
+            "delimiter": ",",
+        },
+        {
+            "header": "Normalized Labeling",
+            "path": "labels",
+            "property": "normalized_labeling",
+            "type": "float",
+            "engine": "isotopologue_cube",
+            "delimiter": ",",
+        },
+        {"header": "Peak Group Set Filename", "field": "peak_group_set__filename"},
+        {"header": "Animal", "field": "msrun__sample__animal__name"},
+        {"header": "Genotype", "field": "msrun__sample__animal__genotype"},
+        {"header": "Body Weight (g)", "field": "msrun__sample__animal__body_weight"},
+        {
+            "header": "Age (weeks)",
+            "field": "msrun__sample__animal__age",
+            "convert": "weeks",
+        },
+        {"header": "Sex", "field": "msrun__sample__animal__sex"},
+        {"header": "Diet", "field": "msrun__sample__animal__diet"},
+        {"header": "Feeding Status", "field": "msrun__sample__animal__feeding_status"},
+        {"header": "Treatment", "field": "msrun__sample__animal__treatment__name"},
+        {
+            "header": "Infusate",
+            "expression": Coalesce(
+                NullIf(
+                    F("msrun__sample__animal__infusate__tracer_group_name"), Value("")
+                ),
+                F("msrun__sample__animal__infusate__name"),
+                output_field=CharField(),
+            ),
+        },
+        {
+            "header": "Tracer(s)",
+            "path": "msrun__sample__animal__infusate__tracer_links",
+            "field": "tracer__name",
+        },
+        {
+            "header": "Tracer Compound(s)",
+            "path": "msrun__sample__animal__infusate__tracer_links",
+            "field": "tracer__compound__name",
+        },
+        {
+            "header": "Tracer Concentration(s)",
+            "path": "msrun__sample__animal__infusate__tracer_links",
+            "field": "concentration",
+            "delimiter": ",",
+        },
+        {
+            "header": "Infusion Rate (ul/min/g)",
+            "field": "msrun__sample__animal__infusion_rate",
+        },
+        {
+            "header": "Studies",
+            "path": "msrun__sample__animal__studies",
+            "field": "name",
+            "delimiter": ", ",
+        },
+    ]
+
     model_instances = {
         "PeakGroupSet": {
             "model": "PeakGroupSet",
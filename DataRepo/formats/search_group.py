@@ -1,3 +1,5 @@
+from django.core import checks
+
 from DataRepo.formats.dataformat_group import FormatGroup
 from DataRepo.formats.fluxcirc_dataformat import FluxCircFormat
 from DataRepo.formats.peakdata_dataformat import PeakDataFormat
@@ -12,3 +14,26 @@ class SearchGroup(FormatGroup):
 
     def __init__(self):
         self.addFormats([PeakGroupsFormat(), PeakDataFormat(), FluxCircFormat()])
+
+
+def check_search_formats(app_configs, **kwargs):
+    """
+    System check (registered in DatarepoConfig.ready) that builds the metadata of every search output format at
+    startup, so that configuration errors (e.g. invalid units or static filters) are reported before any search is
+    performed.
+    """
+    errors = []
+    basv = SearchGroup()
+    for fmtid, fmt in basv.modeldata.items():
+        try:
+            fmt.getMetadata()
+            basv.staticFilterIsValid(fmt.static_filter)
+        except Exception as e:
+            errors.append(
+                checks.Error(
+                    f"Invalid search output format [{fmtid}]: {type(e).__name__}: {e}",
+                    obj=type(fmt),
+                    id="DataRepo.E001",
+                )
+            )
+    return errors
@@ -1,9 +1,11 @@
 from typing import Dict, Optional
 
 from django import forms
+from django.core.serializers.json import DjangoJSONEncoder
 from django.forms import formset_factory
 
 from DataRepo.formats.dataformat import Format
+from DataRepo.formats.dataformat_export import isArrowAvailable
 from DataRepo.formats.fluxcirc_dataformat import FluxCircFormat
 from DataRepo.formats.peakdata_dataformat import PeakDataFormat
 from DataRepo.formats.peakgroups_dataformat import PeakGroupsFormat
@@ -137,6 +139,14 @@ class AdvSearchDownloadForm(forms.Form):
     """
 
     qryjson = forms.JSONField(widget=forms.HiddenInput())
+    filetype = forms.ChoiceField(
+        choices=[("tsv", "TSV"), ("csv", "CSV")]
+        + ([("parquet", "Parquet"), ("arrow", "Arrow")] if isArrowAvailable() else []),
+        initial="tsv",
+        required=False,
+    )
+    # Gzip for text, zstd for Parquet and Arrow
+    compress = forms.BooleanField(initial=False, required=False, label="Compress")
 
     def clean(self):
         """This override of super.clean is so we can reconstruct the search inputs upon form_invalid in views.py"""
@@ -177,6 +187,8 @@ class AdvSearchPageForm(forms.Form):
     )  # This field's name ("paging") is used to distinguish pager form submissions from other form submissions
     show_stats = forms.BooleanField(widget=forms.HiddenInput())
     stats = forms.JSONField(widget=forms.HiddenInput())
+    # The sort key values of the current page's first and last rows, used to seek to adjacent pages
+    keyset = forms.JSONField(widget=forms.HiddenInput(), encoder=DjangoJSONEncoder)
 
     def clean(self):
         """
@@ -281,6 +293,7 @@ class AdvSearchPageForm(forms.Form):
             "order_direction",
             "show_stats",
             "stats",
+            "keyset",
         ]
         # Make sure all fields besides the order fields are present
         for field in fields:
@@ -289,6 +302,32 @@ class AdvSearchPageForm(forms.Form):
         return True
 
 
+class SummaryPageForm(AdvSearchPageForm):
+    """
+    Paging form for the server-side paged summary tables (e.g. the study and animal lists), submitted via GET.  Column
+    filters are inputs in the table headers that belong to this form (via their form attribute).
+    """
+
+    ROWS_PER_PAGE_CHOICES = (
+        ("10", "10"),
+        ("25", "25"),
+        ("50", "50"),
+        ("100", "100"),
+        ("200", "200"),
+        ("500", "500"),
+    )
+
+    rows = forms.ChoiceField(
+        choices=ROWS_PER_PAGE_CHOICES,
+        widget=RowsPerPageSelectWidget(),
+    )
+    # The summary tables are not the results of a query
+    qryjson = None
+    show_stats = None
+    stats = None
+    keyset = None
+
+
 class DataSubmissionValidationForm(forms.Form):
     """
     Form for users to validate their Animal and Sample Table with Accucor files
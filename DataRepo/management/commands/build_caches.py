@@ -8,11 +8,12 @@ from DataRepo.models.hier_cached_model import (
     enable_caching_updates,
     get_cached_method_names,
 )
+from DataRepo.utils import QuerysetToPandasDataFrame, get_repository_stats
 
 # ^^^ Must import every HierCachedModel (because it's eval'd below)
 
 
-def build_caches(clear):
+def build_caches(clear, summaries_only=False):
     enable_caching_errors()
     enable_caching_retrievals()
     enable_caching_updates()
@@ -21,6 +22,13 @@ def build_caches(clear):
     if clear:
         cache.clear()
 
+    # Summary DataFrames (of the study/animal/compound list pages) and the repository stats (of the home page) are keyed
+    # on the data version, so only the current version's are built
+    QuerysetToPandasDataFrame.build_summary_caches()
+    get_repository_stats()
+    if summaries_only:
+        return
+
     for class_name in func_name_lists.keys():
         cls = eval(class_name)
         for cfunc_name in func_name_lists[class_name]:
@@ -43,7 +51,7 @@ def cached_function_call(cls, cfunc_name):
 class Command(BaseCommand):
 
     # Show this when the user types help
-    help = "Builds cache values for all cached_functions"
+    help = "Builds cache values for all cached_functions and summary DataFrames"
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -53,6 +61,16 @@ class Command(BaseCommand):
             default=False,
             help="Clear existing caches.  Default behavior is to only fill in missing cache values.",
         )
+        parser.add_argument(
+            "--summaries-only",
+            required=False,
+            action="store_true",
+            default=False,
+            help=(
+                "Only build the summary DataFrame and repository stats caches (used by the study, animal, compound, "
+                "and home pages)."
+            ),
+        )
 
     def handle(self, *args, **options):
-        build_caches(options["clear"])
+        build_caches(options["clear"], options["summaries_only"])
@@ -0,0 +1,128 @@
+import timeit
+import warnings
+
+import pandas as pd
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
+
+
+def to_object_dtypes(df):
+    """
+    Returns a copy of a summary DataFrame with its categorical and string columns converted to python objects (the way
+    the summary DataFrames stored them before optimize_summary_dtypes)
+    """
+    df = df.copy()
+    for column in df.columns:
+        if isinstance(
+            df[column].dtype, pd.CategoricalDtype
+        ) or pd.api.types.is_string_dtype(df[column].dtype):
+            df[column] = df[column].astype(object)
+    return df
+
+
+def megabytes(df):
+    """
+    Returns the memory (in MB) used by a DataFrame, including the python objects it contains
+    """
+    return round(df.memory_usage(deep=True, index=False).sum() / 1024 / 1024, 2)
+
+
+def aggregate(df):
+    """
+    Groups the study/MSRun summary rows by study and animal and aggregates them the way the summary stats are
+    """
+    return (
+        df.groupby(["study", "animal"], observed=True)
+        .agg(
+            total_tissue=("tissue", "nunique"),
+            total_sample=("sample_id", "nunique"),
+            total_msrun=("msrun_id", "nunique"),
+            genotypes=("genotype", "unique"),
+        )
+        .reset_index()
+    )
+
+
+def profile(iterations, copies):
+    """
+    Compares the memory used by the study/MSRun summary DataFrame (get_study_msrun_all_df) with optimized
+    (categorical/string) dtypes and with python object dtypes, and the time taken to group and aggregate it
+    """
+    warnings.filterwarnings("ignore")
+    settings.DEBUG = False
+
+    optimized_df = qs2df.get_study_msrun_all_df()
+    if copies > 1:
+        # Simulate a larger repository by repeating the rows
+        optimized_df = pd.concat([optimized_df] * copies, ignore_index=True)
+    object_df = to_object_dtypes(optimized_df)
+
+    print(
+        f"get_study_msrun_all_df ({len(optimized_df.index)} rows x {len(optimized_df.columns)} columns, string "
+        f"storage: {qs2df.string_dtype.storage})"
+    )
+
+    # The memory of all columns and of the (optimized) string columns
+    string_columns = [
+        column
+        for column in optimized_df.columns
+        if optimized_df[column].dtype != object
+        and (
+            isinstance(optimized_df[column].dtype, pd.CategoricalDtype)
+            or pd.api.types.is_string_dtype(optimized_df[column].dtype)
+        )
+    ]
+    object_memory = megabytes(object_df)
+    optimized_memory = megabytes(optimized_df)
+    object_string_memory = megabytes(object_df[string_columns])
+    optimized_string_memory = megabytes(optimized_df[string_columns])
+    object_time = timeit.timeit(lambda: aggregate(object_df), number=iterations)
+    optimized_time = timeit.timeit(lambda: aggregate(optimized_df), number=iterations)
+
+    print("\tResults:")
+    print(
+        f"\t\tObject dtypes: {object_memory}MB ({object_string_memory}MB of strings), "
+        f"{round(object_time, 4)}s"
+    )
+    print(
+        f"\t\tOptimized dtypes: {optimized_memory}MB ({optimized_string_memory}MB of strings), "
+        f"{round(optimized_time, 4)}s"
+    )
+    if optimized_memory > 0:
+        print(f"\t\tMemory reduction: {round(object_memory / optimized_memory, 2)}x")
+    if optimized_string_memory > 0:
+        print(
+            f"\t\tString memory reduction: {round(object_string_memory / optimized_string_memory, 2)}x"
+        )
+    if optimized_time > 0:
+        print(f"\t\tGroupby speedup: {round(object_time / optimized_time, 2)}x")
+
+
+class Command(BaseCommand):
+
+    # Show this when the user types help
+    help = (
+        "Profiles the memory used by the study/MSRun summary DataFrame and the time taken to group and aggregate it, "
+        "with optimized (categorical/string) vs. python object dtypes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            required=False,
+            default=10,
+            help="The number of times to group and aggregate the DataFrame.",
+        )
+        parser.add_argument(
+            "--copies",
+            type=int,
+            required=False,
+            default=1,
+            help="The number of copies of the DataFrame's rows to profile (to simulate a larger repository).",
+        )
+
+    def handle(self, *args, **options):
+        profile(options["iterations"], options["copies"])
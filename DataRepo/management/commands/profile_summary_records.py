@@ -0,0 +1,73 @@
+import timeit
+import tracemalloc
+import warnings
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
+from DataRepo.utils.queryset_to_pandas_dataframe import summary_builder_names
+
+
+def peak_memory(func, df):
+    """
+    Returns the peak memory (in MB) allocated while converting a DataFrame using func
+    """
+    tracemalloc.start()
+    func(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def profile(iterations):
+    """
+    Compares the time and peak memory taken to convert each summary DataFrame to template records directly
+    (df_to_list_of_dict) and via JSON (df_to_list_of_dict_json)
+    """
+    warnings.filterwarnings("ignore")
+    settings.DEBUG = False
+
+    for builder_name in summary_builder_names:
+        df = getattr(qs2df, builder_name)()
+        print()
+        print(f"{builder_name} ({len(df.index)} rows x {len(df.columns)} columns)")
+
+        if qs2df.df_to_list_of_dict(df) != qs2df.df_to_list_of_dict_json(df):
+            print("\tWARNING: The direct and JSON records differ")
+
+        json_time = timeit.timeit(
+            lambda: qs2df.df_to_list_of_dict_json(df), number=iterations
+        )
+        direct_time = timeit.timeit(
+            lambda: qs2df.df_to_list_of_dict(df), number=iterations
+        )
+        json_memory = peak_memory(qs2df.df_to_list_of_dict_json, df)
+        direct_memory = peak_memory(qs2df.df_to_list_of_dict, df)
+
+        print("\tResults:")
+        print(f"\t\tVia JSON: {round(json_time, 4)}s, {round(json_memory, 2)}MB peak")
+        print(f"\t\tDirect: {round(direct_time, 4)}s, {round(direct_memory, 2)}MB peak")
+        if direct_time > 0:
+            print(f"\t\tSpeedup: {round(json_time / direct_time, 2)}x")
+
+
+class Command(BaseCommand):
+
+    # Show this when the user types help
+    help = (
+        "Profiles converting each summary DataFrame to template records directly vs. via JSON (to_json and "
+        "json.loads)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            required=False,
+            default=10,
+            help="The number of times to convert each DataFrame.",
+        )
+
+    def handle(self, *args, **options):
+        profile(options["iterations"])
@@ -0,0 +1,97 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from DataRepo.request_profile import (
+    LazyLoadDetector,
+    RequestProfile,
+    current_lazy_load_detector,
+    current_profile,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    Opt-in (see the SERVER_TIMING setting) per-request profiling middleware, which attributes the time spent handling
+    each request to SQL queries, HierCachedModel cache gets/sets, maintained field updates, summary DataFrame building,
+    and template rendering (see DataRepo.request_profile), and reports it in the response's Server-Timing header (which
+    browsers' developer tools display).  If SERVER_TIMING_SLOW_QUERIES is greater than 0, that many of each request's
+    slowest queries are logged.
+
+    The profile is only updated by timers around the instrumented calls, so it is cheap enough to leave enabled in
+    production.  Note that queries executed while streaming a response (e.g. a download) are not included.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = RequestProfile(slow_query_count=settings.SERVER_TIMING_SLOW_QUERIES)
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        profile.add("total", time.perf_counter() - start)
+
+        response["Server-Timing"] = profile.get_server_timing()
+        for seconds, sql in profile.get_slowest_queries():
+            logger.warning(
+                "Slow query (%.1f ms) in %s %s: %s",
+                seconds * 1000,
+                request.method,
+                request.path,
+                sql,
+            )
+        return response
+
+
+class LazyLoadDetectionMiddleware:
+    """
+    Development (see the LAZY_LOAD_DETECTION setting, which defaults to DEBUG) middleware that logs a warning for every
+    query that was executed repeatedly while rendering a request's templates (see
+    DataRepo.request_profile.LazyLoadDetector), which is typically a related record loaded once per row of a list
+    because the view's relation plan (see DataRepo.views.utils.RelationPlanMixin) does not fetch it.
+    """
+
+    def __init__(self, get_response):
+        if not settings.LAZY_LOAD_DETECTION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        detector = LazyLoadDetector()
+        token = current_lazy_load_detector.set(detector)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(detector.execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_lazy_load_detector.reset(token)
+
+        for count, sql in detector.get_lazy_loads():
+            logger.warning(
+                "Possible N+1 query (executed %d times while rendering) in %s %s: %s",
+                count,
+                request.method,
+                request.path,
+                sql,
+            )
+        return response
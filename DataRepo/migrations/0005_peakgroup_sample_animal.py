@@ -0,0 +1,37 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:22
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def set_peakgroup_sample_and_animal(apps, schema_editor):
+    MSRun = apps.get_model("DataRepo", "MSRun")
+    PeakGroup = apps.get_model("DataRepo", "PeakGroup")
+    db = schema_editor.connection.alias
+    msruns = MSRun.objects.using(db).filter(id=OuterRef("msrun_id"))
+    PeakGroup.objects.using(db).update(
+        sample_id=Subquery(msruns.values("sample_id")[:1]),
+        animal_id=Subquery(msruns.values("sample__animal_id")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataRepo', '0004_alter_animal_infusate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='peakgroup',
+            name='animal',
+            field=models.ForeignKey(blank=True, help_text="Automatically maintained field. Shortcut to the animal of this PeakGroup's MS Run's sample.", null=True, on_delete=django.db.models.deletion.CASCADE, related_name='peak_groups', to='DataRepo.animal'),
+        ),
+        migrations.AddField(
+            model_name='peakgroup',
+            name='sample',
+            field=models.ForeignKey(blank=True, help_text="Automatically maintained field. Shortcut to the sample of this PeakGroup's MS Run.", null=True, on_delete=django.db.models.deletion.CASCADE, related_name='peak_groups', to='DataRepo.sample'),
+        ),
+        migrations.RunPython(set_peakgroup_sample_and_animal, migrations.RunPython.noop),
+    ]
@@ -114,6 +114,96 @@ class Animal(MaintainedModel, HierCachedModel, ElementLabel):
             warnings.warn(f"Animal [{self.name}] has no tracers.")
         return self.infusate.tracers.all()
 
+    @property  # type: ignore
+    @cached_function
+    def tracer_info_by_compound(self):
+        """
+        This animal's infusate's tracer lookup (see Infusate.tracer_info_by_compound), shared by all of its
+        PeakGroupLabel records.
+        """
+        return self.infusate.tracer_info_by_compound()
+
+    @property  # type: ignore
+    @cached_function
+    def serum_sample_statuses(self):
+        """
+        A lookup of whether each of this animal's samples is a serum sample, keyed on sample ID, shared by all of its
+        PeakGroupLabel records (see PeakGroupLabel.from_serum_sample).  This is built from 1 query.
+        """
+        statuses = {}
+        for (
+            sample_id,
+            sample_name,
+            is_serum_sample,
+            tissue_name,
+        ) in self.samples.values_list("id", "name", "is_serum_sample", "tissue__name"):
+            if is_serum_sample is None:
+                warnings.warn(
+                    f"Sample {sample_name}'s is_serum_sample field hasn't been set."
+                )
+                # See Tissue.is_serum
+                is_serum_sample = tissue_name.startswith(Tissue.SERUM_TISSUE_PREFIX)
+            statuses[sample_id] = is_serum_sample
+        return statuses
+
+    @property  # type: ignore
+    @cached_function
+    def tracer_intact_fractions(self):
+        """
+        A lookup of the fraction of each of this animal's tracer peak groups' total abundance that is in its fully
+        labeled (i.e. intact) peak data, keyed on (peak group ID, element), for each element labeled in the peak
+        group's tracer (see tracer_info_by_compound).  Peak groups without intact peak data for an element are absent.
+        It is shared by all of the animal's PeakGroupLabel records (see PeakGroupLabel.intact_fraction), and is built
+        from 1 query (after the tracer lookup).
+        """
+        from DataRepo.models.peak_data import PeakData
+
+        tracer_info_by_compound = self.tracer_info_by_compound
+        if len(tracer_info_by_compound) == 0:
+            return {}
+
+        # The tracer compound of each tracer peak group, and the abundance and labels ({element: count}) of each of its
+        # peak data.  The rows are per peak data label, and unlabeled peak data have a row with a null element.
+        peak_groups = {}
+        for (
+            pg_id,
+            compound_id,
+            pd_id,
+            abundance,
+            element,
+            count,
+        ) in PeakData.objects.filter(
+            peak_group__msrun__sample__animal__id=self.id,
+            peak_group__compounds__id__in=tracer_info_by_compound.keys(),
+        ).values_list(
+            "peak_group_id",
+            "peak_group__compounds__id",
+            "id",
+            "corrected_abundance",
+            "labels__element",
+            "labels__count",
+        ):
+            peak_group = peak_groups.setdefault(
+                pg_id, {"compound_id": compound_id, "peak_data": {}}
+            )
+            if pd_id not in peak_group["peak_data"]:
+                peak_group["peak_data"][pd_id] = (abundance, {})
+            if element is not None:
+                peak_group["peak_data"][pd_id][1][element] = count
+
+        fractions = {}
+        for pg_id, peak_group in peak_groups.items():
+            label_counts = tracer_info_by_compound[peak_group["compound_id"]][
+                "label_counts"
+            ]
+            for element, tracer_count in label_counts.items():
+                fraction = PeakData.get_intact_fraction(
+                    list(peak_group["peak_data"].values()), element, tracer_count
+                )
+                if fraction is not None:
+                    fractions[(pg_id, element)] = fraction
+        return fractions
+
     @maintained_field_function(
         generation=0,
         child_field_names=["samples"],
@@ -191,6 +281,17 @@ class Animal(MaintainedModel, HierCachedModel, ElementLabel):
 
         return PeakGroup.objects.filter(id__in=last_serum_peakgroup_ids)
 
+    @property  # type: ignore
+    @cached_function
+    def fcirc_serum_validities(self):
+        """
+        Retrieves the serum_validity dicts of all of this animal's FCirc records (keyed on FCirc ID), computed together
+        so that the FCirc format doesn't re-walk the animal's samples for every row.
+        """
+        from DataRepo.models.fcirc import FCirc
+
+        return FCirc.get_serum_validities(self)
+
     class Meta:
         verbose_name = "animal"
         verbose_name_plural = "animals"
@@ -1,7 +1,10 @@
 import warnings
+from collections import defaultdict
+from datetime import date, timedelta
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count
 
 from DataRepo.models.element_label import ElementLabel
 from DataRepo.models.hier_cached_model import HierCachedModel, cached_function
@@ -168,6 +171,127 @@ class FCirc(MaintainedModel, HierCachedModel):
         Returns a dict containing information about the validity of this animal's serum samples, such as if all serum
         samples have a time_collected, if the last serum sample has all tracer peak groups, if the sample's msruns all
         have dates, etc.
+
+        The statuses of all of an animal's FCirc records are computed together (see get_serum_validities), so this is
+        a lookup into the animal's (cached) result.
+        """
+        validities = self.serum_sample.animal.fcirc_serum_validities
+        if self.id not in validities:
+            # The animal's cached result predates this record
+            validities = FCirc.get_serum_validities(self.serum_sample.animal)
+        return validities[self.id]
+
+    @classmethod
+    def get_serum_validities(cls, animal):
+        """
+        Computes the serum_validity dict of every FCirc record belonging to the supplied animal from a single snapshot
+        of the animal's samples, msrun counts, and tracer peak groups.  Returns a dict keyed on FCirc ID.
+        """
+        from DataRepo.models.peak_group import PeakGroup
+        from DataRepo.models.tissue import Tissue
+
+        samples = {
+            s.id: s
+            for s in animal.samples.select_related("tissue").annotate(
+                msrun_count=Count("msruns", distinct=True)
+            )
+        }
+        tracer_compound_ids = list(
+            animal.infusate.tracers.values_list("compound__id", flat=True)
+        )
+
+        # Every tracer peak group of the animal: (id, compound id, sample id, msrun date)
+        pg_rows = (
+            PeakGroup.objects.filter(msrun__sample__animal__id__exact=animal.id)
+            .filter(compounds__id__in=tracer_compound_ids)
+            .values_list("id", "compounds__id", "msrun__sample__id", "msrun__date")
+            .distinct()
+        )
+
+        # Sort keys mimic the null-first ordering (see create_is_null_field) used by Sample.last_tracer_peak_groups and
+        # Animal.last_serum_tracer_peak_groups, so the max is what their .last() calls retrieve
+        in_sample_key = cls.peak_group_in_sample_sort_key
+
+        def in_animal_key(row):
+            tc = samples[row[2]].time_collected
+            return (tc is not None, tc or timedelta.min) + in_sample_key(row)
+
+        # The last peak group per sample and tracer compound, and per tracer compound among the serum samples
+        sample_last_pgs = defaultdict(dict)
+        animal_last_pgs = {}
+        for row in pg_rows:
+            _, cmpd_id, smpl_id, _ = row
+            cur = sample_last_pgs[smpl_id].get(cmpd_id)
+            if cur is None or in_sample_key(row) > in_sample_key(cur):
+                sample_last_pgs[smpl_id][cmpd_id] = row
+            if (
+                samples[smpl_id]
+                .tissue.name.lower()
+                .startswith(Tissue.SERUM_TISSUE_PREFIX.lower())
+            ):
+                cur = animal_last_pgs.get(cmpd_id)
+                if cur is None or in_animal_key(row) > in_animal_key(cur):
+                    animal_last_pgs[cmpd_id] = row
+
+        serum_samples = [s for s in samples.values() if s.tissue.is_serum()]
+        last_serum_sample = samples.get(animal.last_serum_sample_id)
+
+        validities = {}
+        fcircs = (
+            cls.objects.filter(serum_sample__animal__id__exact=animal.id)
+            .select_related("tracer__compound")
+            .prefetch_related("tracer__labels")
+        )
+        for fcirc in fcircs:
+            # A sample's last tracer peak groups are only defined when it has a peak group for every tracer
+            smpl_pgs = sample_last_pgs.get(fcirc.serum_sample_id, {})
+            if all(cid in smpl_pgs for cid in tracer_compound_ids):
+                last_pg_in_sample = smpl_pgs.get(fcirc.tracer.compound_id)
+            else:
+                last_pg_in_sample = None
+
+            is_last = last_pg_in_sample is not None and (
+                last_pg_in_sample[0]
+                == animal_last_pgs.get(fcirc.tracer.compound_id, (None,))[0]
+            )
+
+            validities[fcirc.id] = fcirc._build_serum_validity(
+                serum_sample=samples[fcirc.serum_sample_id],
+                animal=animal,
+                last_serum_sample=last_serum_sample,
+                serum_samples=serum_samples,
+                has_last_peak_group=last_pg_in_sample is not None,
+                last_peak_group_msrun_date=(
+                    last_pg_in_sample[3] if last_pg_in_sample is not None else None
+                ),
+                is_last_serum_peak_group=is_last,
+            )
+
+        return validities
+
+    @staticmethod
+    def peak_group_in_sample_sort_key(row):
+        """
+        Sort key of a tracer peak group row (id, compound id, sample id, msrun date, ...) among a sample's peak groups
+        for the same tracer.  It mimics the null-first msrun date ordering (see create_is_null_field) used by
+        Sample.last_tracer_peak_groups, so the max is what its .last() call retrieves.
+        """
+        return (row[3] is not None, row[3] or date.min, row[0])
+
+    def _build_serum_validity(
+        self,
+        serum_sample,
+        animal,
+        last_serum_sample,
+        serum_samples,
+        has_last_peak_group,
+        last_peak_group_msrun_date,
+        is_last_serum_peak_group,
+    ):
+        """
+        Assembles the serum_validity dict for this record from data pre-fetched by get_serum_validities.
+        serum_sample is this record's sample (annotated with msrun_count) and serum_samples are all of the animal's
+        serum samples.
         """
         valid = True
         messages = []
@@ -183,102 +307,86 @@ class FCirc(MaintainedModel, HierCachedModel):
         msr_date_is_none_and_many_msrs_for_smpl = 0
         overall = 1
 
-        if self.last_peak_group_in_sample is None:
+        if not has_last_peak_group:
             valid = False
             level = "error"
             srmsmpl_has_no_trcr_pgs = 1
             messages.append(
-                f"No serum tracer peak group found for sample {self.serum_sample} and tracer {self.tracer}."
+                f"No serum tracer peak group found for sample {serum_sample} and tracer {self.tracer}."
             )
         else:
             # There do exist peak groups for this sample, so we can check more things...
 
             # If this record's peak group (the one associated with self.serum_sample and self.tracer) used in the
             # calculations is the animal's last such peak group
-            if self.is_last_serum_peak_group():
+            if is_last_serum_peak_group:
                 prev_or_last_str = "last"
 
                 # If self.serum_sample is not the animal's last serum sample
-                if (
-                    self.serum_sample.id
-                    != self.serum_sample.animal.last_serum_sample.id
-                ):
+                if last_serum_sample is None or serum_sample.id != last_serum_sample.id:
                     valid = False
                     level = "warn"
                     last_trcr_pg_but_prev_srmsmpl = 1
                     messages.append(
-                        f"Animal {self.serum_sample.animal}'s last serum sample "
-                        f"({self.serum_sample.animal.last_serum_sample}) is not being used for calculations for "
-                        f"tracer {self.tracer}.  Sample {self.serum_sample} is being used instead.  The last serum "
+                        f"Animal {animal}'s last serum sample "
+                        f"({last_serum_sample}) is not being used for calculations for "
+                        f"tracer {self.tracer}.  Sample {serum_sample} is being used instead.  The last serum "
                         "sample probably does not contain a peak group for this tracer compound."
                     )
 
                 # Check the sibling serum samples to see if there is adequate info to be confident that this sample is
-                # actually the last serum sample
-                tc_none_samples = []
-                for s in self.serum_sample.animal.samples.all():
-                    # If a serum sample other than self.serum_sample (containing the last peakgroup for self.tracer)
-                    # has a null time collected, we are not actually sure if this presumed "last serum serum tracer
-                    # peakgroup" is in fact last.  Note, we are assuming here though that the sibling serum sample we
-                    # identify actually has a peak group for self.tracer.
-                    if (
-                        # If this is a serum sample
-                        s._is_serum_sample()
-                        # and is not the serum sample in this fcirc record
-                        and s.id != self.serum_sample.id
-                        # and its time_collected is null
-                        and s.time_collected is None
-                    ):
-                        tc_none_samples.append(str(s))
+                # actually the last serum sample.  If a serum sample other than self.serum_sample (containing the last
+                # peakgroup for self.tracer) has a null time collected, we are not actually sure if this presumed
+                # "last serum serum tracer peakgroup" is in fact last.  Note, we are assuming here though that the
+                # sibling serum sample we identify actually has a peak group for self.tracer.
+                tc_none_samples = [
+                    str(s)
+                    for s in serum_samples
+                    if s.id != serum_sample.id and s.time_collected is None
+                ]
 
                 if len(tc_none_samples) > 0:
                     valid = False
                     level = "warn"
                     sib_of_last_smpl_tmclctd_is_none = 1
                     messages.append(
-                        f"This serum sample {self.serum_sample} is assumed to be last, but serum sample(s) "
-                        f"[{', '.join(tc_none_samples)}] from animal {self.serum_sample.animal} have no recorded time "
+                        f"This serum sample {serum_sample} is assumed to be last, but serum sample(s) "
+                        f"[{', '.join(tc_none_samples)}] from animal {animal} have no recorded time "
                         "collected, so it's possible these FCirc calculations could be based on a serum sample that "
                         "may not actually be the last one."
                     )
 
             if (
                 # If the date of the MSRun containing the "last" self.tracer peak group is none
-                self.last_peak_group_in_sample.msrun.date is None
+                last_peak_group_msrun_date is None
                 # and there exist other (potentially last) MSRuns that might contain a self.tracer peak group
-                and self.serum_sample.msruns.count() > 1
+                and serum_sample.msrun_count > 1
             ):
                 valid = False
                 level = "warn"
                 msr_date_is_none_and_many_msrs_for_smpl = 1
                 messages.append(
                     f"The MSRun date is not set for this {prev_or_last_str} serum tracer peak group for sample "
-                    f"{self.serum_sample} and tracer {self.tracer}, so it's possible these FCirc calculations should "
+                    f"{serum_sample} and tracer {self.tracer}, so it's possible these FCirc calculations should "
                     "or should not be for the 'last' peak group for this serum sample."
                 )
-            elif (
-                self.last_peak_group_in_sample.msrun.date is None
-                and self.serum_sample.msruns.count() == 1
-            ):
+            elif last_peak_group_msrun_date is None and serum_sample.msrun_count == 1:
                 # This doesn't trigger/override the valid or level settings, but it does append a message
                 msr_date_is_none_but_only1_msr_for_smpl = 1
                 messages.append(
                     f"The MSRun date is not set for this {prev_or_last_str} serum tracer peak group for sample "
-                    f"{self.serum_sample} and tracer {self.tracer}, but there's only 1 MSRun for this sample, so it's "
+                    f"{serum_sample} and tracer {self.tracer}, but there's only 1 MSRun for this sample, so it's "
                     "of no real concern (yet)."
                 )
 
-            # Determine the number of serum samples, but don't rely on maintained fields (for robustness)
-            num_serum_samples = 0
-            for ss in self.serum_sample.animal.samples.all():
-                if ss.tissue.is_serum():
-                    num_serum_samples += 1
+            # The number of serum samples doesn't rely on maintained fields (for robustness)
+            num_serum_samples = len(serum_samples)
 
             # If time collected is none and there exist other serum samples for this animal
             # Note: this level (error) is intentionally set last so that it can overwrite a warn level
-            if self.serum_sample.time_collected is None and num_serum_samples > 1:
+            if serum_sample.time_collected is None and num_serum_samples > 1:
                 valid = False
-                if self.is_last_serum_peak_group():
+                if is_last_serum_peak_group:
                     level = "error"
                     last_trcr_pg_but_smpl_tmclctd_is_none_amng_many = 1
                 else:
@@ -286,17 +394,17 @@ class FCirc(MaintainedModel, HierCachedModel):
                     prev_smpl_tmclctd_is_none_amng_many = 1
                 messages.append(
                     f"The sample time collected is not set for this {prev_or_last_str} serum tracer peak group for "
-                    f"tracer ({self.tracer}) and sample ({self.serum_sample}).  This animal "
-                    f"({self.serum_sample.animal}) has {num_serum_samples} serum samples, so it's possible the FCirc "
+                    f"tracer ({self.tracer}) and sample ({serum_sample}).  This animal "
+                    f"({animal}) has {num_serum_samples} serum samples, so it's possible the FCirc "
                     "calculations for this record should or should not be for the 'last' serum sample."
                 )
-            elif self.serum_sample.time_collected is None:
+            elif serum_sample.time_collected is None:
                 # This doesn't trigger/override the valid or level settings, but it does append a message
                 tmclctd_is_none_but_only1_smpl = 1
                 messages.append(
                     f"The sample time collected is not set for this {prev_or_last_str} serum tracer peak group for "
-                    f"tracer ({self.tracer}) and sample ({self.serum_sample}).  This animal "
-                    f"({self.serum_sample.animal}) only has 1 serum sample, so it's of no real concern (yet)."
+                    f"tracer ({self.tracer}) and sample ({serum_sample}).  This animal "
+                    f"({animal}) only has 1 serum sample, so it's of no real concern (yet)."
                 )
 
         if valid:
@@ -1,14 +1,20 @@
 from functools import wraps
 from typing import Dict, List, Optional
+from uuid import uuid4
 
 from django.conf import settings
 from django.core.cache import cache
 from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from DataRepo.request_profile import profiled
 
 caching_retrievals = True
 caching_updates = True
 throw_cache_errors = False
 func_name_lists: Dict[str, List] = {}
+# Cache key of the token identifying the current version of the data in the database (see get_data_version)
+data_version_key = "DataRepo.data_version"
 
 
 def cached_function(f):
@@ -39,6 +45,7 @@ def cached_function(f):
     return get_result
 
 
+@profiled("cache")
 def get_cache(rec, cache_func_name):
     """
     Returns a cached value and a boolean as to whether the cached value was good or not (e.g. not cached)
@@ -65,6 +72,7 @@ def get_cache(rec, cache_func_name):
     return result, good_cache
 
 
+@profiled("cache")
 def set_cache(rec, cache_func_name, value):
     """
     Caches a given value
@@ -108,6 +116,58 @@ def delete_all_caches():
     cache.clear()
 
 
+def get_data_version():
+    """
+    Returns a token that changes whenever the data in the database changes, for use in the keys of cached values that
+    are derived from many records (e.g. search result counts), which cannot be expired record by record.  Returns None
+    if the cache is unavailable.
+    """
+    try:
+        version = cache.get(data_version_key)
+        if version is None:
+            version = uuid4().hex
+            # Another process may have just set it
+            if not cache.add(data_version_key, version, timeout=None):
+                version = cache.get(data_version_key)
+    except Exception as e:
+        # Allow tracebase to still work, just without caching
+        print(e)
+        version = None
+        if throw_cache_errors:
+            raise Exception(f"get_data_version ERROR: {e}")
+    return version
+
+
+def bump_data_version():
+    """
+    Changes the data version token (see get_data_version), which expires every cached value keyed on the old version.
+    """
+    try:
+        cache.set(data_version_key, uuid4().hex, timeout=None)
+        if settings.DEBUG:
+            print("Bumped the data version")
+    except Exception as e:
+        # Allow tracebase to still work, just without caching
+        print(e)
+        if throw_cache_errors:
+            raise Exception(f"bump_data_version ERROR: {e}")
+
+
+def data_changed_handler(sender, **kwargs):
+    """
+    Bumps the data version whenever a DataRepo record is saved or deleted or a M:M relation changes.  While caching
+    updates are disabled (i.e. during loads, which save many records), the version is instead bumped once, when they
+    are reenabled.
+    """
+    action = kwargs.get("action")
+    if (
+        caching_updates
+        and sender._meta.app_label == "DataRepo"
+        and (action is None or action.startswith("post_"))
+    ):
+        bump_data_version()
+
+
 def get_cached_method_names():
     """
     Returns the structure storing the cached function names.  The structure is a dict keyed on class name whose values
@@ -130,6 +190,8 @@ def enable_caching_updates():
     """
     global caching_updates
     caching_updates = True
+    # The data may have changed while caching updates were disabled
+    bump_data_version()
 
 
 def disable_caching_retrievals():
@@ -177,6 +239,8 @@ class HierCachedModel(Model):
     # child_related_key_names to ['msruns']
     parent_related_key_name: Optional[str] = None
     child_related_key_names: Optional[List[str]] = []
+    # Optionally set this to a (denormalized) key to the root record, to skip climbing the parents in get_root_record
+    root_related_key_name: Optional[str] = None
 
     def save(self, *args, **kwargs):
         """
@@ -286,6 +350,11 @@ class HierCachedModel(Model):
         """
         From any record in the hierarchy, obtain the root record it is associated with.
         """
+        if self.root_related_key_name is not None:
+            root_instance = getattr(self, self.root_related_key_name)
+            # The shortcut key may not have been maintained yet (e.g. mid-load)
+            if root_instance is not None:
+                return root_instance.get_root_record()
         if self.parent_related_key_name is not None:
             parent_instance = getattr(self, self.parent_related_key_name)
             return parent_instance.get_root_record()
@@ -294,3 +363,8 @@ class HierCachedModel(Model):
 
     class Meta:
         abstract = True
+
+
+post_save.connect(data_changed_handler)
+post_delete.connect(data_changed_handler)
+m2m_changed.connect(data_changed_handler)
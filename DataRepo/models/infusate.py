@@ -310,3 +310,30 @@ class Infusate(MaintainedModel, MultiDBMixin):
             .distinct("element")
             .values_list("element", flat=True)
         )
+
+    def tracer_info_by_compound(self):
+        """
+        Returns a lookup of this infusate's tracers keyed on the tracer compound's ID.  Each value is a dict containing
+        the "tracer" record, its "label_counts" (a dict keyed on labeled element), and its "concentration".  This is
+        built from 2 queries, so that per-peak-group tracer lookups (see PeakGroupLabel) can be done in memory.
+        """
+        from DataRepo.models.infusate_tracer import InfusateTracer
+
+        # TODO: See issue #580.  "using" will be unnecessary.
+        db = self.get_using_db()
+
+        lookup = {}
+        for link in (
+            InfusateTracer.objects.using(db)
+            .filter(infusate__id=self.id)
+            .select_related("tracer__compound")
+            .prefetch_related("tracer__labels")
+        ):
+            lookup[link.tracer.compound_id] = {
+                "tracer": link.tracer,
+                "label_counts": {
+                    label.element: label.count for label in link.tracer.labels.all()
+                },
+                "concentration": link.concentration,
+            }
+        return lookup
@@ -9,6 +9,8 @@ from django.db.transaction import TransactionManagementError
 from django.db.utils import IntegrityError
 from psycopg2.errors import ForeignKeyViolation
 
+from DataRepo.request_profile import profiled
+
 auto_updates = True
 update_buffer = []
 performing_mass_autoupdates = False
@@ -496,6 +498,7 @@ class MaintainedModel(Model):
             # Percolate changes up to the parents (if any)
             self.call_dfs_related_updaters()
 
+    @profiled("maintained")
     def update_decorated_fields(self):
         """
         Updates every field identified in each maintained_field_function decorator using the decorated function that
@@ -66,6 +66,24 @@ class MSRun(HierCachedModel, MaintainedModel):
             f"MS run of sample {self.sample.name} with {self.protocol.name} by {self.researcher} on {self.date}"
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded sample, so that save() can tell whether it changed
+        instance._loaded_sample_id = instance.__dict__.get("sample_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Updates the (maintained) sample and animal keys of this MSRun's peak groups when its sample changes.  The keys
+        are updated with a single query instead of propagating auto-updates down to every peak group.
+        """
+        super().save(*args, **kwargs)
+        loaded_sample_id = getattr(self, "_loaded_sample_id", None)
+        if loaded_sample_id is not None and loaded_sample_id != self.sample_id:
+            self.peak_groups.using(self._state.db).update_sample_and_animal()
+        self._loaded_sample_id = self.sample_id
+
     def clean(self):
         super().clean()
 
@@ -57,6 +57,26 @@ class PeakData(models.Model):
             fraction = None
         return fraction
 
+    @staticmethod
+    def get_intact_fraction(peak_data, element, tracer_count):
+        """
+        Returns the fraction of a peak group's total abundance that is in its peak data fully labeled (i.e. intact)
+        with tracer_count atoms of element, given all of the peak group's peak data as (corrected abundance, labels)
+        pairs, where labels is a dict of each labeled element's count.  None if none of the peak data are intact.
+
+        Intact peak data are selected like peak_data.filter(labels__element=element).filter(labels__count=tracer_count),
+        whose separate filters can match different labels of a peak data with multiple labeled elements.
+        """
+        intact_abundances = [
+            abundance
+            for abundance, labels in peak_data
+            if element in labels and tracer_count in labels.values()
+        ]
+        if len(intact_abundances) == 0:
+            return None
+        total = sum(abundance for abundance, _ in peak_data)
+        return sum(intact_abundances) / total if total != 0 else 0.0
+
     class Meta:
         verbose_name = "peak data"
         verbose_name_plural = "peak data"
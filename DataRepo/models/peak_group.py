@@ -1,15 +1,32 @@
 from django.db import models
-from django.db.models import Sum
+from django.db.models import OuterRef, Subquery, Sum
 from django.utils.functional import cached_property
 
 from DataRepo.models.hier_cached_model import HierCachedModel, cached_function
 from DataRepo.models.maintained_model import (
     MaintainedModel,
+    maintained_field_function,
     maintained_model_relation,
 )
 from DataRepo.models.utilities import atom_count_in_formula
 
 
+class PeakGroupQuerySet(models.QuerySet):
+    def update_sample_and_animal(self):
+        """
+        Sets the (automatically maintained) sample and animal keys of every PeakGroup in the queryset from its MSRun,
+        using a single update query.  This is for loaders, which buffer maintained field updates, but need the keys
+        populated before the buffered updates of related records are performed.  Returns the number of updated rows.
+        """
+        from DataRepo.models.ms_run import MSRun
+
+        msruns = MSRun.objects.using(self.db).filter(id=OuterRef("msrun_id"))
+        return self.update(
+            sample_id=Subquery(msruns.values("sample_id")[:1]),
+            animal_id=Subquery(msruns.values("sample__animal_id")[:1]),
+        )
+
+
 @maintained_model_relation(
     generation=3,
     parent_field_name="msrun",
@@ -18,6 +35,7 @@ from DataRepo.models.utilities import atom_count_in_formula
 class PeakGroup(HierCachedModel, MaintainedModel):
 
     parent_related_key_name = "msrun"
+    root_related_key_name = "animal"
     child_related_key_names = ["labels"]
 
     id = models.AutoField(primary_key=True)
@@ -49,6 +67,46 @@ class PeakGroup(HierCachedModel, MaintainedModel):
         related_name="peak_groups",
         help_text="The source file this PeakGroup came from.",
     )
+    # Denormalized keys that allow queries to go from PeakGroup (or PeakData) to Sample and Animal without joining
+    # through msrun__sample__animal
+    sample = models.ForeignKey(
+        to="DataRepo.Sample",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="peak_groups",
+        help_text="Automatically maintained field. Shortcut to the sample of this PeakGroup's MS Run.",
+    )
+    animal = models.ForeignKey(
+        to="DataRepo.Animal",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="peak_groups",
+        help_text="Automatically maintained field. Shortcut to the animal of this PeakGroup's MS Run's sample.",
+    )
+
+    objects = PeakGroupQuerySet().as_manager()
+
+    @maintained_field_function(
+        generation=3,
+        parent_field_name="msrun",
+        update_field_name="sample",
+        update_label="peak_group_keys",
+    )
+    def _sample(self):
+        """Returns the sample of this PeakGroup's MSRun"""
+        return self.msrun.sample
+
+    @maintained_field_function(
+        generation=3,
+        parent_field_name="msrun",
+        update_field_name="animal",
+        update_label="peak_group_keys",
+    )
+    def _animal(self):
+        """Returns the animal of this PeakGroup's MSRun's sample"""
+        return self.msrun.sample.animal
 
     # @cached_function is *slower* than uncached
     @cached_property
@@ -80,12 +138,6 @@ class PeakGroup(HierCachedModel, MaintainedModel):
                 peak_labeled_elements.append(atom)
         return peak_labeled_elements
 
-    # @cached_function is *slower* than uncached
-    @cached_property
-    def animal(self):
-        """Convenient instance method to cache the animal this PeakGroup came from"""
-        return self.msrun.sample.animal
-
     class Meta:
         verbose_name = "peak group"
         verbose_name_plural = "peak groups"
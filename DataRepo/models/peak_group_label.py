@@ -1,7 +1,6 @@
 import warnings
 
 from django.db import models
-from django.forms.models import model_to_dict
 from django.utils.functional import cached_property
 from pyparsing import ParseException
 
@@ -204,8 +203,45 @@ class PeakGroupLabel(HierCachedModel):
     @cached_property
     def animal(self):
         """Convenient instance method to cache the animal this PeakGroup came from"""
+        if self.peak_group.animal_id is not None:
+            return self.peak_group.animal
+        # The peak group's maintained animal key may not have been set yet (e.g. mid-load)
         return self.peak_group.msrun.sample.animal
 
+    @cached_property
+    def intact_fraction(self):
+        """
+        The fraction of this peak group's total abundance that is in its peak data fully labeled (i.e. intact) with
+        this element's tracer label count, from the animal's lookup (see Animal.tracer_intact_fractions).  None if the
+        peak group has no intact peak data for this element (e.g. it is not a tracer peak group).
+        """
+        return self.animal.tracer_intact_fractions.get(
+            (self.peak_group_id, self.element)
+        )
+
+    @cached_property
+    def tracer_info(self):
+        """
+        The entry of the animal's tracer lookup (see Infusate.tracer_info_by_compound) for this peak group's compounds,
+        or None if none of them are tracer compounds.  The lookup is shared by every PeakGroupLabel of the animal, so
+        the tracer methods below do not need to query the database.
+        """
+        from DataRepo.models.tracer import Tracer
+
+        tracer_info_by_compound = self.animal.tracer_info_by_compound
+        # Iterating .all() (as opposed to values_list) makes use of prefetched compounds
+        matches = [
+            tracer_info_by_compound[compound.id]
+            for compound in self.peak_group.compounds.all()
+            if compound.id in tracer_info_by_compound
+        ]
+        if len(matches) > 1:
+            raise Tracer.MultipleObjectsReturned(
+                f"PeakGroup {self.peak_group} matches multiple tracers: "
+                f"[{', '.join(str(m['tracer']) for m in matches)}]."
+            )
+        return matches[0] if len(matches) == 1 else None
+
     @property  # type: ignore
     @cached_function
     def tracer(self):
@@ -213,43 +249,30 @@ class PeakGroupLabel(HierCachedModel):
         If this peakgroup's compounds contains a compound that is among the tracers for this animal, it returns the
         tracer record, otherwidse None
         """
-        from DataRepo.models.tracer import Tracer
-
-        try:
-            # This gets the tracer for this peakgroup (based on the compounds)
-            this_tracer = self.animal.infusate.tracers.get(
-                compound__id__in=list(
-                    self.peak_group.compounds.values_list("id", flat=True)
-                ),
-            )
-        except Tracer.DoesNotExist:
-            this_tracer = None
-
-        return this_tracer
+        if self.tracer_info is None:
+            return None
+        return self.tracer_info["tracer"]
 
     @property  # type: ignore
     @cached_function
     def tracer_label_count(self):
-        from DataRepo.models.tracer_label import TracerLabel
-
-        try:
-            # This gets the supplied tracer's tracer_label with this element, and returns its count
-            this_tracer_label_count = self.tracer.labels.get(
-                element__exact=self.element
-            ).count
-        except (AttributeError, TracerLabel.DoesNotExist):
-            # We will get an AttributeError if the tracer passed in is None
-            this_tracer_label_count = None
-
-        return this_tracer_label_count
+        """
+        The count of this element's label in this peak group's tracer, or None if it's not a tracer or the tracer has
+        no label of this element
+        """
+        if self.tracer_info is None:
+            return None
+        return self.tracer_info["label_counts"].get(self.element)
 
     @property  # type: ignore
     @cached_function
     def tracer_concentration(self):
-        # This gets the supplied tracer's tracer_label with this element, and returns its count
-        return self.animal.infusate.tracer_links.get(
-            tracer__exact=self.tracer
-        ).concentration
+        """
+        The concentration of this peak group's tracer in the animal's infusate, or None if it's not a tracer
+        """
+        if self.tracer_info is None:
+            return None
+        return self.tracer_info["concentration"]
 
     @property  # type: ignore
     @cached_function
@@ -284,17 +307,15 @@ class PeakGroupLabel(HierCachedModel):
     @cached_function
     def from_serum_sample(self):
         """
-        Instance method which returns True if a peakgroup was obtained from a serum sample.
+        Instance method which returns True if a peakgroup was obtained from a serum sample.  The sample's status is
+        retrieved from the animal's lookup (see Animal.serum_sample_statuses).
         """
-        if self.peak_group.msrun.sample.is_serum_sample is None:
-            warnings.warn(
-                f"Sample {self.peak_group.msrun.sample.name}'s is_serum_sample field hasn't been set."
-            )
-            fss = self.peak_group.msrun.sample._is_serum_sample()
-        else:
-            fss = self.peak_group.msrun.sample.is_serum_sample
+        sample_id = self.peak_group.sample_id
+        if sample_id is None:
+            # The peak group's maintained sample key may not have been set yet (e.g. mid-load)
+            sample_id = self.peak_group.msrun.sample_id
 
-        if fss:
+        if self.animal.serum_sample_statuses.get(sample_id):
             return True
 
         warnings.warn(f"{self.peak_group.name} is not from a serum sample.")
@@ -373,7 +394,8 @@ class PeakGroupLabel(HierCachedModel):
         Instance method which returns True if a peak_group rate metric can be
         calculated using fully-labeled/intact measurements of a tracer's
         peakdata.  Returns the peakdata.fraction, if it exists and is greater
-        than zero.
+        than zero.  The intact fraction is retrieved from the animal's lookup
+        (see intact_fraction).
         """
 
         if not self.can_compute_tracer_label_rates:
@@ -385,14 +407,9 @@ class PeakGroupLabel(HierCachedModel):
 
         tracer_info = self.get_peak_group_label_tracer_info
 
-        # This can return multiple records if there are multiple labeled elements.  An element with a specific count
-        # can exist along side other elements with different counts
-        intact_peakdata = self.peak_group.peak_data.filter(
-            labels__element__exact=self.element
-        ).filter(
-            labels__count__exact=tracer_info["count"],
-        )
-        if intact_peakdata.count() == 0:
+        # There can be multiple intact peakdata records if there are multiple labeled elements.  An element with a
+        # specific count can exist along side other elements with different counts
+        if self.intact_fraction is None:
             warnings.warn(
                 f"PeakGroup {self.peak_group.name} has no fully labeled/intact peakdata for element {self.element}."
             )
@@ -403,15 +420,10 @@ class PeakGroupLabel(HierCachedModel):
         # is 0 and C's 3-count peakdata record is: {'id': 20260, 'peak_group': 3176, 'raw_abundance': None,
         # 'corrected_abundance': 0.0, 'med_mz': None, 'med_rt': None} ... Can we still validly calculate C's rates?
 
-        fraction_total = 0.0
-        for pdrec in intact_peakdata.all():
-            if pdrec.fraction:
-                fraction_total += pdrec.fraction
-
-        if fraction_total == 0:
+        if self.intact_fraction == 0:
             warnings.warn(
                 f"PeakGroup {self.peak_group.name}'s peakdata records for element {self.element} at count "
-                f"{tracer_info['count']} are not all fully intact: {str(model_to_dict(pdrec))}."
+                f"{tracer_info['count']} are not all fully intact (their total abundance is 0)."
             )
             return False
 
@@ -453,16 +465,12 @@ class PeakGroupLabel(HierCachedModel):
 
         # There cam be multiple peak_data records if there are multiple labeled elements.  A specific element with a
         # the same count can exist along side other elements with different counts.  The fraction is therefore the sum
-        # of their corrected abundances divided by the total abundance for the group, or...
-        fraction = 0.0
-        for pdrec in self.peak_group.peak_data.filter(
-            labels__element__exact=self.element
-        ).filter(
-            labels__count=tracer_info["count"],
-        ):
-            fraction += pdrec.fraction
-
-        return self.animal.infusion_rate * tracer_info["concentration"] / fraction
+        # of their corrected abundances divided by the total abundance for the group (see intact_fraction).
+        return (
+            self.animal.infusion_rate
+            * tracer_info["concentration"]
+            / self.intact_fraction
+        )
 
     @property  # type: ignore
     @cached_function
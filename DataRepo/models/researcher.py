@@ -1,4 +1,3 @@
-import pandas as pd
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.functional import cached_property
@@ -11,34 +10,49 @@ from .utilities import get_all_fields_named
 
 def get_researchers(database=settings.TRACEBASE_DB):
     """
-    Get a list of distinct researcher names that is the union of values in researcher fields from any model
+    Get a list of distinct researcher names that is the union of values in researcher fields from any model (retrieved
+    in a single query)
     """
     target_field = "researcher"
-    researchers = []
     # Get researcher names from any model containing a "researcher" field
-    fields = get_all_fields_named(target_field)
-    for field_info in fields:
+    querysets = []
+    for field_info in get_all_fields_named(target_field):
         model = field_info[0]
-        researchers += list(
-            map(
-                lambda x: x[target_field],
-                model.objects.using(database).values(target_field).distinct(),
-            )
+        querysets.append(
+            model.objects.using(database)
+            .order_by()
+            .values_list(target_field, flat=True)
         )
-    unique_researchers = list(pd.unique(list(filter(None, researchers))))
+    if len(querysets) == 0:
+        return []
+    # A union (without all=True) is distinct
+    unique_researchers = list(filter(None, querysets[0].union(*querysets[1:])))
     return unique_researchers
 
 
+def researcher_exists(name, database=settings.TRACEBASE_DB):
+    """
+    Determine whether the name is a value in a researcher field of any model, without retrieving every researcher name
+    """
+    target_field = "researcher"
+    for field_info in get_all_fields_named(target_field):
+        model = field_info[0]
+        if model.objects.using(database).filter(**{target_field: name}).exists():
+            return True
+    return False
+
+
 class Researcher:
     """
     Non-model class that provides various researcher related methods
     """
 
-    def __init__(self, name):
+    def __init__(self, name, validate=True):
         """
-        Create a researcher object that will lookup items by name
+        Create a researcher object that will lookup items by name.  Set validate to False to skip checking that the
+        researcher exists when the name was just retrieved from the database (e.g. by get_researchers).
         """
-        if name not in get_researchers():
+        if validate and not researcher_exists(name):
             raise ObjectDoesNotExist(f'Researcher "{name}" not found')
         else:
             self.name = name
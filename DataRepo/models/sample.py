@@ -136,6 +136,26 @@ class Sample(MaintainedModel, HierCachedModel):
     def __str__(self):
         return str(self.name)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded animal, so that save() can tell whether it changed
+        instance._loaded_animal_id = instance.__dict__.get("animal_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Updates the (maintained) animal key of this sample's peak groups when its animal changes.  The keys are updated
+        with a single query instead of propagating auto-updates down to every peak group.
+        """
+        super().save(*args, **kwargs)
+        loaded_animal_id = getattr(self, "_loaded_animal_id", None)
+        if loaded_animal_id is not None and loaded_animal_id != self.animal_id:
+            PeakGroup.objects.using(self._state.db).filter(
+                msrun__sample__id=self.id
+            ).update_sample_and_animal()
+        self._loaded_animal_id = self.animal_id
+
 
 class InvalidArgument(ValueError):
     pass
@@ -12,6 +12,9 @@ class Pager:
         rows_per_page_field,
         order_by_field,
         order_dir_field,
+        keyset_field=None,  # Optional hidden field holding the current page's keyset (for seek pagination)
+        count_action=None,  # Optional URL that returns the exact total (as json) when tot is an estimate
+        method="POST",  # The paging form's submission method (e.g. "GET" for views that only handle GET requests)
         num_buttons=5,
         other_field_ids=None,  # {fld_name: id}
         # Default form values
@@ -21,6 +24,7 @@ class Pager:
         rows_input_id="pager-rows-elem",
         orderby_input_id="pager-orderby-elem",
         orderdir_input_id="pager-orderdir-elem",
+        tot_id="pager-tot-elem",
         form_id="custom-paging",
         rows_attrs={
             "class": "btn btn-primary dropdown-toggle",
@@ -36,6 +40,7 @@ class Pager:
         self.rows_input_id = rows_input_id
         self.orderby_input_id = orderby_input_id
         self.orderdir_input_id = orderdir_input_id
+        self.tot_id = tot_id
         self.rows_attrs = rows_attrs
         self.other_field_ids = other_field_ids
         self.page_form = self.page_form_class()
@@ -53,6 +58,9 @@ class Pager:
         self.default_rows = default_rows
         self.order_by_field = order_by_field
         self.order_dir_field = order_dir_field
+        self.keyset_field = keyset_field
+        self.count_action = count_action
+        self.method = method
         self.form_id = form_id
 
         self.min_rows_per_page = None
@@ -71,6 +79,8 @@ class Pager:
         order_by=None,
         order_dir=None,
         other_field_inits=None,  # {fld_name: init_val,...}
+        keyset=None,  # {"first": [...], "last": [...]} key values of the page's first and last rows
+        tot_estimated=False,  # Whether tot is an approximate count (e.g. a query planner estimate)
     ):
         """
         This method is used to update the pager object for each new current page being sent to the pagination template
@@ -94,6 +104,7 @@ class Pager:
         self.page = page
         self.rows = rows
         self.tot = tot
+        self.tot_estimated = tot_estimated
         self.order_by = order_by
         self.order_dir = order_dir
         self.pages = []
@@ -115,6 +126,16 @@ class Pager:
             self.order_by_field: order_by,
             self.order_dir_field: order_dir,
         }
+        # Record the page's keyset along with the paging settings it is only valid for
+        if self.keyset_field is not None and keyset is not None:
+            init_dict[self.keyset_field] = {
+                "page": page,
+                "rows": rows,
+                "order_by": order_by,
+                "order_dir": order_dir,
+                "first": keyset["first"],
+                "last": keyset["last"],
+            }
         # Set an arbitrary initial value - doesn't matter what
         init_dict.setdefault(self.form_id_field, 1)
         if other_field_inits is not None:
@@ -212,3 +233,28 @@ class Pager:
                 )
 
         return self
+
+    def get_seek(self, keyset, page, rows, order_by=None, order_dir=None):
+        """
+        Given the keyset submitted in the paging form (as recorded by update), this returns the seek argument for
+        performQuery if the requested page is adjacent to the keyset's page with the same rows per page and ordering,
+        i.e. the values of the previous page's last row (to seek after) or of the next page's first row (to seek
+        before, in reverse).  Returns None when offset paging must be used instead (e.g. a jump to a random page).
+        """
+        if not keyset:
+            return None
+
+        def normalize(val):
+            return None if val in ["", "None"] else val
+
+        if (
+            keyset.get("rows") != rows
+            or normalize(keyset.get("order_by")) != normalize(order_by)
+            or normalize(keyset.get("order_dir")) != normalize(order_dir)
+        ):
+            return None
+        if page == keyset.get("page", 0) + 1:
+            return {"values": keyset["last"], "reverse": False}
+        if page == keyset.get("page", 0) - 1:
+            return {"values": keyset["first"], "reverse": True}
+        return None
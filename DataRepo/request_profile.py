@@ -0,0 +1,178 @@
+import heapq
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from django.template.backends.django import DjangoTemplates, Template
+
+# The profile of the request being handled, if profiling is enabled (see DataRepo.middleware.ServerTimingMiddleware)
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "current_profile", default=None
+)
+
+# The lazy load detector of the request being handled, if detection is enabled (see
+# DataRepo.middleware.LazyLoadDetectionMiddleware)
+current_lazy_load_detector: ContextVar[Optional["LazyLoadDetector"]] = ContextVar(
+    "current_lazy_load_detector", default=None
+)
+
+# Descriptions of the Server-Timing metrics, in the order they are reported.  The metrics can overlap, e.g. the
+# database cache's queries are included in both sql and cache, and queries executed while rendering are included in
+# both sql and render.
+metric_descriptions = {
+    "sql": "SQL",
+    "cache": "HierCachedModel cache",
+    "maintained": "Maintained field updates",
+    "summary": "Summary DataFrames",
+    "render": "Template rendering",
+    "total": "Total",
+}
+
+
+class RequestProfile:
+    """
+    Accumulates the time spent (and the number of calls) per metric (see metric_descriptions) while handling a request,
+    and optionally the slowest SQL queries
+    """
+
+    def __init__(self, slow_query_count=0):
+        self.timings = {}  # metric -> [count, seconds]
+        self.active_metrics = set()
+        self.slow_query_count = slow_query_count
+        self.slow_queries = []  # min-heap of (seconds, sql)
+
+    def add(self, metric, seconds, count=1):
+        timing = self.timings.setdefault(metric, [0, 0.0])
+        timing[0] += count
+        timing[1] += seconds
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper (see connection.execute_wrapper) that times every query
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - start
+            self.add("sql", seconds)
+            if self.slow_query_count > 0:
+                if len(self.slow_queries) < self.slow_query_count:
+                    heapq.heappush(self.slow_queries, (seconds, sql))
+                elif seconds > self.slow_queries[0][0]:
+                    heapq.heapreplace(self.slow_queries, (seconds, sql))
+
+    def get_slowest_queries(self):
+        """
+        Returns a list of (seconds, sql) of the slowest queries, slowest first
+        """
+        return sorted(self.slow_queries, key=lambda q: q[0], reverse=True)
+
+    def get_server_timing(self):
+        """
+        Returns the value of a Server-Timing header containing the duration (in ms) of each metric and, in its
+        description, the number of calls (e.g. queries), e.g.:
+            sql;dur=12.3;desc="SQL (25)", render;dur=40.1;desc="Template rendering (1)", total;dur=60.7;desc="Total"
+        """
+        entries = []
+        for metric, desc in metric_descriptions.items():
+            if metric not in self.timings:
+                continue
+            count, seconds = self.timings[metric]
+            if metric != "total":
+                desc = f"{desc} ({count})"
+            entries.append(f'{metric};dur={round(seconds * 1000, 1)};desc="{desc}"')
+        return ", ".join(entries)
+
+
+def profiled(metric):
+    """
+    Decorator that adds the time spent in the decorated function to a metric of the current request's profile (if
+    profiling is enabled).  Nested calls (e.g. a cached summary DataFrame built from other cached summary DataFrames)
+    are only timed once.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            profile = current_profile.get()
+            if profile is None or metric in profile.active_metrics:
+                return f(*args, **kwargs)
+            profile.active_metrics.add(metric)
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                profile.active_metrics.discard(metric)
+                profile.add(metric, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class LazyLoadDetector:
+    """
+    Counts the DataRepo model queries executed while rendering templates, keyed on their SQL (which contains
+    placeholders instead of parameter values).  A related record that a view's relation plan (see
+    DataRepo.views.utils.RelationPlanMixin) does not fetch is lazily loaded by a query per row when a template accesses
+    it, so the same query executed repeatedly while rendering is a likely N+1 problem.
+    """
+
+    def __init__(self, threshold=2):
+        self.threshold = threshold
+        self.rendering_depth = 0
+        self.render_queries = Counter()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper (see connection.execute_wrapper) that counts the model queries executed while rendering
+        """
+        if self.rendering_depth > 0 and '"DataRepo_' in sql:
+            self.render_queries[sql] += 1
+        return execute(sql, params, many, context)
+
+    def get_lazy_loads(self):
+        """
+        Returns a list of (count, sql) of the queries executed at least threshold times while rendering, most frequent
+        first
+        """
+        return [
+            (count, sql)
+            for sql, count in self.render_queries.most_common()
+            if count >= self.threshold
+        ]
+
+
+class ProfiledTemplate(Template):
+    """
+    Django template whose rendering time is profiled, and whose queries are checked for lazy loads (see
+    ProfiledDjangoTemplates)
+    """
+
+    @profiled("render")
+    def render(self, context=None, request=None):
+        detector = current_lazy_load_detector.get()
+        if detector is None:
+            return super().render(context=context, request=request)
+        detector.rendering_depth += 1
+        try:
+            return super().render(context=context, request=request)
+        finally:
+            detector.rendering_depth -= 1
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """
+    Django template engine backend whose templates' rendering times are added to the "render" metric of the current
+    request's profile (see ServerTimingMiddleware), and whose queries are counted by the current request's lazy load
+    detector (see LazyLoadDetectionMiddleware)
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name).template, self)
@@ -1,5 +1,5 @@
 from django import template
-from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
+from django.core.exceptions import MultipleObjectsReturned
 from django.template.defaultfilters import floatformat
 from django.urls import reverse
 from django.utils import dateparse
@@ -282,23 +282,45 @@ def get_many_related_rec(qs, pk):
 
     It returns a list in each case so that full join can be turned off and on by simply toggling the `split_rows`
     boolean value in the Format class.
+
+    The record is looked up in the (prefetched) records of the queryset (see get_pk_index), so no query is performed
+    when the queryset's records were prefetched by performQuery.
     """
     if pk != "":
-        try:
-            recs = [qs.get(pk__exact=pk)]
-        except ObjectDoesNotExist:
+        recs_by_pk = get_pk_index(qs)
+        if pk not in recs_by_pk:
             recs = None
-        except MultipleObjectsReturned as mor:
+        elif len(recs_by_pk[pk]) > 1:
             raise MultipleObjectsReturned(
                 "Internal error: Primary key is not unique in M:M record list. Was "
-                f"`.distinct()` removed from the Prefetch queryset parameter? {mor}"
+                f"`.distinct()` removed from the Prefetch queryset parameter? [{len(recs_by_pk[pk])}] records with "
+                f"primary key [{pk}] were returned."
             )
+        else:
+            recs = list(recs_by_pk[pk])
     else:
         recs = qs.all()
 
     return recs
 
 
+def get_pk_index(qs):
+    """
+    Takes a queryset (or related manager) and returns a dict of its records keyed on primary key (with lists of records
+    as values).  A related manager returns the same queryset object each time its prefetched records are retrieved, so
+    the index is saved on that queryset, making it a map of each root record's prefetched related rows that is built
+    once and is looked up without any queries.  (Querysets whose records were not prefetched are queried each time.)
+    """
+    qs = qs.all()
+    recs_by_pk = getattr(qs, "pk_index", None)
+    if recs_by_pk is None:
+        recs_by_pk = {}
+        for rec in qs:
+            recs_by_pk.setdefault(rec.pk, []).append(rec)
+        qs.pk_index = recs_by_pk
+    return recs_by_pk
+
+
 @register.simple_tag
 def compile_stats(stats, num_chars=160):
     """
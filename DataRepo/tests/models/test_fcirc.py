@@ -130,11 +130,14 @@ class FCircTests(TracebaseTestCase):
         Issue #460, test 4.
         4. Ability to propagate changes without a function decorator if no maintained fields are present
 
-        We will do this by asserting that there's no function decorator for PeakGroup.  If there isn't, and
-        test_new_tracer_peak_group_updates_all_is_last passes, then requirement(/test) 4 works.
+        We will do this by asserting that there's no fcirc_calcs function decorator for PeakGroup.  If there isn't,
+        and test_new_tracer_peak_group_updates_all_is_last passes, then requirement(/test) 4 works.  (PeakGroup's
+        peak_group_keys decorators maintain its denormalized sample and animal keys.)
         """
         maint_fld_funcs = [
-            x for x in PeakGroup.get_my_updaters() if x["update_function"] is not None
+            x
+            for x in PeakGroup.get_my_updaters()
+            if x["update_function"] is not None and x["update_label"] == "fcirc_calcs"
         ]
         self.assertEqual(
             0,
@@ -176,6 +179,36 @@ class FCircTests(TracebaseTestCase):
             self.assertEqual("good", fcr.serum_validity["level"])
             self.assertEqual("000000000", fcr.serum_validity["bitcode"])
 
+    def test_get_serum_validities(self):
+        """
+        The per-animal snapshot computes every FCirc record's status in one pass, independent of the record count
+        """
+        self.create_newlss_fcirc_recs()
+        animal = Animal.objects.get(id=self.lss.animal.id)
+        num_fcircs = FCirc.objects.filter(serum_sample__animal=animal).count()
+        self.assertTrue(num_fcircs > self.lss.fcircs.count())
+
+        # Samples, infusate, tracer compounds, peak groups, fcircs, and tracer labels
+        with self.assertNumQueries(6):
+            validities = FCirc.get_serum_validities(animal)
+
+        self.assertEqual(num_fcircs, len(validities))
+        for fcr in self.lss.fcircs.all():
+            # The last serum sample (newlss) has no peak groups, so lss is used instead
+            self.assertEqual("001000100", validities[fcr.id]["bitcode"])
+            self.assertEqual(validities[fcr.id], fcr.serum_validity)
+        for fcr in self.newlss.fcircs.all():
+            self.assertEqual("100000100", validities[fcr.id]["bitcode"])
+
+    def test_get_serum_validities_does_not_depend_on_maintained_peak_group_keys(self):
+        """
+        Peak groups whose (maintained) sample and animal keys have not been set yet (e.g. mid-load) are still included
+        """
+        animal = self.lss.animal
+        validities = FCirc.get_serum_validities(animal)
+        PeakGroup.objects.update(sample=None, animal=None)
+        self.assertEqual(validities, FCirc.get_serum_validities(animal))
+
     def test_serum_validity_no_peakgroup(self):
         self.create_newlss_fcirc_recs()
 
@@ -11,6 +11,7 @@ from DataRepo.models.hier_cached_model import (
     get_cache,
     get_cache_key,
     get_cached_method_names,
+    get_data_version,
     set_cache,
 )
 from DataRepo.tests.tracebase_test_case import TracebaseTestCase
@@ -238,7 +239,11 @@ class GlobalCacheTests(TracebaseTestCase):
         expected_structure = {
             "Animal": [
                 "tracers",
+                "tracer_info_by_compound",
+                "serum_sample_statuses",
+                "tracer_intact_fractions",
                 "last_serum_tracer_peak_groups",
+                "fcirc_serum_validities",
             ],
             "AnimalLabel": [
                 "tracers",
@@ -577,6 +582,26 @@ class HierCachedModelTests(TracebaseTestCase):
             msg="The root model record returned by get_root_record is directly related",
         )
 
+    def test_get_root_record_uses_root_related_key(self):
+        pg = PeakGroup.objects.first()
+        with self.assertNumQueries(1):
+            rep_rec = pg.get_root_record()
+        self.assertEqual(pg.msrun.sample.animal, rep_rec)
+
+    def test_data_version_changes_with_the_data(self):
+        version = get_data_version()
+        self.assertEqual(version, get_data_version())
+        a = Animal.objects.first()
+        a.save()
+        saved_version = get_data_version()
+        self.assertNotEqual(version, saved_version)
+        # Loads disable caching updates and the version is bumped once they are reenabled
+        disable_caching_updates()
+        a.save()
+        self.assertEqual(saved_version, get_data_version())
+        enable_caching_updates()
+        self.assertNotEqual(saved_version, get_data_version())
+
 
 class BuildCachesTests(TracebaseTestCase):
     @classmethod
@@ -87,6 +87,19 @@ class InfusateTests(TracebaseTestCase):
             self.INFUSATE2._name(),
         )
 
+    def test_tracer_info_by_compound(self):
+        infusate = Infusate.objects.get(id=self.INFUSATE2.id)
+        with self.assertNumQueries(2):
+            lookup = infusate.tracer_info_by_compound()
+        glu = Compound.objects.get(name="glucose")
+        c16 = Compound.objects.get(name="C16:0")
+        self.assertEqual({glu.id, c16.id}, set(lookup.keys()))
+        self.assertEqual(glu, lookup[glu.id]["tracer"].compound)
+        self.assertEqual({"C": 2, "O": 1}, lookup[glu.id]["label_counts"])
+        self.assertEqual(3.0, lookup[glu.id]["concentration"])
+        self.assertEqual({"C": 2, "O": 2}, lookup[c16.id]["label_counts"])
+        self.assertEqual(4.0, lookup[c16.id]["concentration"])
+
     def test_name_not_settable(self):
         with self.assertRaises(MaintainedFieldNotSettable):
             Infusate.objects.create(
@@ -1,11 +1,20 @@
+import csv
+import gzip
+import tempfile
 from copy import deepcopy
 from typing import Dict
+from unittest import skipUnless
 
+from django.conf import settings
 from django.core.management import call_command
+from django.db import connection
 from django.db.models import F, Q, Value
-from django.test import tag
+from django.test import override_settings, tag
+from django.test.utils import CaptureQueriesContext
 
 from DataRepo.formats.dataformat import Format, splitCommon, splitPathName
+from DataRepo.formats.dataformat_export import isArrowAvailable, iterGzipped
+from DataRepo.formats.dataformat_group import EstimatedCount
 from DataRepo.formats.dataformat_group_query import (
     appendFilterToGroup,
     constructAdvancedQuery,
@@ -19,8 +28,8 @@ from DataRepo.formats.dataformat_group_query import (
 )
 from DataRepo.formats.peakdata_dataformat import PeakDataFormat
 from DataRepo.formats.peakgroups_dataformat import PeakGroupsFormat
-from DataRepo.formats.search_group import SearchGroup
-from DataRepo.models import CompoundSynonym, FCirc, PeakGroup
+from DataRepo.formats.search_group import SearchGroup, check_search_formats
+from DataRepo.models import Animal, CompoundSynonym, FCirc, PeakGroup
 from DataRepo.models.utilities import get_model_by_name
 from DataRepo.templatetags.customtags import get_many_related_rec
 from DataRepo.tests.tracebase_test_case import TracebaseTestCase
@@ -88,6 +97,7 @@ class FormatsTests(TracebaseTestCase):
                 basv.modeldata[fmt].model_instances[inst]["manyrelated"][
                     "split_rows"
                 ] = self.orig_split_rows[fmt][inst]
+        basv.clearQueryPlanCache()
 
     def getQueryObject(self):
         return {
@@ -1036,6 +1046,217 @@ class FormatsTests(TracebaseTestCase):
         self.assertTrue(cnt < qs.count())
         self.assertEqual(cnt, 1)
 
+    def test_performQuery_count_cached(self):
+        """
+        Test that performQuery caches its counts until the data changes
+        """
+        basv = SearchGroup()
+        qry = self.get_advanced_qry()
+        res, cnt, stats = basv.performQuery(qry, "pgtemplate")
+        with CaptureQueriesContext(connection) as queries:
+            res, cached_cnt, stats = basv.performQuery(qry, "pgtemplate")
+        self.assertEqual(cnt, cached_cnt)
+        self.assertFalse(
+            any('"DataRepo_peakgroup"' in q["sql"] for q in queries.captured_queries)
+        )
+        # Changing the data expires the cached count
+        PeakGroup.objects.filter(
+            msrun__sample__tissue__name__iexact="Brain"
+        ).first().delete()
+        res, new_cnt, stats = basv.performQuery(qry, "pgtemplate")
+        self.assertEqual(cnt - 1, new_cnt)
+
+    def test_performQuery_snapshot(self):
+        """
+        Test that pages served from a result snapshot match the pages of the search, and that the snapshot is reused
+        until the data changes
+        """
+        basv = SearchGroup()
+        qry = self.get_advanced_qry()
+        _, cnt, _ = basv.performQuery(qry, "pgtemplate")
+        self.assertTrue(cnt > 1)
+        for offset in range(cnt):
+            res, _, _ = basv.performQuery(
+                qry, "pgtemplate", limit=1, offset=offset, order_direction="desc"
+            )
+            snap_res, snap_cnt, _ = basv.performQuery(
+                qry,
+                "pgtemplate",
+                limit=1,
+                offset=offset,
+                order_direction="desc",
+                snapshot=True,
+            )
+            self.assertEqual(cnt, snap_cnt)
+            self.assertEqual(
+                [(rec.pk, rec.peak_group_label) for rec in res],
+                [(rec.pk, rec.peak_group_label) for rec in snap_res],
+            )
+            # The row's labels are prefetched
+            self.assertEqual(
+                [rec.peak_group_label for rec in snap_res],
+                [
+                    lbl.pk
+                    for rec in snap_res
+                    for lbl in get_many_related_rec(rec.labels, rec.peak_group_label)
+                ],
+            )
+            # Snapshot pages are paged by offset
+            self.assertIsNone(basv.getPageKeyset(snap_res))
+
+        # The search is not re-executed
+        with CaptureQueriesContext(connection) as queries:
+            basv.performQuery(
+                qry, "pgtemplate", limit=1, order_direction="desc", snapshot=True
+            )
+        self.assertFalse(
+            any("DISTINCT ON" in q["sql"] for q in queries.captured_queries)
+        )
+
+        # Changing the data expires the snapshot
+        PeakGroup.objects.filter(
+            msrun__sample__tissue__name__iexact="Brain"
+        ).first().delete()
+        _, new_cnt, _ = basv.performQuery(
+            qry, "pgtemplate", limit=1, order_direction="desc", snapshot=True
+        )
+        self.assertTrue(new_cnt < cnt)
+
+    @override_settings(RESULT_SNAPSHOT_MAX_ROWS=1)
+    def test_performQuery_snapshot_too_large(self):
+        basv = SearchGroup()
+        res, cnt, _ = basv.getAllBrowseData("pgtemplate", limit=1, snapshot=True)
+        self.assertTrue(cnt > 1)
+        # Not served from a snapshot
+        self.assertIsNotNone(basv.getPageKeyset(res))
+
+    def test_performQuery_snapshot_ignores_keyset(self):
+        """
+        Test that a page served from a result snapshot is taken by offset, i.e. the snapshot takes precedence over a
+        supplied keyset
+        """
+        basv = SearchGroup()
+        qry = self.get_advanced_qry()
+        first_page, cnt, _ = basv.performQuery(qry, "pgtemplate", limit=1)
+        self.assertTrue(cnt > 1)
+        seek = {"values": basv.getPageKeyset(first_page)["last"], "reverse": False}
+        second_page, _, _ = basv.performQuery(qry, "pgtemplate", limit=1, keyset=seek)
+
+        # The keyset is ignored, so the page at the offset is returned
+        snap_res, _, _ = basv.performQuery(
+            qry, "pgtemplate", limit=1, offset=0, keyset=seek, snapshot=True
+        )
+        self.assertIsNone(basv.getPageKeyset(snap_res))
+        self.assertEqual(
+            [(rec.pk, rec.peak_group_label) for rec in first_page],
+            [(rec.pk, rec.peak_group_label) for rec in snap_res],
+        )
+
+        # With the offset of the sought page, the snapshot page is the sought page
+        snap_res, _, _ = basv.performQuery(
+            qry, "pgtemplate", limit=1, offset=1, keyset=seek, snapshot=True
+        )
+        self.assertEqual(
+            [(rec.pk, rec.peak_group_label) for rec in second_page],
+            [(rec.pk, rec.peak_group_label) for rec in snap_res],
+        )
+
+    def test_getQueryPlan_cached(self):
+        """
+        Test that query plans are reused for equivalent qry objects and evicted when least recently used
+        """
+        basv = SearchGroup()
+        basv.clearQueryPlanCache()
+        qry = self.get_advanced_qry()
+        plan = basv.getQueryPlan("pgtemplate", qry)
+        # The position of the query in the form does not matter
+        qry["searches"]["pgtemplate"]["tree"]["queryGroup"][0]["pos"] = "moved"
+        self.assertIs(plan, basv.getQueryPlan("pgtemplate", qry))
+        self.assertIsNot(plan, basv.getQueryPlan("pgtemplate", qry, "name"))
+        basv.query_plan_cache_size = 1
+        basv.getQueryPlan("pgtemplate")
+        self.assertEqual(1, len(basv.query_plans))
+        self.assertIsNot(plan, basv.getQueryPlan("pgtemplate", qry))
+        # A plan produces the same results each time it is used
+        res1, cnt1, _ = basv.performQuery(qry, "pgtemplate")
+        res2, cnt2, _ = basv.performQuery(qry, "pgtemplate")
+        self.assertEqual(cnt1, cnt2)
+        self.assertEqual(list(res1), list(res2))
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=0)
+    def test_performQuery_estimate_count(self):
+        """
+        Test that performQuery estimates the count (unless an exact count is cached) if the estimate is large
+        """
+        basv = SearchGroup()
+        res, cnt, stats = basv.getAllBrowseData("pdtemplate", estimate_count=True)
+        self.assertIsInstance(cnt, EstimatedCount)
+        res, cnt, stats = basv.getAllBrowseData("pdtemplate")
+        self.assertNotIsInstance(cnt, EstimatedCount)
+        self.assertEqual(len(res), cnt)
+        res, cached_cnt, stats = basv.getAllBrowseData(
+            "pdtemplate", estimate_count=True
+        )
+        self.assertNotIsInstance(cached_cnt, EstimatedCount)
+        self.assertEqual(cnt, cached_cnt)
+
+    def test_performQuery_keyset(self):
+        """
+        Test that seeking to the next/previous page using a page's keyset retrieves the same rows as offset paging.
+        """
+        basv = SearchGroup()
+        order_bys = {
+            "pgtemplate": "msrun__sample__animal__name",
+            "pdtemplate": "peak_group__msrun__sample__name",
+            "fctemplate": "serum_sample__animal__name",
+        }
+        rows = 4
+        for fmt, order_by in order_bys.items():
+            for ob in [None, order_by]:
+                for order_dir in ["asc", "desc"]:
+                    res, cnt, stats = basv.getAllBrowseData(
+                        fmt, order_by=ob, order_direction=order_dir
+                    )
+                    all_keys = [basv.getPageKeyset([rec])["first"] for rec in res]
+                    self.assertEqual(cnt, len(all_keys))
+                    num_pages = (cnt + rows - 1) // rows
+
+                    # Page forward from the first page
+                    res, cnt, stats = basv.getAllBrowseData(
+                        fmt, limit=rows, order_by=ob, order_direction=order_dir
+                    )
+                    keyset = basv.getPageKeyset(res)
+                    for page in range(2, num_pages + 1):
+                        res, cnt, stats = basv.getAllBrowseData(
+                            fmt,
+                            limit=rows,
+                            order_by=ob,
+                            order_direction=order_dir,
+                            keyset={"values": keyset["last"], "reverse": False},
+                        )
+                        keyset = basv.getPageKeyset(res)
+                        start = (page - 1) * rows
+                        self.assertEqual(
+                            all_keys[start:][:rows],
+                            [basv.getPageKeyset([rec])["first"] for rec in res],
+                        )
+
+                    # Page backward from the last page
+                    for page in range(num_pages - 1, 0, -1):
+                        res, cnt, stats = basv.getAllBrowseData(
+                            fmt,
+                            limit=rows,
+                            order_by=ob,
+                            order_direction=order_dir,
+                            keyset={"values": keyset["first"], "reverse": True},
+                        )
+                        keyset = basv.getPageKeyset(res)
+                        start = (page - 1) * rows
+                        self.assertEqual(
+                            all_keys[start:][:rows],
+                            [basv.getPageKeyset([rec])["first"] for rec in res],
+                        )
+
     def test_isQryObjValid(self):
         """
         Test that isQryObjValid correctly validates a qry object.
@@ -1267,6 +1488,29 @@ class FormatsTests(TracebaseTestCase):
         self.assertEqual(name, "PeakData")
         self.assertEqual(sel, False)
 
+    def test_get_many_related_rec_prefetched(self):
+        """
+        Test that get_many_related_rec looks up the M:M related records prefetched by performQuery without querying
+        """
+        sg = SearchGroup()
+        # Split the rows on measured compounds, so that each row has 1 compound
+        sg.modeldata["pgtemplate"].model_instances["MeasuredCompound"]["manyrelated"][
+            "split_rows"
+        ] = True
+        sg.clearQueryPlanCache()
+        (qs, junk1, junk2) = sg.performQuery(fmt="pgtemplate")
+        recs = [(pg, pg.msrun.sample.animal) for pg in qs]
+        self.assertTrue(len(recs) > 0)
+        with self.assertNumQueries(0):
+            for pg, animal in recs:
+                compounds = get_many_related_rec(pg.compounds, pg.compound)
+                self.assertEqual(1, len(compounds))
+                self.assertEqual(pg.compound, compounds[0].pk)
+                studies = get_many_related_rec(animal.studies, pg.study)
+                self.assertTrue(len(studies) > 0)
+                labels = get_many_related_rec(pg.labels, pg.peak_group_label)
+                self.assertTrue(len(labels) > 0)
+
     def test_fcirc_performQuery_tracer_links_1to1(self):
         """
         This test ensures that when we perform any query on the fcirc format, the means of limiting each row to a
@@ -1434,6 +1678,379 @@ class FormatsTests(TracebaseTestCase):
         fld_units_lookup = sg.getFieldUnitsLookup(format)
         self.assertIsAFcUnitsLookupDict(fld_units_lookup)
 
+    def test_getMetadata(self):
+        """
+        Test that a format's metadata is built once and that its accessors return the precomputed values
+        """
+        metadata = PeakGroupsFormat.getMetadata()
+        self.assertIs(metadata, PeakGroupsFormat().getMetadata())
+        self.assertIsNot(metadata, PeakDataFormat.getMetadata())
+        pgsv = PeakGroupsFormat()
+        self.assertIs(metadata.field_types, pgsv.getFieldTypes())
+        self.assertEqual(
+            pgsv.buildOrderByFields(model_name="Compound"),
+            pgsv.getOrderByFields(model_name="Compound"),
+        )
+        self.assertEqual(pgsv.buildPrefetches(), pgsv.getPrefetches())
+        self.assertEqual("MeasuredCompound", pgsv.pathToModelInstanceName("compounds"))
+
+    def test_check_search_formats(self):
+        self.assertEqual([], check_search_formats(None))
+
+    def export_rows(self, fmt, chunk_size=5):
+        """Returns the rows of an export of all of a format's data, exported in chunks of chunk_size rows"""
+        sg = SearchGroup()
+        res, cnt, _ = sg.getAllBrowseData(fmt)
+        exporter = sg.getExporter(fmt, res)
+        exporter.chunk_size = chunk_size
+        chunks = list(exporter.iterChunks())
+        self.assertTrue(all(len(chunk) <= chunk_size for chunk in chunks))
+        rows = [row for chunk in chunks for row in chunk]
+        self.assertEqual(cnt, len(rows))
+        self.assertTrue(len(rows) > 0)
+        return exporter, res, rows
+
+    def test_export_peakgroups(self):
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ):
+            exporter, res, rows = self.export_rows("pgtemplate")
+        hdrs = exporter.getHeaders()
+        self.assertEqual(26, len(hdrs))
+        for pg, row in zip(res, rows):
+            rec = dict(zip(hdrs, row))
+            self.assertEqual(pg.name, rec["Peak Group"])
+            self.assertEqual(
+                [cpd.name for cpd in pg.compounds.all()], rec["Measured Compound(s)"]
+            )
+            self.assertAlmostEqual(pg.total_abundance, rec["Total Abundance"])
+            # Rows are split on labels
+            label = pg.labels.get(pk=pg.peak_group_label)
+            self.assertEqual([label.element], rec["Labeled Element"])
+            if label.enrichment_fraction is None:
+                self.assertEqual([None], rec["Enrichment Fraction"])
+            else:
+                self.assertAlmostEqual(
+                    label.enrichment_fraction, rec["Enrichment Fraction"][0]
+                )
+            self.assertAlmostEqualOrNone(
+                label.normalized_labeling, rec["Normalized Labeling"][0]
+            )
+            self.assertEqual(
+                [st.name for st in pg.msrun.sample.animal.studies.all()],
+                rec["Studies"],
+            )
+
+    def test_export_peakdata(self):
+        exporter, res, rows = self.export_rows("pdtemplate", chunk_size=50)
+        hdrs = exporter.getHeaders()
+        for pd, row in zip(res, rows):
+            rec = dict(zip(hdrs, row))
+            self.assertEqual(pd.corrected_abundance, rec["Corrected Abundance"])
+            if pd.fraction is None:
+                self.assertIsNone(rec["Fraction"])
+            else:
+                self.assertAlmostEqual(pd.fraction, rec["Fraction"])
+            self.assertEqual(
+                [f"{lbl.element}:{lbl.count}" for lbl in pd.labels.all()],
+                rec["Labeled Element:Count"],
+            )
+            self.assertEqual(
+                [
+                    sorted(syn.name for syn in cpd.synonyms.all())
+                    for cpd in pd.peak_group.compounds.all()
+                ],
+                rec["Measured Compound Synonym(s)"],
+            )
+
+    def assertAlmostEqualOrNone(self, expected, got):
+        if expected is None:
+            self.assertIsNone(got)
+        else:
+            self.assertAlmostEqual(expected, got)
+
+    def test_export_fcirc(self):
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ):
+            exporter, res, rows = self.export_rows("fctemplate")
+        hdrs = exporter.getHeaders()
+        rate_columns = {
+            col["header"]: col["property"]
+            for col in exporter.columns
+            if col.get("engine") == "fcirc_rates"
+        }
+        self.assertEqual(8, len(rate_columns))
+        computed = 0
+        for fc, row in zip(res, rows):
+            rec = dict(zip(hdrs, row))
+            # Rows are split on the tracer links
+            tracer_links = get_many_related_rec(
+                fc.serum_sample.animal.infusate.tracer_links, fc.tracer_link
+            )
+            self.assertEqual(
+                [tracer_links[0].concentration], rec["Tracer Concentration (mM)"]
+            )
+            for header, prop in rate_columns.items():
+                with self.subTest(fcirc=fc.id, rate=prop):
+                    self.assertAlmostEqualOrNone(getattr(fc, prop), rec[header])
+                    if rec[header] is not None:
+                        computed += 1
+        self.assertTrue(computed > 0)
+
+    def test_export_cube_scope(self):
+        """
+        Test that an export's isotopologue cube is scoped to the animal or a study of the exported rows
+        """
+        sg = SearchGroup()
+        res, _, _ = sg.getAllBrowseData("pgtemplate")
+        animal = res.first().animal
+        self.assertEqual(
+            {"animal_id": animal.id},
+            sg.getExporter("pgtemplate", res.filter(animal=animal)).getCubeScope(),
+        )
+
+    def test_export_queries_independent_of_row_count(self):
+        """
+        Test that the number of queries of an export, including the queries of its isotopologue cube columns, does not
+        depend on the number of rows
+        """
+        sg = SearchGroup()
+        res, _, _ = sg.getAllBrowseData("pgtemplate")
+        all_rows = res.filter(animal=res.first().animal)
+        one_root_rec = all_rows.filter(pk=all_rows.first().pk)
+        self.assertTrue(all_rows.count() > one_root_rec.count())
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ):
+            # The first export of the animal's data builds its cube
+            list(sg.getExporter("pgtemplate", all_rows).iterChunks())
+            num_queries = []
+            for results in [all_rows, one_root_rec]:
+                exporter = sg.getExporter("pgtemplate", results)
+                with CaptureQueriesContext(connection) as queries:
+                    list(exporter.iterChunks())
+                num_queries.append(len(queries.captured_queries))
+        self.assertEqual(num_queries[0], num_queries[1])
+
+    def test_export_queries_per_chunk(self):
+        """
+        Test that the number of queries of an export depends on the number of chunks, not the number of rows
+        """
+        sg = SearchGroup()
+        res, cnt, _ = sg.getAllBrowseData("pdtemplate")
+        self.assertTrue(cnt > 10)
+        exporter = sg.getExporter("pdtemplate", res)
+        with CaptureQueriesContext(connection) as one_chunk:
+            list(exporter.iterChunks())
+        exporter.chunk_size = cnt // 2 + 1
+        with CaptureQueriesContext(connection) as two_chunks:
+            list(exporter.iterChunks())
+        # The row query is only executed once.  Every other query is executed once per chunk.
+        self.assertEqual(
+            2 * len(one_chunk.captured_queries) - 1, len(two_chunks.captured_queries)
+        )
+
+    def test_export_delimited_gzipped(self):
+        sg = SearchGroup()
+        res, cnt, _ = sg.getAllBrowseData("pdtemplate")
+        exporter = sg.getExporter("pdtemplate", res)
+        content = b"".join(
+            iterGzipped(exporter.iterDelimited(delimiter=",", preamble="# test\n"))
+        )
+        lines = gzip.decompress(content).decode().splitlines()
+        self.assertEqual("# test", lines[0])
+        self.assertEqual(exporter.getHeaders(), next(csv.reader([lines[1]])))
+        self.assertEqual(cnt, len(lines) - 2)
+
+    @skipUnless(isArrowAvailable(), "pyarrow is not installed")
+    def test_export_parquet(self):
+        import pyarrow
+        import pyarrow.parquet
+
+        exporter, res, rows = self.export_rows("pdtemplate")
+        content = b"".join(
+            exporter.iterArrow(filetype="parquet", metadata={"query": "test"})
+        )
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(content))
+        self.assertEqual(exporter.getHeaders(), table.column_names)
+        self.assertEqual(b"test", table.schema.metadata[b"query"])
+        self.assertEqual(pyarrow.duration("us"), table.schema.field("Age (weeks)").type)
+        self.assertEqual(
+            pyarrow.list_(pyarrow.string()),
+            table.schema.field("Labeled Element:Count").type,
+        )
+        self.assertEqual(
+            pyarrow.list_(pyarrow.list_(pyarrow.string())),
+            table.schema.field("Measured Compound Synonym(s)").type,
+        )
+        self.assertEqual(rows, [list(rec.values()) for rec in table.to_pylist()])
+
+    @skipUnless(isArrowAvailable(), "pyarrow is not installed")
+    def test_export_arrow(self):
+        import pyarrow
+
+        exporter, res, rows = self.export_rows("fctemplate")
+        content = b"".join(exporter.iterArrow(filetype="arrow", compression="zstd"))
+        table = pyarrow.ipc.open_stream(content).read_all()
+        self.assertEqual(
+            pyarrow.float64(), table.schema.field("Average Ra (nmol/min/g)").type
+        )
+        self.assertEqual(rows, [list(rec.values()) for rec in table.to_pylist()])
+
+
+class FCircExportTestCase(TracebaseTestCase):
+    def assertExportedFCircRatesMatch(self):
+        """
+        Asserts that the exported FCirc rates (computed by the fcirc_rates batch engine) equal the rates computed
+        through the ORM.  Returns the number of records for which each rate was computed, keyed on property name.
+        """
+        sg = SearchGroup()
+        res, cnt, _ = sg.getAllBrowseData("fctemplate")
+        exporter = sg.getExporter("fctemplate", res)
+        exporter.chunk_size = 2
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ):
+            rows = [row for chunk in exporter.iterChunks() for row in chunk]
+        self.assertEqual(cnt, len(rows))
+        hdrs = exporter.getHeaders()
+        rate_columns = {
+            col["header"]: col["property"]
+            for col in exporter.columns
+            if col.get("engine") == "fcirc_rates"
+        }
+        self.assertEqual(8, len(rate_columns))
+        computed = {prop: 0 for prop in rate_columns.values()}
+        for fc, row in zip(res, rows):
+            rec = dict(zip(hdrs, row))
+            for header, prop in rate_columns.items():
+                expected = getattr(fc, prop)
+                with self.subTest(fcirc=fc.id, rate=prop):
+                    if expected is None:
+                        self.assertIsNone(rec[header])
+                    else:
+                        self.assertAlmostEqual(expected, rec[header])
+                        computed[prop] += 1
+        return computed
+
+
+@override_settings(CACHES=settings.TEST_CACHES)
+class FCircExportTests(FCircExportTestCase):
+    """
+    Exports of FCirc rates computed by the fcirc_rates batch engine, using data with multiple animals and serum samples
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("load_study", "DataRepo/example_data/tissues/loading.yaml")
+        call_command(
+            "load_compounds",
+            compounds="DataRepo/example_data/consolidated_tracebase_compound_list.tsv",
+        )
+        call_command(
+            "load_animals_and_samples",
+            sample_table_filename="DataRepo/example_data/obob_samples_table.tsv",
+            animal_table_filename="DataRepo/example_data/obob_animals_table.tsv",
+            table_headers="DataRepo/example_data/sample_and_animal_tables_headers.yaml",
+        )
+        call_command(
+            "load_accucor_msruns",
+            protocol="Default",
+            accucor_file="DataRepo/example_data/obob_maven_c160_serum.xlsx",
+            date="2021-04-29",
+            researcher="Xianfeng Zeng",
+        )
+        super().setUpTestData()
+
+    def test_export_fcirc_rates(self):
+        self.assertTrue(
+            FCirc.objects.values("serum_sample__animal").distinct().count() > 1,
+            msg="The FCirc rates of multiple animals are exported together",
+        )
+        computed = self.assertExportedFCircRatesMatch()
+        self.assertTrue(sum(computed.values()) > 0)
+
+    def test_export_cube_scope(self):
+        """
+        Test that the isotopologue cube of an export of multiple animals is scoped to a study containing all of them
+        """
+        sg = SearchGroup()
+        res, _, _ = sg.getAllBrowseData("fctemplate")
+        scope = sg.getExporter("fctemplate", res).getCubeScope()
+        self.assertEqual(["study_id"], list(scope.keys()))
+        animals = Animal.objects.filter(samples__fcircs__in=res).distinct()
+        self.assertTrue(animals.count() > 1)
+        self.assertEqual(
+            animals.count(), animals.filter(studies__id=scope["study_id"]).count()
+        )
+
+    def test_export_queries_independent_of_row_count(self):
+        """
+        Test that the number of queries of an export of FCirc rates does not depend on the number of rows
+        """
+        sg = SearchGroup()
+        all_rows, _, _ = sg.getAllBrowseData("fctemplate")
+        one_root_rec = all_rows.filter(pk=all_rows.first().pk)
+        self.assertTrue(all_rows.count() > one_root_rec.count())
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ):
+            # The first exports build the study's and the animal's cubes
+            for results in [all_rows, one_root_rec]:
+                list(sg.getExporter("fctemplate", results).iterChunks())
+            num_queries = []
+            for results in [all_rows, one_root_rec]:
+                exporter = sg.getExporter("fctemplate", results)
+                with CaptureQueriesContext(connection) as queries:
+                    list(exporter.iterChunks())
+                num_queries.append(len(queries.captured_queries))
+        self.assertEqual(num_queries[0], num_queries[1])
+
+
+@override_settings(CACHES=settings.TEST_CACHES)
+class FCircMultiLabelExportTests(FCircExportTestCase):
+    """
+    Exports of FCirc rates of a tracer with multiple labeled elements
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "load_study",
+            "DataRepo/example_data/small_dataset/small_obob_study_prerequisites.yaml",
+        )
+        call_command(
+            "load_animals_and_samples",
+            animal_and_sample_table_filename=(
+                "DataRepo/example_data/obob_fasted_glc_lac_gln_ala_multiple_labels/animal_sample_table.xlsx"
+            ),
+            skip_researcher_check=True,
+        )
+        call_command(
+            "load_accucor_msruns",
+            accucor_file="DataRepo/example_data/obob_fasted_glc_lac_gln_ala_multiple_labels/"
+            "alafasted_cor.xlsx",
+            protocol="Default",
+            date="2021-04-29",
+            researcher="Xianfeng Zeng",
+            new_researcher=False,
+            isocorr_format=True,
+        )
+        super().setUpTestData()
+
+    def test_export_fcirc_rates(self):
+        """
+        Test that the exported intact rates of each labeled element equal the rates computed through the ORM, which
+        select the intact peak data of an element with separate label filters (see PeakData.get_intact_fraction)
+        """
+        self.assertTrue(
+            FCirc.objects.values("element").distinct().count() > 1,
+            msg="The FCirc rates of multiple labeled elements are exported",
+        )
+        computed = self.assertExportedFCircRatesMatch()
+        self.assertTrue(computed["rate_disappearance_intact_per_gram"] > 0)
+
 
 @tag("search_choices")
 class SearchFieldChoicesTests(TracebaseTestCase):
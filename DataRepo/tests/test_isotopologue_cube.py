@@ -0,0 +1,263 @@
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+
+from DataRepo.models import (
+    Animal,
+    AnimalLabel,
+    MSRun,
+    PeakData,
+    PeakGroup,
+    PeakGroupLabel,
+)
+from DataRepo.tests.tracebase_test_case import TracebaseTestCase
+from DataRepo.utils import isotopologue_cube
+from DataRepo.utils.isotopologue_cube import (
+    IsotopologueCube,
+    enrichment_abundances,
+    enrichment_fractions,
+    intact_fractions,
+    label_fractions,
+    normalized_labelings,
+)
+
+
+@override_settings(CACHES=settings.TEST_CACHES)
+class IsotopologueCubeTests(TracebaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("load_study", "DataRepo/example_data/tissues/loading.yaml")
+        call_command(
+            "load_compounds",
+            compounds="DataRepo/example_data/small_dataset/small_obob_compounds.tsv",
+        )
+        call_command(
+            "load_samples",
+            "DataRepo/example_data/small_dataset/small_obob_sample_table_serum_only.tsv",
+            sample_table_headers="DataRepo/example_data/sample_table_headers.yaml",
+        )
+        call_command(
+            "load_accucor_msruns",
+            protocol="Default",
+            accucor_file="DataRepo/example_data/small_dataset/small_obob_maven_6eaas_serum.xlsx",
+            date="2021-06-03",
+            researcher="Michael Neinast",
+            new_researcher=True,
+        )
+        super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.cube_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=self.cube_dir.name
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.cube_dir.cleanup()
+        super().tearDown()
+
+    def test_enrichment_fractions_match_peak_group_labels(self):
+        cube = IsotopologueCube.get()
+        efs = enrichment_fractions(cube)
+        eas = enrichment_abundances(cube)
+        pgls = PeakGroupLabel.objects.select_related("peak_group")
+        self.assertTrue(pgls.count() > 0)
+        for pgl in pgls:
+            pos = cube.get_position(
+                pgl.peak_group.msrun_id, pgl.peak_group.name, pgl.element
+            )
+            if pgl.enrichment_fraction is None:
+                self.assertTrue(np.isnan(efs[pos]))
+            else:
+                self.assertAlmostEqual(pgl.enrichment_fraction, efs[pos])
+                self.assertAlmostEqual(
+                    pgl.enrichment_abundance, eas[pos], delta=1e-6 * eas[pos]
+                )
+
+    def test_serum_tracers_enrichment_fraction(self):
+        animal = Animal.objects.first()
+        cube = IsotopologueCube.get(animal_id=animal.id)
+        self.assertEqual(
+            set(animal.samples.values_list("msruns__id", flat=True)),
+            set(cube.msrun_ids),
+        )
+        for label in AnimalLabel.objects.filter(animal=animal):
+            self.assertAlmostEqual(
+                label.serum_tracers_enrichment_fraction,
+                cube.serum_tracers_enrichment_fraction(
+                    label.last_serum_tracer_label_peak_groups, label.element
+                ),
+            )
+
+    def test_build_does_not_depend_on_maintained_peak_group_keys(self):
+        """
+        Peak groups whose (maintained) sample and animal keys have not been set yet (e.g. mid-load) are still included
+        """
+        animal = Animal.objects.first()
+        scopes = [{}, {"animal_id": animal.id}]
+        cubes = [IsotopologueCube.build("v", **scope) for scope in scopes]
+        PeakGroup.objects.update(sample=None, animal=None)
+        for scope, cube in zip(scopes, cubes):
+            unkeyed = IsotopologueCube.build("v", **scope)
+            self.assertEqual(cube.msrun_ids, unkeyed.msrun_ids)
+            np.testing.assert_array_equal(
+                cube.msrun_animal_ids, unkeyed.msrun_animal_ids
+            )
+            np.testing.assert_array_equal(cube.abundance, unkeyed.abundance)
+
+    def test_persisted_bundle_is_reused_until_the_data_changes(self):
+        cube = IsotopologueCube.get()
+        bundle_dir = IsotopologueCube.get_bundle_dir(cube.scope, cube.version)
+        self.assertTrue((bundle_dir / "abundance.npy").exists())
+
+        loaded = IsotopologueCube.get()
+        self.assertEqual(cube.version, loaded.version)
+        self.assertIsInstance(loaded.abundance, np.memmap)
+        np.testing.assert_array_equal(cube.abundance, loaded.abundance)
+        self.assertEqual(cube.peak_group_names, loaded.peak_group_names)
+
+        pd = PeakData.objects.filter(corrected_abundance__gt=0).first()
+        pd.corrected_abundance += 1
+        pd.save()
+        self.assertNotEqual(cube.version, IsotopologueCube.get_version())
+
+    def test_label_fractions_match_peak_data_fractions(self):
+        cube = IsotopologueCube.get()
+        lfs = label_fractions(cube)
+        pgls = PeakGroupLabel.objects.select_related("peak_group")
+        self.assertTrue(pgls.count() > 0)
+        for pgl in pgls:
+            expected = np.zeros(lfs.shape[-1])
+            for pd in pgl.peak_group.peak_data.filter(labels__element=pgl.element):
+                if pd.fraction is None:
+                    expected = None
+                    break
+                expected[pd.labels.get(element=pgl.element).count] += pd.fraction
+            pos = cube.get_position(
+                pgl.peak_group.msrun_id, pgl.peak_group.name, pgl.element
+            )
+            if expected is None:
+                self.assertTrue(np.isnan(lfs[pos]).all())
+            else:
+                np.testing.assert_allclose(expected, lfs[pos], atol=1e-12)
+
+    def test_intact_fractions_match_intact_tracer_label_rates(self):
+        cube = IsotopologueCube.get()
+        tracer_label_counts = np.full(cube.atom_counts.shape, -1, dtype=np.int64)
+        pgls = PeakGroupLabel.objects.select_related("peak_group")
+        for pgl in pgls:
+            if pgl.tracer_label_count is not None:
+                tracer_label_counts[
+                    cube.get_position(
+                        pgl.peak_group.msrun_id, pgl.peak_group.name, pgl.element
+                    )
+                ] = pgl.tracer_label_count
+        intacts = intact_fractions(cube, tracer_label_counts)
+
+        num_rates = 0
+        for pgl in pgls:
+            intact = intacts[
+                cube.get_position(
+                    pgl.peak_group.msrun_id, pgl.peak_group.name, pgl.element
+                )
+            ]
+            rate = pgl.rate_disappearance_intact_per_gram
+            if rate is not None:
+                num_rates += 1
+                # Rd_intact_g = infusion rate * tracer concentration / intact fraction
+                self.assertAlmostEqual(
+                    pgl.animal.infusion_rate * pgl.tracer_concentration / rate, intact
+                )
+            elif pgl.tracer_label_count is None:
+                self.assertTrue(np.isnan(intact))
+        self.assertTrue(num_rates > 0)
+
+    def test_normalized_labelings_match_peak_group_labels(self):
+        cube = IsotopologueCube.get()
+        nls = normalized_labelings(cube, cube.serum_tracers_enrichment_fractions())
+        num_labelings = 0
+        for pgl in PeakGroupLabel.objects.select_related("peak_group"):
+            nl = nls[
+                cube.get_position(
+                    pgl.peak_group.msrun_id, pgl.peak_group.name, pgl.element
+                )
+            ]
+            if pgl.normalized_labeling is None:
+                self.assertTrue(np.isnan(nl))
+            else:
+                num_labelings += 1
+                self.assertAlmostEqual(pgl.normalized_labeling, nl)
+        self.assertTrue(num_labelings > 0)
+
+    def test_enrichment_fraction_array_is_computed_once(self):
+        cube = IsotopologueCube.get()
+        pgl = PeakGroupLabel.objects.select_related("peak_group").first()
+        with patch.object(
+            isotopologue_cube, "enrichment_fractions", wraps=enrichment_fractions
+        ) as computed:
+            for _ in range(2):
+                cube.enrichment_fraction(
+                    pgl.peak_group.msrun_id, pgl.peak_group.name, pgl.element
+                )
+            enrichment_abundances(cube)
+        self.assertEqual(1, computed.call_count)
+
+    def test_version_changes_when_peak_groups_change(self):
+        version = IsotopologueCube.get_version()
+
+        pg = PeakGroup.objects.exclude(formula="C1").first()
+        PeakGroup.objects.filter(id=pg.id).update(formula="C1")
+        formula_version = IsotopologueCube.get_version()
+        self.assertNotEqual(version, formula_version)
+
+        # Reassign the peak group to an msrun without a peak group of the same name
+        msrun = (
+            MSRun.objects.exclude(peak_groups__name=pg.name)
+            .exclude(id=pg.msrun_id)
+            .first()
+        )
+        if msrun is None:
+            msrun = MSRun.objects.create(
+                sample=pg.msrun.sample,
+                protocol=pg.msrun.protocol,
+                researcher="Reassigned",
+                date=pg.msrun.date,
+            )
+        PeakGroup.objects.filter(id=pg.id).update(msrun=msrun)
+        self.assertNotEqual(formula_version, IsotopologueCube.get_version())
+
+    def test_superseded_bundles_are_deleted(self):
+        animal = Animal.objects.first()
+        animal_cube = IsotopologueCube.get(animal_id=animal.id)
+        IsotopologueCube.get()
+        # Loaded (memory-mapped) from the bundle
+        cube = IsotopologueCube.get()
+        old_bundle_dir = IsotopologueCube.get_bundle_dir(cube.scope, cube.version)
+        abundance_sum = np.asarray(cube.abundance).sum()
+
+        pd = PeakData.objects.filter(corrected_abundance__gt=0).first()
+        pd.corrected_abundance += 1
+        pd.save()
+        new_cube = IsotopologueCube.get()
+
+        self.assertNotEqual(cube.version, new_cube.version)
+        self.assertFalse(old_bundle_dir.exists())
+        self.assertTrue(
+            IsotopologueCube.get_bundle_dir(new_cube.scope, new_cube.version).exists()
+        )
+        # Other scopes' bundles are only deleted when their scope's cube is rebuilt
+        self.assertTrue(
+            IsotopologueCube.get_bundle_dir(
+                animal_cube.scope, animal_cube.version
+            ).exists()
+        )
+        # The superseded cube remains readable
+        self.assertIsInstance(cube.abundance, np.memmap)
+        self.assertEqual(abundance_sum, np.asarray(cube.abundance).sum())
@@ -1,12 +1,15 @@
+import warnings
 from datetime import datetime, timedelta
 
 import pandas as pd
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.management import call_command
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.db.models import F
 from django.db.models.deletion import RestrictedError
 from django.test import override_settings, tag
+from django.test.utils import CaptureQueriesContext
 
 from DataRepo.models import (
     Animal,
@@ -29,7 +32,7 @@ from DataRepo.models import (
     Tracer,
     TracerLabel,
 )
-from DataRepo.models.hier_cached_model import set_cache
+from DataRepo.models.hier_cached_model import bump_data_version, set_cache
 from DataRepo.models.peak_group_label import NoCommonLabel
 from DataRepo.tests.tracebase_test_case import TracebaseTestCase
 from DataRepo.utils import (
@@ -42,6 +45,7 @@ from DataRepo.utils import (
     parse_infusate_name,
     parse_tracer_concentrations,
 )
+from DataRepo.utils.composite_data import get_leaderboard_scores
 
 
 class ExampleDataConsumer:
@@ -689,6 +693,69 @@ class DataLoadingTests(TracebaseTestCase):
         with self.assertWarns(UserWarning):
             self.assertFalse(pgl.from_serum_sample)
 
+    def test_peak_group_sample_and_animal_keys_loaded(self):
+        self.assertFalse(PeakGroup.objects.filter(sample__isnull=True).exists())
+        self.assertFalse(PeakGroup.objects.filter(animal__isnull=True).exists())
+        self.assertFalse(
+            PeakGroup.objects.exclude(sample__id=F("msrun__sample__id")).exists()
+        )
+        self.assertFalse(
+            PeakGroup.objects.exclude(
+                animal__id=F("msrun__sample__animal__id")
+            ).exists()
+        )
+
+    def test_peak_group_keys_follow_msrun_sample_reassignment(self):
+        msrun = MSRun.objects.filter(peak_groups__isnull=False).first()
+        taken_sample_ids = MSRun.objects.filter(
+            researcher=msrun.researcher, date=msrun.date, protocol=msrun.protocol
+        ).values("sample__id")
+        new_sample = (
+            Sample.objects.exclude(animal__id=msrun.sample.animal_id)
+            .exclude(id__in=taken_sample_ids)
+            .first()
+        )
+
+        msrun.sample = new_sample
+        msrun.save()
+
+        self.assertTrue(msrun.peak_groups.exists())
+        self.assertEqual(
+            msrun.peak_groups.count(),
+            msrun.peak_groups.filter(
+                sample__id=new_sample.id, animal__id=new_sample.animal_id
+            ).count(),
+        )
+
+    def test_peak_group_keys_follow_sample_animal_reassignment(self):
+        sample = Sample.objects.filter(msruns__peak_groups__isnull=False).first()
+        new_animal = Animal.objects.exclude(id=sample.animal_id).first()
+
+        sample.animal = new_animal
+        sample.save()
+
+        self.assertEqual(
+            0,
+            PeakGroup.objects.filter(msrun__sample__id=sample.id)
+            .exclude(animal__id=new_animal.id)
+            .count(),
+        )
+        self.assertTrue(PeakGroup.objects.filter(animal__id=new_animal.id).exists())
+
+    def test_sample_save_does_not_update_peak_groups(self):
+        """
+        Peak group keys are only updated when a sample's animal changes, not on every save
+        """
+        sample = Sample.objects.filter(msruns__peak_groups__isnull=False).first()
+        with CaptureQueriesContext(connection) as queries:
+            sample.save()
+        self.assertFalse(
+            any(
+                'UPDATE "DataRepo_peakgroup"' in query["sql"]
+                for query in queries.captured_queries
+            )
+        )
+
     @tag("synonym_data_loading")
     def test_valid_synonym_accucor_load(self):
         # this file contains 1 valid synonym for glucose, "dextrose"
@@ -1766,6 +1833,35 @@ class TracerRateTests(TracebaseTestCase):
             places=2,
         )
 
+    @tag("fcirc")
+    def test_tracer_label_rate_predicates_use_animal_lookups(self):
+        """
+        Test that from_serum_sample and can_compute_intact_tracer_label_rates query the animal's tracer, sample, and
+        intact fraction lookups once, instead of each label's peak data and sample
+        """
+        animal = self.MAIN_SERUM_ANIMAL
+        pgls = list(
+            PeakGroupLabel.objects.filter(peak_group__animal=animal)
+            .select_related("peak_group__animal")
+            .prefetch_related("peak_group__compounds")
+        )
+        self.assertTrue(len(pgls) > 5)
+        with CaptureQueriesContext(connection) as queries, warnings.catch_warnings():
+            # Non-tracer labels warn that they cannot compute rates
+            warnings.simplefilter("ignore")
+            for pgl in pgls:
+                pgl.from_serum_sample
+                pgl.can_compute_intact_tracer_label_rates
+        data_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"DataRepo_' in query["sql"]
+        ]
+        # Once for all of the labels: the infusate's tracer lookup (2), the serum sample lookup (1), the intact fraction
+        # lookup (1), and the animal's cached tracers (3, the cache's representative of the animal, see
+        # HierCachedModel.set_caches_exist)
+        self.assertEqual(7, len(data_queries), msg="\n".join(data_queries))
+
 
 @override_settings(CACHES=settings.TEST_CACHES)
 class AnimalAndSampleLoadingTests(TracebaseTestCase):
@@ -1802,6 +1898,23 @@ class AnimalAndSampleLoadingTests(TracebaseTestCase):
         study = Study.objects.get(name="Small OBOB")
         self.assertEqual(study.animals.count(), ANIMALS_COUNT)
 
+    def test_animal_and_sample_load_sets_serum_sample_fields(self):
+        call_command(
+            "load_animals_and_samples",
+            animal_and_sample_table_filename=(
+                "DataRepo/example_data/small_dataset/"
+                "small_obob_animal_and_sample_table.xlsx"
+            ),
+            debug=False,
+        )
+
+        # The maintained serum sample fields are computed in bulk by the sample loader, before any peak groups exist
+        for sample in Sample.objects.select_related("tissue"):
+            self.assertEqual(sample.tissue.is_serum(), sample.is_serum_sample)
+        for animal in Animal.objects.all():
+            self.assertIsNotNone(animal.last_serum_sample)
+            self.assertEqual(animal._last_serum_sample(), animal.last_serum_sample)
+
 
 @override_settings(CACHES=settings.TEST_CACHES)
 class AccuCorDataLoadingTests(TracebaseTestCase):
@@ -2392,6 +2505,28 @@ class StudyLoadingTests(TracebaseTestCase):
         self.maxDiff = None
         self.assertDictEqual(expected_leaderboard, leaderboard_data())
 
+    def test_leaderboards_queries(self):
+        """
+        Test that the leaderboards are counted with a single query each (plus one to get the researchers), and then
+        retrieved from the cache (of the repository stats) until the data changes
+        """
+
+        def count_data_queries(func):
+            with CaptureQueriesContext(connection) as queries:
+                result = func()
+            num_queries = len(
+                [q for q in queries.captured_queries if '"DataRepo_' in q["sql"]]
+            )
+            return result, num_queries
+
+        scores, num_queries = count_data_queries(get_leaderboard_scores)
+        self.assertEqual(1 + len(scores), num_queries)
+        bump_data_version()
+        leaderboards = leaderboard_data()
+        cached_leaderboards, num_queries = count_data_queries(leaderboard_data)
+        self.assertEqual(0, num_queries)
+        self.assertDictEqual(leaderboards, cached_leaderboards)
+
     def test_singly_labeled_isocorr_study(self):
         call_command(
             "load_study",
@@ -1,12 +1,17 @@
 import json
+from datetime import date
 
+import numpy as np
 import pandas as pd
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import dateparse
 
-from DataRepo.models import Animal, Infusate, Tracer, TracerLabel
+from DataRepo.models import Animal, Infusate, Study, Tracer, TracerLabel
 from DataRepo.tests.tracebase_test_case import TracebaseTestCase
 from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
+from DataRepo.utils.queryset_to_pandas_dataframe import summary_builder_names
 
 
 class QuerysetToPandasDataFrameBaseTests(TracebaseTestCase):
@@ -260,6 +265,215 @@ class QuerysetToPandasDataFrameBaseTests(TracebaseTestCase):
         inf2_out_dict = qs2df.df_to_list_of_dict(out2_df)[0]
         self.assertEqual(inf2_out_dict, inf2_dict)
 
+    def assert_same_records(self, expected_df, scoped_df, sort_columns):
+        """
+        compare the records of two DataFrames, ignoring the order of the rows and of the values in list columns (which
+        follows the order of the queried records)
+        """
+
+        def get_records(df):
+            records = qs2df.df_to_list_of_dict(
+                df.sort_values(sort_columns).reset_index(drop=True)
+            )
+            for rec in records:
+                for key, val in rec.items():
+                    if isinstance(val, list):
+                        rec[key] = sorted(val, key=str)
+            return records
+
+        self.assertEqual(get_records(expected_df), get_records(scoped_df))
+
+    def test_scoped_summary_dfs(self):
+        """
+        test that summary DataFrames scoped to a study or an animal contain the same records as the DataFrames of all
+        studies/animals filtered to that study/animal
+        """
+        stud_msrun_df = qs2df.get_study_msrun_all_df()
+        stud_list_stats_df = qs2df.get_study_list_stats_df()
+        anim_msrun_df = qs2df.get_animal_msrun_all_df()
+        anim_list_stats_df = qs2df.get_animal_list_stats_df()
+        msrun_sort = ["study_id", "sample_id", "msrun_id"]
+
+        for study_id in stud_list_stats_df["study_id"]:
+            self.assert_same_records(
+                stud_msrun_df[stud_msrun_df["study_id"] == study_id],
+                qs2df().get_per_study_msrun_df(study_id),
+                msrun_sort,
+            )
+            self.assert_same_records(
+                stud_list_stats_df[stud_list_stats_df["study_id"] == study_id],
+                qs2df().get_per_study_stat_df(study_id),
+                ["study_id"],
+            )
+
+        for animal_id in anim_list_stats_df["animal_id"]:
+            self.assert_same_records(
+                anim_msrun_df[anim_msrun_df["animal_id"] == animal_id],
+                qs2df().get_per_animal_msrun_df(animal_id),
+                msrun_sort[1:],
+            )
+            self.assert_same_records(
+                anim_list_stats_df[anim_list_stats_df["animal_id"] == animal_id],
+                qs2df.get_animal_list_stats_df(animal_ids=[animal_id]),
+                ["animal_id"],
+            )
+
+        # A scope without any records yields empty DataFrames
+        missing_id = max(stud_list_stats_df["study_id"]) + 1
+        self.assertEqual(0, len(qs2df().get_per_study_msrun_df(missing_id)))
+        self.assertEqual(0, len(qs2df().get_per_study_stat_df(missing_id)))
+
+    def test_df_to_list_of_dict(self):
+        """
+        test that the records converted directly from each summary DataFrame are the same as those parsed from the
+        DataFrame's JSON
+        """
+        for builder_name in summary_builder_names:
+            df = getattr(qs2df, builder_name)()
+            self.assertEqual(
+                qs2df.df_to_list_of_dict_json(df), qs2df.df_to_list_of_dict(df)
+            )
+
+    def test_summary_dtypes(self):
+        """
+        test that the string columns of the msrun-level summary DataFrames are categoricals (for repeated names) or
+        strings, and that their records and sorting are the same as those of python objects
+        """
+        for df in [qs2df.get_study_msrun_all_df(), qs2df.get_animal_msrun_all_df()]:
+            object_df = df.copy()
+            for column in ["animal", "tissue", "sample", "treatment"]:
+                object_df[column] = object_df[column].astype(object)
+            self.assertIsInstance(df["animal"].dtype, pd.CategoricalDtype)
+            self.assertIsInstance(df["tissue"].dtype, pd.CategoricalDtype)
+            self.assertEqual(qs2df.string_dtype, df["sample"].dtype)
+            self.assertEqual(qs2df.string_dtype, df["treatment"].dtype)
+            self.assertEqual(
+                qs2df.df_to_list_of_dict(object_df), qs2df.df_to_list_of_dict(df)
+            )
+            for column in ["animal", "tissue"]:
+                self.assertEqual(
+                    list(qs2df.filter_and_sort_df(object_df, order_by=column).index),
+                    list(qs2df.filter_and_sort_df(df, order_by=column).index),
+                )
+
+        # The unique labeled elements of each study are obtained from the tracers of its infusates
+        stud_list_stats_df = qs2df.get_study_list_stats_df()
+        stud1_df = stud_list_stats_df[stud_list_stats_df["study"] == "Study Test1"]
+        stud1_dict = qs2df.df_to_list_of_dict(stud1_df)[0]
+        self.assertEqual(["C", "N"], stud1_dict["labeled_elements"])
+
+    def test_df_to_list_of_dict_value_formats(self):
+        """
+        test that null values, durations (with fractions of seconds), dates, floats, and arrays are converted the same
+        way to_json converts them
+        """
+        df = pd.DataFrame(
+            {
+                "duration": [
+                    pd.Timedelta("98 days"),
+                    pd.Timedelta("0 days 02:30:00.5"),
+                    pd.NaT,
+                    pd.Timedelta(microseconds=7),
+                ],
+                "date": [date(2021, 4, 30), None, date(2020, 1, 1), date(2020, 1, 2)],
+                "float": [0.1 + 0.2, np.nan, 26.2, 1 / 3],
+                "int": [1, None, 3, 4],
+                "str": ["a", None, "b", "c"],
+                "array": [np.array(["x", "y"]), np.array([1, 2]), [np.int64(3)], None],
+                "bool": [True, False, True, None],
+            }
+        )
+        for frame in [df, df.convert_dtypes()]:
+            recs = qs2df.df_to_list_of_dict(frame)
+            self.assertEqual(qs2df.df_to_list_of_dict_json(frame), recs)
+        self.assertEqual(
+            {
+                "duration": "P0DT2H30M0.500S",
+                "date": None,
+                "float": None,
+                "int": None,
+                "str": None,
+                "array": [1, 2],
+                "bool": False,
+            },
+            recs[1],
+        )
+        self.assertEqual("2021-04-30T00:00:00.000000000", recs[0]["date"])
+        self.assertEqual(0.3333333333, recs[3]["float"])
+
+    def test_filter_and_sort_df(self):
+        """
+        Test that summary DataFrames are filtered and sorted by the values displayed in the summary tables
+        """
+        df = pd.DataFrame(
+            {
+                "name": ["b", "C", None, "a"],
+                "tracers": [
+                    ["30||C16:0"],
+                    ["11||lysine", "12||Serine"],
+                    [],
+                    ["9||glucose"],
+                ],
+                "total": pd.array([2, None, 10, 1], dtype="Int64"),
+            }
+        )
+
+        self.assertEqual(
+            ["a", "b", "C", None],
+            qs2df.filter_and_sort_df(df, order_by="name")["name"].tolist(),
+        )
+        self.assertEqual(
+            ["C", "b", "a", None],
+            qs2df.filter_and_sort_df(df, order_by="name", order_dir="desc")[
+                "name"
+            ].tolist(),
+        )
+        # Numeric columns are not sorted by text
+        self.assertEqual(
+            ["a", "b", None, "C"],
+            qs2df.filter_and_sort_df(df, order_by="total")["name"].tolist(),
+        )
+        # The ids of id/name lists are not displayed, so they are not matched
+        self.assertEqual(
+            ["C"],
+            qs2df.filter_and_sort_df(df, filters={"tracers": "SER"})["name"].tolist(),
+        )
+        self.assertEqual(
+            0, qs2df.filter_and_sort_df(df, filters={"tracers": "11"}).shape[0]
+        )
+        self.assertEqual(
+            ["b", "a"],
+            qs2df.filter_and_sort_df(
+                df, order_by="tracers", filters={"name": "", "tracers": "c"}
+            )["name"].tolist(),
+        )
+        with self.assertRaises(ValueError):
+            qs2df.filter_and_sort_df(df, order_by="name", order_dir="up")
+
+    def test_summary_cache(self):
+        """
+        test that summary DataFrames are served from the cache (without querying the data) until the data changes
+        """
+        stud_list_stats_df = qs2df.get_study_list_stats_df()
+        with CaptureQueriesContext(connection) as queries:
+            cached_df = qs2df.get_study_list_stats_df()
+        self.assertFalse(
+            any('"DataRepo_' in query["sql"] for query in queries.captured_queries)
+        )
+        self.assertEqual(
+            qs2df.df_to_list_of_dict(stud_list_stats_df),
+            qs2df.df_to_list_of_dict(cached_df),
+        )
+
+        # Saving a record changes the data version, which expires the cached DataFrames
+        study = Study.objects.get(name=self.study1_dict["study"])
+        study.description = "changed description"
+        study.save()
+        self.assertIn(
+            "changed description",
+            qs2df.get_study_list_stats_df()["study_description"].tolist(),
+        )
+
     def test_treatment_null(self):
         """
         test null values handled by DataFrames if Animal.treatment_id is null
@@ -1,4 +1,8 @@
+import gzip
 import json
+import tempfile
+from unittest import skipUnless
+from unittest.mock import patch
 
 from django.conf import settings
 from django.core.management import call_command
@@ -6,6 +10,8 @@ from django.db import transaction
 from django.test import override_settings, tag
 from django.urls import reverse
 
+from DataRepo.formats.dataformat_export import isArrowAvailable
+from DataRepo.formats.search_group import SearchGroup
 from DataRepo.models import (
     Animal,
     Compound,
@@ -28,6 +34,7 @@ from DataRepo.tests.tracebase_test_case import (
     TracebaseTestCase,
     TracebaseTransactionTestCase,
 )
+from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
 from DataRepo.views import DataValidationView
 
 
@@ -141,6 +148,47 @@ class ViewTests(TracebaseTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "DataRepo/study_summary.html")
 
+    @tag("study")
+    def test_study_summary_paging(self):
+        tot = qs2df.get_study_msrun_all_df().shape[0]
+
+        response = self.client.get(
+            reverse("study_summary"),
+            {"rows": 10, "page": 2, "order_by": "sample", "order_direction": "desc"},
+        )
+        self.assertEqual(response.status_code, 200)
+        pager = response.context["pager"]
+        self.assertEqual(tot, pager.tot)
+        self.assertEqual(2, pager.page)
+        self.assertEqual("sample", pager.order_by)
+        self.assertEqual("desc", pager.order_dir)
+        page_samples = [rec["sample"] for rec in response.context["df"]]
+        self.assertEqual(tot - 10, len(page_samples))
+        self.assertEqual(
+            sorted(page_samples, key=str.lower, reverse=True), page_samples
+        )
+        # The fields the summary paging form does not have are not rendered
+        content = response.content.decode()
+        form_start = content.index(f'id="{pager.form_id}"')
+        form_end = content.index("</form>", form_start)
+        self.assertNotIn("None", content[form_start:form_end])
+
+        # Filters are case-insensitive, and pages past the end (and invalid page numbers) get the last page
+        response = self.client.get(
+            reverse("study_summary"), {"filter-tissue": "SERUM", "page": "x"}
+        )
+        self.assertEqual(1, response.context["pager"].tot)
+        self.assertEqual(1, response.context["pager"].page)
+        self.assertEqual({"tissue": "SERUM"}, response.context["filters"])
+        self.assertEqual(
+            "serum_plasma_unspecified_location", response.context["df"][0]["tissue"]
+        )
+        response = self.client.get(
+            reverse("study_summary"), {"filter-tissue": "nothing", "page": 3}
+        )
+        self.assertEqual(0, response.context["pager"].tot)
+        self.assertEqual(0, len(response.context["df"]))
+
     @tag("study")
     def test_study_detail(self):
         obob_fasted = Study.objects.filter(name="obob_fasted").get()
@@ -453,6 +501,33 @@ class ViewTests(TracebaseTestCase):
         self.assertEqual(len(response.context["res"]), qs.count())
         self.assertEqual(qry, response.context["qry"])
 
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=0)
+    def test_search_advanced_estimated_count(self):
+        """
+        Page through advanced search results whose number is estimated and make sure the exact count can be retrieved
+        """
+        qs = PeakGroup.objects.filter(msrun__sample__tissue__name__iexact="Brain")
+        [filledform, qry, dlform] = self.get_advanced_search_inputs()
+        pageform = {
+            "paging": "paging",
+            "qryjson": dlform["qryjson"],
+            "rows": "10",
+            "page": "1",
+        }
+        response = self.client.post("/DataRepo/search_advanced/", pageform)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["pager"].tot_estimated)
+        self.assertContains(response, f"about {response.context['pager'].tot}")
+
+        response = self.client.post(reverse("search_advanced_count"), pageform)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({"count": qs.count()}, response.json())
+
+        # The exact count is now cached, so it is no longer estimated
+        response = self.client.post("/DataRepo/search_advanced/", pageform)
+        self.assertFalse(response.context["pager"].tot_estimated)
+        self.assertEqual(qs.count(), response.context["pager"].tot)
+
     def test_search_advanced_invalid(self):
         """
         Do a simple advanced search and make sure the results are correct
@@ -476,7 +551,7 @@ class ViewTests(TracebaseTestCase):
         response = self.client.post("/DataRepo/search_advanced_tsv/", dlform)
 
         # Response content settings
-        self.assertEqual(response.get("Content-Type"), "application/text")
+        self.assertEqual(response.get("Content-Type"), "text/tab-separated-values")
         self.assertEqual(response.status_code, 200)
         # Cannot use assertContains here for non-http response - it will complain about a missing status_code
         contentdisp = response.get("Content-Disposition")
@@ -484,6 +559,70 @@ class ViewTests(TracebaseTestCase):
         self.assertTrue("PeakGroups" in contentdisp)
         self.assertTrue(".tsv" in contentdisp)
 
+    def test_search_advanced_tsv_gzipped_csv(self):
+        """
+        Download a simple advanced search as gzipped CSV and make sure the results are correct
+        """
+        [filledform, qry, dlform] = self.get_advanced_search_inputs()
+        dlform["filetype"] = "csv"
+        dlform["compress"] = "on"
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ):
+            response = self.client.post("/DataRepo/search_advanced_tsv/", dlform)
+            content = b"".join(response.streaming_content)
+
+        self.assertEqual(response.get("Content-Type"), "application/gzip")
+        self.assertTrue(".csv.gz" in response.get("Content-Disposition"))
+        lines = gzip.decompress(content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("# Download Time: "))
+        self.assertEqual("Sample", lines[3].split(",")[0])
+        # 3 comment lines and the header line precede the rows
+        _, cnt, _ = SearchGroup().performQuery(qry, "pgtemplate")
+        self.assertTrue(cnt > 0)
+        self.assertEqual(cnt, len(lines) - 4)
+
+    def test_search_advanced_tsv_not_counted(self):
+        """
+        Make sure that a download does not count the results of the search, which it does not use
+        """
+        [filledform, qry, dlform] = self.get_advanced_search_inputs()
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ), patch.object(SearchGroup, "getQueryCount") as getQueryCount:
+            response = self.client.post("/DataRepo/search_advanced_tsv/", dlform)
+            content = b"".join(response.streaming_content)
+
+        getQueryCount.assert_not_called()
+        # 3 comment lines and the header line precede the rows
+        lines = content.decode().splitlines()
+        _, cnt, _ = SearchGroup().performQuery(qry, "pgtemplate")
+        self.assertTrue(cnt > 0)
+        self.assertEqual(cnt, len(lines) - 4)
+
+    @skipUnless(isArrowAvailable(), "pyarrow is not installed")
+    def test_search_advanced_tsv_parquet(self):
+        """
+        Download a simple advanced search as Parquet and make sure the results are correct
+        """
+        import pyarrow
+        import pyarrow.parquet
+
+        [filledform, qry, dlform] = self.get_advanced_search_inputs()
+        dlform["filetype"] = "parquet"
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ):
+            response = self.client.post("/DataRepo/search_advanced_tsv/", dlform)
+            content = b"".join(response.streaming_content)
+
+        self.assertEqual(response.get("Content-Type"), "application/vnd.apache.parquet")
+        self.assertTrue(".parquet" in response.get("Content-Disposition"))
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(content))
+        _, cnt, _ = SearchGroup().performQuery(qry, "pgtemplate")
+        self.assertEqual(cnt, table.num_rows)
+        self.assertEqual(qry, json.loads(table.schema.metadata[b"query"]))
+
     def test_validate_files(self):
         """
         Do a file validation test
@@ -0,0 +1,132 @@
+import tempfile
+import time
+from unittest.mock import patch
+
+import yaml
+from django.core.cache import cache
+from django.db import connection
+from django.template.base import Template
+from django.test import override_settings
+
+from DataRepo.tests.tracebase_test_case import TracebaseTestCase
+
+
+class ViewBudgetTestCase(TracebaseTestCase):
+    """
+    This base class of view tests measures the SQL queries (count and total time) and the template rendering time of
+    requests and compares them to checked-in budgets.  Derived classes set budgets_file to a YAML file mapping each
+    request name to its budget of each metric, e.g.:
+
+        study_list:
+          queries: 20
+          sql_ms: 500
+          render_ms: 2000
+
+    Every request is made with an empty cache, so the budgets are those of the first request after a load.  The
+    measurements are printed (see reportMeasurement), so that the budgets can be updated after an intended change.
+    """
+
+    # The path of the YAML file of budgets (relative to the repository root)
+    budgets_file = None
+    budget_metrics = ["queries", "sql_ms", "render_ms"]
+
+    @classmethod
+    def get_budgets(cls):
+        """
+        Returns the budgets read from budgets_file, keyed on request name
+        """
+        with open(cls.budgets_file) as budgets_fh:
+            return yaml.safe_load(budgets_fh)
+
+    def measure_request(self, url, data=None, method="get"):
+        """
+        Requests a URL using the test client (with an empty cache) and returns the response and its measurements: the
+        number of SQL queries, the time taken by them (sql_ms), and the time taken to render templates (render_ms, which
+        includes the queries executed while rendering).  Streamed responses (e.g. downloads) are consumed, so that the
+        queries executed while streaming are included.
+        """
+        sql = {"queries": 0, "seconds": 0.0}
+        render = {"depth": 0, "seconds": 0.0}
+        render_template = Template.render
+
+        def timed_execute(execute, sql_str, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql_str, params, many, context)
+            finally:
+                sql["queries"] += 1
+                sql["seconds"] += time.perf_counter() - start
+
+        def timed_render(template, context):
+            # Included templates are rendered while their parent is, so only the outermost renders are timed
+            render["depth"] += 1
+            start = time.perf_counter()
+            try:
+                return render_template(template, context)
+            finally:
+                render["depth"] -= 1
+                if render["depth"] == 0:
+                    render["seconds"] += time.perf_counter() - start
+
+        cache.clear()
+        with tempfile.TemporaryDirectory() as cube_dir, override_settings(
+            ISOTOPOLOGUE_CUBE_DIR=cube_dir
+        ), connection.execute_wrapper(timed_execute), patch.object(
+            Template, "render", timed_render
+        ):
+            response = getattr(self.client, method)(url, data)
+            if response.streaming:
+                b"".join(response.streaming_content)
+
+        return response, {
+            "queries": sql["queries"],
+            "sql_ms": round(sql["seconds"] * 1000, 1),
+            "render_ms": round(render["seconds"] * 1000, 1),
+        }
+
+    def assertWithinBudget(self, name, measurement, budgets):
+        """
+        Asserts that every measurement (see measure_request) of the named request is within its budget
+        """
+        self.assertIn(
+            name,
+            budgets,
+            msg=f"Request [{name}] has no budget in {self.budgets_file}.  Measured: {measurement}",
+        )
+        exceeded = [
+            f"{metric}: {measurement[metric]} > {budgets[name][metric]}"
+            for metric in self.budget_metrics
+            if measurement[metric] > budgets[name][metric]
+        ]
+        self.assertEqual(
+            [],
+            exceeded,
+            msg=f"Request [{name}] exceeded its budget in {self.budgets_file}",
+        )
+
+    def assertRequestWithinBudget(
+        self, name, budgets, url, data=None, method="get", status_code=200
+    ):
+        """
+        Requests a URL and asserts that the response has the expected status code and that its measurements (see
+        measure_request) are within the budget of the named request
+        """
+        response, measurement = self.measure_request(url, data=data, method=method)
+        reportMeasurement(name, measurement)
+        self.assertEqual(status_code, response.status_code, msg=f"Request [{name}]")
+        self.assertWithinBudget(name, measurement, budgets)
+
+
+def reportMeasurement(name, measurement):
+    """
+    Print the measurements of a request given the request name
+    """
+    print(
+        "VIEW BUDGET: %s: queries: %d, sql_ms: %.1f, render_ms: %.1f"
+        % (
+            name,
+            measurement["queries"],
+            measurement["sql_ms"],
+            measurement["render_ms"],
+        )
+    )
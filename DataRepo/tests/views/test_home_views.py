@@ -1,4 +1,6 @@
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from DataRepo.models import (
@@ -97,3 +99,26 @@ class HomeViewTests(TracebaseTestCase):
         self.assertEqual(msrun_protocol_url, "/DataRepo/protocols/msrun_protocols/")
         self.assertEqual(advance_search_url, "/DataRepo/search_advanced/")
         self.assertEqual(len(response.context["card_rows"]), 2)
+
+    def test_home_stats_cached(self):
+        """
+        Test that the home page counts and leaderboards are read from the cache until the data changes
+        """
+        self.client.get(reverse("home"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("home"))
+        self.assertFalse(
+            any('"DataRepo_' in query["sql"] for query in queries.captured_queries)
+        )
+        self.assertEqual(
+            f"{self.ALL_STUDIES_COUNT} Studies",
+            response.context["card_rows"][0][0]["card_body_title"],
+        )
+
+        # Saving a record changes the data version, which expires the cached stats
+        Study.objects.create(name="New Study")
+        response = self.client.get(reverse("home"))
+        self.assertEqual(
+            f"{self.ALL_STUDIES_COUNT + 1} Studies",
+            response.context["card_rows"][0][0]["card_body_title"],
+        )
@@ -0,0 +1,84 @@
+from django.core.management import call_command
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from DataRepo.request_profile import RequestProfile, current_profile, profiled
+from DataRepo.tests.tracebase_test_case import TracebaseTestCase
+
+
+class ServerTimingTests(TracebaseTestCase):
+    """
+    Test the per-request profiling middleware (ServerTimingMiddleware)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("load_study", "DataRepo/example_data/test_dataframes/loading.yaml")
+        super().setUpTestData()
+
+    def get_server_timing(self, response):
+        """
+        Returns a dict of the durations in a response's Server-Timing header, keyed on metric
+        """
+        durations = {}
+        for entry in response["Server-Timing"].split(", "):
+            metric, dur, _ = entry.split(";")
+            durations[metric] = float(dur.replace("dur=", ""))
+        return durations
+
+    def test_server_timing_disabled(self):
+        response = self.client.get(reverse("study_summary"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing(self):
+        # The middleware is loaded by the client's first request
+        response = Client().get(reverse("study_summary"))
+        self.assertEqual(response.status_code, 200)
+        durations = self.get_server_timing(response)
+        self.assertEqual(
+            ["sql", "summary", "render", "total"],
+            [m for m in durations.keys() if m != "cache"],
+        )
+        self.assertTrue(durations["summary"] <= durations["total"])
+        self.assertTrue(durations["render"] <= durations["total"])
+        self.assertIn("sql;dur=", response["Server-Timing"])
+        # The profile is only set while handling a request
+        self.assertIsNone(current_profile.get())
+
+    @override_settings(SERVER_TIMING=True, SERVER_TIMING_SLOW_QUERIES=2)
+    def test_server_timing_slow_queries(self):
+        with self.assertLogs("DataRepo.middleware", level="WARNING") as logs:
+            Client().get(reverse("study_summary"))
+        self.assertEqual(2, len(logs.records))
+        self.assertIn("Slow query", logs.output[0])
+
+    def test_profiled(self):
+        """
+        Test that nested calls of profiled functions are only timed once, and that the header reports the number of
+        calls of each metric
+        """
+
+        @profiled("summary")
+        def build(depth):
+            if depth > 0:
+                build(depth - 1)
+
+        # Without a current profile, nothing is recorded
+        build(1)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            build(2)
+            build(0)
+        finally:
+            current_profile.reset(token)
+        profile.add("total", 0.5)
+
+        self.assertEqual(2, profile.timings["summary"][0])
+        self.assertRegex(
+            profile.get_server_timing(),
+            r'^summary;dur=[\d.]+;desc="Summary DataFrames \(2\)", total;dur=500.0;desc="Total"$',
+        )
@@ -0,0 +1,218 @@
+import json
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import URLPattern, reverse
+
+from DataRepo import middleware, urls
+from DataRepo.formats.search_group import SearchGroup
+from DataRepo.models import FCirc, PeakGroup
+from DataRepo.tests.view_budget_test_case import ViewBudgetTestCase
+from DataRepo.views import PeakDataListView, PeakGroupListView
+
+
+class ViewBudgetTests(ViewBudgetTestCase):
+    """
+    Test that every view (and every search output format) stays within its budget of SQL queries, SQL time, and
+    rendering time (see DataRepo/tests/views/view_budgets.yaml)
+    """
+
+    budgets_file = "DataRepo/tests/views/view_budgets.yaml"
+
+    # URL names that are not requested, and why
+    unrequested_url_names = {
+        "view_search_results": "It is a convenience method that requires a queryset, so it is not requestable.",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("load_study", "DataRepo/example_data/tissues/loading.yaml")
+        call_command(
+            "load_compounds",
+            compounds="DataRepo/example_data/small_dataset/small_obob_compounds.tsv",
+        )
+        call_command(
+            "load_samples",
+            "DataRepo/example_data/small_dataset/small_obob_sample_table.tsv",
+            sample_table_headers="DataRepo/example_data/sample_table_headers.yaml",
+        )
+        for accucor_file in [
+            "small_obob_maven_6eaas_inf.xlsx",
+            "small_obob_maven_6eaas_serum.xlsx",
+        ]:
+            call_command(
+                "load_accucor_msruns",
+                protocol="Default",
+                accucor_file=f"DataRepo/example_data/small_dataset/{accucor_file}",
+                date="2021-06-03",
+                researcher="Michael Neinast",
+                new_researcher=accucor_file.endswith("_inf.xlsx"),
+            )
+        super().setUpTestData()
+
+    def get_requests(self):
+        """
+        Returns the keyword arguments of assertRequestWithinBudget (url, and optionally data and method) of every
+        budgeted request, keyed on request name.  A request's name is the name of its URL (in DataRepo/urls.py),
+        followed by a dot-delimited variant (e.g. a search output format), if any.
+        """
+        requests = {}
+
+        for pattern in urls.urlpatterns:
+            if pattern.name in self.unrequested_url_names or "<" in str(
+                pattern.pattern
+            ):
+                continue
+            requests[pattern.name] = {"url": reverse(pattern.name)}
+
+        # Detail views, using the first record of their model
+        for pattern in urls.urlpatterns:
+            if str(pattern.pattern).endswith("<int:pk>/"):
+                rec = pattern.callback.view_class.model.objects.order_by("id").first()
+                requests[pattern.name] = {"url": reverse(pattern.name, args=[rec.id])}
+
+        # List views limited to the records of a parent record
+        peak_group = PeakGroup.objects.order_by("id").first()
+        # An animal with results in every search output format
+        animal = FCirc.objects.order_by("id").first().serum_sample.animal
+        requests["sample_list.animal"] = {
+            "url": reverse("sample_list"),
+            "data": {"animal_id": animal.id},
+        }
+        requests["peakgroup_list.msrun"] = {
+            "url": reverse("peakgroup_list"),
+            "data": {"msrun_id": peak_group.msrun.id},
+        }
+        requests["peakdata_list.peakgroup"] = {
+            "url": reverse("peakdata_list"),
+            "data": {"peak_group_id": peak_group.id},
+        }
+
+        # Searches of every search output format, for the animal
+        basv = SearchGroup()
+        for fmt in basv.getFormatNames().keys():
+            requests[f"search_basic.{fmt}"] = {
+                "url": reverse(
+                    "search_basic", args=["Animal", "id", "iexact", animal.id, fmt]
+                )
+            }
+            requests[f"search_advanced.browse.{fmt}"] = {
+                "url": reverse("search_advanced"),
+                "data": {"mode": "browse", "format": fmt},
+            }
+            qry = basv.createNewBasicQuery(
+                "Animal", "id", "iexact", str(animal.id), None, fmt
+            )
+            pageform = {
+                "paging": "paging",
+                "qryjson": json.dumps(qry),
+                "rows": "10",
+                "page": "1",
+            }
+            requests[f"search_advanced.{fmt}"] = {
+                "url": reverse("search_advanced"),
+                "data": pageform,
+                "method": "post",
+            }
+            requests[f"search_advanced_count.{fmt}"] = {
+                "url": reverse("search_advanced_count"),
+                "data": pageform,
+                "method": "post",
+            }
+            requests[f"search_advanced_tsv.{fmt}"] = {
+                "url": reverse("search_advanced_tsv"),
+                "data": {
+                    "form-TOTAL_FORMS": "1",
+                    "form-INITIAL_FORMS": "0",
+                    "qryjson": json.dumps(qry),
+                },
+                "method": "post",
+            }
+
+        # These URLs only accept posts
+        for name in ["search_advanced_count", "search_advanced_tsv"]:
+            requests.pop(name)
+
+        return requests
+
+    def test_view_budgets(self):
+        budgets = self.get_budgets()
+        for name, kwargs in self.get_requests().items():
+            with self.subTest(request=name):
+                self.assertRequestWithinBudget(name, budgets, **kwargs)
+
+    def test_every_url_budgeted(self):
+        """
+        Test that every URL (in DataRepo/urls.py) is requested (or is explicitly unrequested), and that every budget
+        belongs to a request (i.e. budgets of removed requests are removed)
+        """
+        requests = self.get_requests()
+        requested_url_names = set(name.split(".")[0] for name in requests.keys())
+        for pattern in urls.urlpatterns:
+            self.assertIsInstance(pattern, URLPattern)
+            self.assertTrue(
+                pattern.name in requested_url_names
+                or pattern.name in self.unrequested_url_names,
+                msg=f"URL [{pattern.name}] is not requested by get_requests",
+            )
+        self.assertEqual(sorted(requests.keys()), sorted(self.get_budgets().keys()))
+
+    @override_settings(LAZY_LOAD_DETECTION=True)
+    def test_no_lazy_loads(self):
+        """
+        Test that no model list/detail view's template lazily loads related records per row (see
+        LazyLoadDetectionMiddleware and RelationPlanMixin)
+        """
+        # The middleware is loaded by the client's first request
+        client = Client()
+        for name, kwargs in self.get_requests().items():
+            # Search results are rendered from their format's prefetches, not from a view's relation plan
+            if name.startswith("search_"):
+                continue
+            with self.subTest(request=name), patch.object(
+                middleware.logger, "warning"
+            ) as warning:
+                response = getattr(client, kwargs.get("method", "get"))(
+                    kwargs["url"], kwargs.get("data")
+                )
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                warning.assert_not_called()
+
+    @override_settings(LAZY_LOAD_DETECTION=True)
+    def test_lazy_load_detected(self):
+        """
+        Test that a relation missing from a view's relation plan is detected
+        """
+        with patch.object(PeakDataListView, "select_related", []), self.assertLogs(
+            "DataRepo.middleware", level="WARNING"
+        ) as logs:
+            Client().get(reverse("peakdata_list"))
+        self.assertEqual(1, len(logs.records))
+        self.assertIn("Possible N+1 query", logs.output[0])
+        self.assertIn('FROM "DataRepo_peakgroup"', logs.output[0])
+
+    def test_list_queries_independent_of_page_size(self):
+        for name, view in [
+            ("peakgroup_list", PeakGroupListView),
+            ("peakdata_list", PeakDataListView),
+        ]:
+            with self.subTest(view=name):
+                with patch.object(view, "paginate_by", 2):
+                    _, small_page = self.measure_request(reverse(name))
+                response, full_page = self.measure_request(reverse(name))
+                self.assertGreater(len(response.context["object_list"]), 2)
+                self.assertEqual(small_page["queries"], full_page["queries"])
+
+    def test_peakgroup_detail_queries_independent_of_size(self):
+        peak_groups = PeakGroup.objects.annotate(
+            peak_data_count=Count("peak_data")
+        ).order_by("peak_data_count", "id")
+        smallest = peak_groups.first()
+        largest = peak_groups.last()
+        self.assertLess(smallest.peak_data_count, largest.peak_data_count)
+        _, small = self.measure_request(reverse("peakgroup_detail", args=[smallest.id]))
+        _, large = self.measure_request(reverse("peakgroup_detail", args=[largest.id]))
+        self.assertEqual(small["queries"], large["queries"])
@@ -22,6 +22,11 @@ urlpatterns = [
         views.AdvancedSearchView.as_view(),
         name="search_advanced",
     ),
+    path(
+        "search_advanced_count/",
+        views.search_advanced_count,
+        name="search_advanced_count",
+    ),
     path(
         "search_advanced_tsv/",
         views.AdvancedSearchTSVView.as_view(),
@@ -3,7 +3,10 @@ from DataRepo.utils.accucor_data_loader import (
     IsotopeObservationData,
     IsotopeObservationParsingError,
 )
-from DataRepo.utils.composite_data import leaderboard_data
+from DataRepo.utils.composite_data import (
+    get_repository_stats,
+    leaderboard_data,
+)
 from DataRepo.utils.compounds_loader import CompoundsLoader
 from DataRepo.utils.exceptions import (
     AmbiguousCompoundDefinitionError,
@@ -21,6 +24,7 @@ from DataRepo.utils.infusate_name_parser import (
     parse_infusate_name,
     parse_tracer_concentrations,
 )
+from DataRepo.utils.isotopologue_cube import IsotopologueCube
 from DataRepo.utils.protocols_loader import ProtocolsLoader
 from DataRepo.utils.queryset_to_pandas_dataframe import (
     QuerysetToPandasDataFrame,
@@ -35,6 +39,7 @@ __all__ = [
     "HeaderConfigError",
     "IsotopeObservationData",
     "IsotopeParsingError",
+    "IsotopologueCube",
     "IsotopeObservationParsingError",
     "RequiredValueError",
     "ResearcherError",
@@ -47,6 +52,7 @@ __all__ = [
     "SampleTableLoader",
     "TissuesLoader",
     "leaderboard_data",
+    "get_repository_stats",
     "parse_infusate_name",
     "parse_tracer_concentrations",
     "ProtocolsLoader",
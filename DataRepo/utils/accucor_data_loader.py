@@ -815,6 +815,12 @@ class AccuCorDataLoader:
 
                             peak_data_label.save(using=self.db)
 
+        # The buffered auto-updates of the MSRuns' related records (e.g. FCirc) query peak groups by their (maintained)
+        # sample and animal keys, so those keys must be set before any buffered updates are performed
+        PeakGroup.objects.using(self.db).filter(
+            peak_group_set=peak_group_set
+        ).update_sample_and_animal()
+
         assert not self.debug, "Debugging..."
 
         if settings.DEBUG:
@@ -1,34 +1,124 @@
 from collections import namedtuple
 
-from DataRepo.models import Researcher
+from django.core.cache import cache
+from django.db.models import Count
+
+from DataRepo.models import (
+    Animal,
+    Compound,
+    PeakGroupSet,
+    Protocol,
+    Researcher,
+    Sample,
+    Study,
+    Tissue,
+)
+from DataRepo.models.hier_cached_model import get_data_version
 from DataRepo.models.researcher import get_researchers
 
+# The Sample field path counted (distinctly) per researcher for each leaderboard.  Each is equivalent to the count of
+# the corresponding Researcher property (e.g. Researcher.studies).
+leaderboard_count_fields = {
+    "studies_leaderboard": "animal__studies",
+    "animals_leaderboard": "animal",
+    "peakgroups_leaderboard": "peak_groups",
+}
+
 
-def leaderboard_data():
+def leaderboard_data(scores=None):
     """
     Get list of tuples for leaderboard data
     [(Researcher, count)]
+
+    scores are the leaderboard scores (see get_leaderboard_scores), which default to those of the cached repository
+    stats (see get_repository_stats).
+    """
+    if scores is None:
+        scores = get_repository_stats()["leaderboard_scores"]
+    LeaderboardRow = namedtuple("LeaderboardRow", ["researcher", "score"])
+    leaderboards = {}
+    for leaderboard, leaderboard_scores in scores.items():
+        leaderboards[leaderboard] = [
+            # The names were retrieved from the database, so there's no need to validate them
+            LeaderboardRow(Researcher(name=name, validate=False), score)
+            for name, score in leaderboard_scores
+        ]
+    return leaderboards
+
+
+def get_repository_stats():
+    """
+    Get the repository statistics displayed on the home page, i.e. a dict containing the "counts" of records (see
+    get_repository_counts) and the "leaderboard_scores" (see get_leaderboard_scores).
+
+    The stats are computed once per data version (see get_data_version) and cached, so that they are only recomputed
+    after the data changes (e.g. once after each load) and the home page only has to read the cache.
     """
+    data_version = get_data_version()
+    cache_key = (
+        None if data_version is None else ".".join(["repository_stats", data_version])
+    )
+    if cache_key is not None:
+        stats = cache.get(cache_key)
+        if stats is not None:
+            return stats
 
-    leaderboards = {
-        "studies_leaderboard": [],
-        "animals_leaderboard": [],
-        "peakgroups_leaderboard": [],
+    stats = {
+        "counts": get_repository_counts(),
+        "leaderboard_scores": get_leaderboard_scores(),
     }
-    LeaderboardRow = namedtuple("LeaderboardRow", ["researcher", "score"])
-    for name in get_researchers():
-        researcher = Researcher(name=name)
-        leaderboards["studies_leaderboard"].append(
-            LeaderboardRow(researcher, researcher.studies.count())
-        )
-        leaderboards["animals_leaderboard"].append(
-            LeaderboardRow(researcher, researcher.animals.count())
+
+    if cache_key is not None:
+        cache.set(cache_key, stats, timeout=None)
+    return stats
+
+
+def get_repository_counts():
+    """
+    Count the records of each type that is browsable from the home page, and the distinct tracer compounds (in the
+    infusates of the animals)
+    """
+    return {
+        "studies": Study.objects.count(),
+        "animals": Animal.objects.count(),
+        "tissues": Tissue.objects.count(),
+        "samples": Sample.objects.count(),
+        "accucor_files": PeakGroupSet.objects.count(),
+        "compounds": Compound.objects.count(),
+        "tracer_compounds": (
+            Animal.objects.exclude(infusate__tracers__compound__id__isnull=True)
+            .order_by("infusate__tracers__compound__id")
+            .values_list("infusate__tracers__compound__id")
+            .distinct("infusate__tracers__compound__id")
+            .count()
+        ),
+        "animal_treatments": Protocol.objects.filter(
+            category=Protocol.ANIMAL_TREATMENT
+        ).count(),
+        "msrun_protocols": Protocol.objects.filter(
+            category=Protocol.MSRUN_PROTOCOL
+        ).count(),
+    }
+
+
+def get_leaderboard_scores():
+    """
+    Get each leaderboard's list of (researcher name, count) tuples, sorted by count (descending) and name.  Each
+    leaderboard is counted using a single aggregate query (a count of distinct records grouped by researcher) instead of
+    a count query per researcher.
+    """
+    # Include researchers without samples (e.g. from other models' researcher fields), who score 0
+    researchers = get_researchers()
+    scores = {}
+    for leaderboard, count_field in leaderboard_count_fields.items():
+        counts = dict(
+            Sample.objects.order_by()
+            .values("researcher")
+            .annotate(score=Count(count_field, distinct=True))
+            .values_list("researcher", "score")
         )
-        leaderboards["peakgroups_leaderboard"].append(
-            LeaderboardRow(researcher, researcher.peakgroups.count())
+        scores[leaderboard] = sorted(
+            [(name, counts.get(name, 0)) for name in researchers],
+            key=lambda x: (-x[1], x[0]),
         )
-    # Sort leaderboards by count
-    for leaderboard in leaderboards.values():
-        leaderboard.sort(key=lambda x: x.score, reverse=True)
-
-    return leaderboards
+    return scores
@@ -0,0 +1,503 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.db.models import CharField, Count, Max, Sum, Value
+from django.db.models.functions import MD5, Concat
+from django.utils.functional import cached_property
+
+from DataRepo.models import (
+    AnimalLabel,
+    ElementLabel,
+    MSRun,
+    PeakData,
+    PeakDataLabel,
+    PeakGroup,
+)
+from DataRepo.models.utilities import atom_count_in_formula
+
+
+class IsotopologueCube:
+    """
+    A dense, NumPy-backed snapshot of the corrected abundances of the peak data of a study or an animal, indexed by
+    (msrun, peak group name, labeled element, label count).  The labeling calculations in PeakGroupLabel and
+    AnimalLabel re-walk PeakData and PeakDataLabel records through the ORM.  A cube fetches those records once and
+    computes the same metrics for every peak group at once (see the vectorized functions below).
+
+    Cubes are persisted as a bundle of .npy files (loaded memory-mapped) in a directory named for the scope and a
+    content version, which is a hash of the scope and a fingerprint of the scope's peak groups, peak data, and peak data
+    labels.  When any of them changes, the version changes, the cube is rebuilt, and the scope's superseded bundle is
+    deleted.
+
+    Arrays:
+        abundance[m, p, e, k]       Sum of corrected_abundance of the peak data with k atoms of element e labeled
+        label_present[m, p, e]     Whether any PeakDataLabel exists for element e (mirrors the ORM's "no label" case)
+        total_abundance[m, p]       PeakGroup.total_abundance (NaN when the peak group doesn't exist in the msrun)
+        atom_counts[m, p, e]        The number of atoms of element e in the peak group's formula
+        msrun_animal_ids[m]         The ID of the animal each msrun's sample came from
+    """
+
+    # Increment when the bundle layout or the array semantics change, to invalidate previously persisted cubes
+    FORMAT_VERSION = 2
+    ARRAY_NAMES = [
+        "abundance",
+        "label_present",
+        "total_abundance",
+        "atom_counts",
+        "msrun_animal_ids",
+    ]
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self,
+        scope,
+        version,
+        msrun_ids,
+        peak_group_names,
+        elements,
+        abundance,
+        label_present,
+        total_abundance,
+        atom_counts,
+        msrun_animal_ids,
+    ):
+        self.scope = scope
+        self.version = version
+        self.msrun_ids = list(msrun_ids)
+        self.peak_group_names = list(peak_group_names)
+        self.elements = list(elements)
+        self.abundance = abundance
+        self.label_present = label_present
+        self.total_abundance = total_abundance
+        self.atom_counts = atom_counts
+        self.msrun_animal_ids = msrun_animal_ids
+
+        self.msrun_index = {mid: i for i, mid in enumerate(self.msrun_ids)}
+        self.peak_group_index = {pgn: i for i, pgn in enumerate(self.peak_group_names)}
+        self.element_index = {elem: i for i, elem in enumerate(self.elements)}
+
+    @classmethod
+    def get(cls, study_id=None, animal_id=None):
+        """
+        Returns the cube for the supplied scope (a study ID, an animal ID, or the whole database if neither is
+        supplied), loading it from disk if a bundle for the current content version exists, otherwise building and
+        persisting it.
+        """
+        scope = cls.get_scope_name(study_id=study_id, animal_id=animal_id)
+        version = cls.get_version(study_id=study_id, animal_id=animal_id)
+        cube = cls.load(scope, version)
+        if cube is None:
+            cube = cls.build(version, study_id=study_id, animal_id=animal_id)
+            cube.save()
+        return cube
+
+    @classmethod
+    def get_scope_name(cls, study_id=None, animal_id=None):
+        """
+        Returns the name of a scope, which prefixes the names of its bundle directories, e.g. "study_3", "animal_5", or
+        "all" (the whole database).
+        """
+        parts = []
+        if study_id is not None:
+            parts.append(f"study_{study_id}")
+        if animal_id is not None:
+            parts.append(f"animal_{animal_id}")
+        return "_".join(parts) if len(parts) > 0 else "all"
+
+    @classmethod
+    def get_scope_filters(cls, prefix, study_id=None, animal_id=None):
+        """
+        Returns the filter kwargs restricting a query to the scope, given the ORM path prefix from the queried model
+        to PeakGroup.  The scope is selected as a subquery of MSRun IDs, because joining the peak data (labels) all
+        the way through to the animals' studies gives the planner row estimates it can choose very slow plans from.
+        """
+        if study_id is None and animal_id is None:
+            return {}
+        msruns = MSRun.objects.all()
+        if study_id is not None:
+            msruns = msruns.filter(sample__animal__studies__id__exact=study_id)
+        if animal_id is not None:
+            msruns = msruns.filter(sample__animal__id__exact=animal_id)
+        return {f"{prefix}msrun__id__in": msruns.values("id")}
+
+    @classmethod
+    def get_version(cls, study_id=None, animal_id=None):
+        """
+        Computes the content version of a scope from a digest of its peak groups' cube axes (msrun, animal, name, and
+        formula) and from aggregates of its peak data and peak data labels, so that any insert, delete, peak group
+        edit/reassignment, or abundance/count edit results in a new version.
+        """
+        pg_fingerprint = PeakGroup.objects.filter(
+            **cls.get_scope_filters("", study_id, animal_id)
+        ).aggregate(
+            digest=MD5(
+                StringAgg(
+                    Concat(
+                        "id",
+                        Value(":"),
+                        "msrun_id",
+                        Value(":"),
+                        "msrun__sample__animal__id",
+                        Value(":"),
+                        "name",
+                        Value(":"),
+                        "formula",
+                        output_field=CharField(),
+                    ),
+                    delimiter=",",
+                    ordering="id",
+                )
+            ),
+        )
+        pd_fingerprint = PeakData.objects.filter(
+            **cls.get_scope_filters("peak_group__", study_id, animal_id)
+        ).aggregate(
+            num=Count("id"),
+            max_id=Max("id"),
+            abundance=Sum("corrected_abundance"),
+            peak_group_ids=Sum("peak_group_id"),
+        )
+        pdl_fingerprint = PeakDataLabel.objects.filter(
+            **cls.get_scope_filters("peak_data__peak_group__", study_id, animal_id)
+        ).aggregate(
+            num=Count("id"),
+            max_id=Max("id"),
+            counts=Sum("count"),
+            peak_data_ids=Sum("peak_data_id"),
+        )
+        content = json.dumps(
+            {
+                "format": cls.FORMAT_VERSION,
+                "study": study_id,
+                "animal": animal_id,
+                "peak_groups": pg_fingerprint,
+                "peak_data": pd_fingerprint,
+                "peak_data_labels": pdl_fingerprint,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    @classmethod
+    def build(cls, version, study_id=None, animal_id=None):
+        """
+        Builds a cube from 2 queries: the per-peak-group totals and the per-label abundances of the scope.
+        """
+        totals = (
+            PeakData.objects.filter(
+                **cls.get_scope_filters("peak_group__", study_id, animal_id)
+            )
+            .values_list(
+                "peak_group__msrun__id",
+                "peak_group__msrun__sample__animal__id",
+                "peak_group__name",
+                "peak_group__formula",
+            )
+            .annotate(total=Sum("corrected_abundance"))
+            .order_by()
+        )
+        labels = (
+            PeakDataLabel.objects.filter(
+                **cls.get_scope_filters("peak_data__peak_group__", study_id, animal_id)
+            )
+            .values_list(
+                "peak_data__peak_group__msrun__id",
+                "peak_data__peak_group__name",
+                "element",
+                "count",
+                "peak_data__corrected_abundance",
+            )
+            .order_by()
+        )
+
+        totals = list(totals)
+        labels = list(labels)
+
+        msrun_ids = sorted({row[0] for row in totals})
+        peak_group_names = sorted({row[2] for row in totals})
+        present_elements = {row[2] for row in labels}
+        elements = [
+            elem
+            for elem in ElementLabel.labeled_elements_list()
+            if elem in present_elements
+        ]
+        max_count = max([row[3] for row in labels], default=0)
+
+        cube = cls(
+            cls.get_scope_name(study_id=study_id, animal_id=animal_id),
+            version,
+            msrun_ids,
+            peak_group_names,
+            elements,
+            abundance=np.zeros(
+                (len(msrun_ids), len(peak_group_names), len(elements), max_count + 1),
+                dtype=np.float64,
+            ),
+            label_present=np.zeros(
+                (len(msrun_ids), len(peak_group_names), len(elements)), dtype=bool
+            ),
+            total_abundance=np.full(
+                (len(msrun_ids), len(peak_group_names)), np.nan, dtype=np.float64
+            ),
+            atom_counts=np.zeros(
+                (len(msrun_ids), len(peak_group_names), len(elements)), dtype=np.int16
+            ),
+            msrun_animal_ids=np.zeros(len(msrun_ids), dtype=np.int64),
+        )
+
+        for msrun_id, animal_id, pg_name, formula, total in totals:
+            mi = cube.msrun_index[msrun_id]
+            pi = cube.peak_group_index[pg_name]
+            cube.total_abundance[mi, pi] = total
+            cube.msrun_animal_ids[mi] = animal_id
+            for ei, elem in enumerate(elements):
+                cube.atom_counts[mi, pi, ei] = (
+                    atom_count_in_formula(formula, elem) or 0 if formula else 0
+                )
+
+        if len(labels) > 0:
+            label_arr = np.array(
+                [
+                    (
+                        cube.msrun_index[msrun_id],
+                        cube.peak_group_index[pg_name],
+                        cube.element_index[elem],
+                        count,
+                    )
+                    for msrun_id, pg_name, elem, count, _ in labels
+                ],
+                dtype=np.int64,
+            )
+            abundances = np.array([row[4] for row in labels], dtype=np.float64)
+            np.add.at(
+                cube.abundance,
+                (label_arr[:, 0], label_arr[:, 1], label_arr[:, 2], label_arr[:, 3]),
+                abundances,
+            )
+            cube.label_present[label_arr[:, 0], label_arr[:, 1], label_arr[:, 2]] = True
+
+        return cube
+
+    @classmethod
+    def get_bundle_dir(cls, scope, version):
+        return Path(settings.ISOTOPOLOGUE_CUBE_DIR) / f"{scope}-{version}"
+
+    def save(self):
+        """
+        Writes the cube's arrays and axis labels to its version's bundle directory and deletes the scope's superseded
+        bundles.  The bundle is written to a temporary directory first and then renamed, so that concurrent readers
+        never see a partial bundle.
+        """
+        bundle_dir = self.get_bundle_dir(self.scope, self.version)
+        if bundle_dir.exists():
+            return bundle_dir
+        bundle_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=bundle_dir.parent))
+        try:
+            for name in self.ARRAY_NAMES:
+                np.save(tmp_dir / f"{name}.npy", getattr(self, name))
+            with open(tmp_dir / self.INDEX_FILE, "w") as fh:
+                json.dump(
+                    {
+                        "msrun_ids": self.msrun_ids,
+                        "peak_group_names": self.peak_group_names,
+                        "elements": self.elements,
+                    },
+                    fh,
+                )
+            os.rename(tmp_dir, bundle_dir)
+        except OSError:
+            # Another process may have persisted the same version first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not bundle_dir.exists():
+                raise
+        self.delete_superseded_bundles()
+        return bundle_dir
+
+    def delete_superseded_bundles(self):
+        """
+        Deletes the bundles of the cube's scope with other versions.  Loaded (memory-mapped) cubes remain readable after
+        their bundle is deleted.
+        """
+        for path in Path(settings.ISOTOPOLOGUE_CUBE_DIR).glob(f"{self.scope}-*"):
+            if path.is_dir() and path.name != f"{self.scope}-{self.version}":
+                shutil.rmtree(path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, scope, version):
+        """
+        Returns the persisted cube with the supplied scope and version (with memory-mapped, read-only arrays), or None
+        if there is none.
+        """
+        bundle_dir = cls.get_bundle_dir(scope, version)
+        if not (bundle_dir / cls.INDEX_FILE).exists():
+            return None
+        with open(bundle_dir / cls.INDEX_FILE) as fh:
+            index = json.load(fh)
+        arrays = {
+            name: np.load(bundle_dir / f"{name}.npy", mmap_mode="r")
+            for name in cls.ARRAY_NAMES
+        }
+        return cls(
+            scope,
+            version,
+            index["msrun_ids"],
+            index["peak_group_names"],
+            index["elements"],
+            **arrays,
+        )
+
+    def get_position(self, msrun_id, peak_group_name, element=None):
+        """
+        Returns the (msrun, peak group[, element]) indexes of the supplied labels.  Raises KeyError if any are absent.
+        """
+        pos = (self.msrun_index[msrun_id], self.peak_group_index[peak_group_name])
+        if element is not None:
+            pos += (self.element_index[element],)
+        return pos
+
+    @cached_property
+    def enrichment_fraction_array(self):
+        """
+        The cube's enrichment_fractions, computed once per cube
+        """
+        return enrichment_fractions(self)
+
+    def enrichment_fraction(self, msrun_id, peak_group_name, element):
+        """
+        Scalar equivalent of PeakGroupLabel.enrichment_fraction (None where it cannot be computed).
+        """
+        value = self.enrichment_fraction_array[
+            self.get_position(msrun_id, peak_group_name, element)
+        ]
+        return None if np.isnan(value) else float(value)
+
+    def serum_tracers_enrichment_fractions(self):
+        """
+        Returns the AnimalLabel.serum_tracers_enrichment_fraction of each msrun's animal, indexed by (msrun, element)
+        (NaN where it cannot be computed), for normalized_labelings.  It is retrieved once per animal.
+        """
+        animal_fractions = {}
+        for label in AnimalLabel.objects.filter(
+            animal__id__in=set(self.msrun_animal_ids.tolist()),
+            element__in=self.elements,
+        ).select_related("animal"):
+            fraction = label.serum_tracers_enrichment_fraction
+            if fraction is not None:
+                animal_fractions[(label.animal_id, label.element)] = fraction
+
+        fractions = np.full((len(self.msrun_ids), len(self.elements)), np.nan)
+        for mi, animal_id in enumerate(self.msrun_animal_ids.tolist()):
+            for ei, elem in enumerate(self.elements):
+                fractions[mi, ei] = animal_fractions.get((animal_id, elem), np.nan)
+        return fractions
+
+    def serum_tracers_enrichment_fraction(self, peak_groups, element):
+        """
+        Equivalent of AnimalLabel.serum_tracers_enrichment_fraction, given the animal's last serum tracer peak groups
+        (e.g. AnimalLabel.last_serum_tracer_label_peak_groups).  Returns None where it cannot be computed.
+        """
+        positions = [
+            self.get_position(pg.msrun_id, pg.name, element) for pg in peak_groups
+        ]
+        if len(positions) == 0:
+            return None
+        value = pooled_enrichment_fraction(self, positions)
+        return None if np.isnan(value) else float(value)
+
+
+def _safe_divide(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.true_divide(numerator, denominator)
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+def labeled_atom_abundances(cube):
+    """
+    Returns the abundance-weighted labeled atom counts, sum over k of (k * abundance[m, p, e, k]), indexed by
+    (msrun, peak group, element).
+    """
+    counts = np.arange(cube.abundance.shape[-1], dtype=np.float64)
+    return cube.abundance @ counts
+
+
+def label_fractions(cube):
+    """
+    Returns PeakData.fraction summed per label count, indexed by (msrun, peak group, element, count).
+    """
+    return _safe_divide(cube.abundance, cube.total_abundance[:, :, None, None])
+
+
+def enrichment_fractions(cube):
+    """
+    Vectorized PeakGroupLabel.enrichment_fraction, indexed by (msrun, peak group, element).  NaN where the ORM version
+    returns None (no label records, no abundance) and where the element isn't in the formula.
+    """
+    result = _safe_divide(
+        labeled_atom_abundances(cube),
+        cube.total_abundance[:, :, None] * cube.atom_counts,
+    )
+    result[~np.asarray(cube.label_present)] = np.nan
+    return result
+
+
+def enrichment_abundances(cube):
+    """
+    Vectorized PeakGroupLabel.enrichment_abundance, indexed by (msrun, peak group, element).
+    """
+    return cube.total_abundance[:, :, None] * cube.enrichment_fraction_array
+
+
+def intact_fractions(cube, tracer_label_counts):
+    """
+    Returns the fraction of each peak group's abundance that is fully labeled (i.e. intact) with respect to the tracer,
+    given a (msrun, peak group, element) integer array of tracer label counts (negative where the peak group is not a
+    tracer peak group).  NaN where there is no intact peak data.
+    """
+    fractions = label_fractions(cube)
+    counts = np.asarray(tracer_label_counts)
+    valid = (counts >= 0) & (counts < fractions.shape[-1])
+    intact = np.take_along_axis(
+        fractions, np.where(valid, counts, 0)[..., None], axis=-1
+    )[..., 0]
+    intact[~valid] = np.nan
+    intact[intact == 0] = np.nan
+    return intact
+
+
+def pooled_enrichment_fraction(cube, positions):
+    """
+    Vectorized AnimalLabel.serum_tracers_enrichment_fraction: the enrichment of an element pooled over multiple peak
+    groups (e.g. the last serum tracer peak groups), given their (msrun, peak group, element) positions.
+    """
+    idx = tuple(np.array(positions).T)
+    if not np.asarray(cube.label_present)[idx].all():
+        return np.nan
+    # Only the abundances of the supplied positions are weighted, not the whole cube's
+    counts = np.arange(cube.abundance.shape[-1], dtype=np.float64)
+    enrichment = _safe_divide(
+        np.asarray(cube.abundance)[idx] @ counts, cube.total_abundance[idx[:2]]
+    )
+    total_atoms = np.asarray(cube.atom_counts)[idx].sum()
+    if total_atoms == 0:
+        return np.nan
+    return enrichment.sum() / total_atoms
+
+
+def normalized_labelings(cube, serum_enrichment_fractions):
+    """
+    Vectorized PeakGroupLabel.normalized_labeling, given the serum tracers enrichment fraction of each msrun's animal,
+    indexed by (msrun, element) (see IsotopologueCube.serum_tracers_enrichment_fractions).
+    """
+    return _safe_divide(
+        cube.enrichment_fraction_array,
+        np.asarray(serum_enrichment_fractions)[:, None, :],
+    )
@@ -1,7 +1,20 @@
+import hashlib
 import json
+import pickle
+from datetime import date, timedelta
+from functools import wraps
+from typing import List
 
 import numpy as np
 import pandas as pd
+from django.core.cache import cache
+
+try:
+    import pyarrow
+except ImportError:
+    # pyarrow is optional.  Without it, the string columns of summary DataFrames are stored as python strings (see
+    # QuerysetToPandasDataFrame.string_dtype).
+    pyarrow = None
 
 from DataRepo.models import (
     Animal,
@@ -11,6 +24,68 @@ from DataRepo.models import (
     Sample,
     Study,
 )
+from DataRepo.models.hier_cached_model import get_data_version
+from DataRepo.request_profile import profiled
+
+# Names of the QuerysetToPandasDataFrame methods whose DataFrames are cached (see cached_summary)
+summary_builder_names: List[str] = []
+
+
+def cached_summary(builder):
+    """
+    Decorator for the QuerysetToPandasDataFrame classmethods that build summary DataFrames.  Built DataFrames are cached
+    (serialized using pickle protocol 5) keyed on the builder, its scope arguments, and the data version (see
+    get_data_version), so they are rebuilt only after the data changes (e.g. after a load).  Calls whose scope is not a
+    list of ids (e.g. a queryset) are not cached.
+
+    Apply it below @classmethod.  Every call returns a new DataFrame, so callers are free to modify it.
+    """
+
+    @wraps(builder)
+    @profiled("summary")
+    def get_summary(cls, *args, **kwargs):
+        cache_key = get_summary_cache_key(builder.__name__, args, kwargs)
+        if cache_key is None:
+            return builder(cls, *args, **kwargs)
+        pickled_df = cache.get(cache_key)
+        if pickled_df is not None:
+            return pickle.loads(pickled_df)
+        df = builder(cls, *args, **kwargs)
+        cache.set(cache_key, pickle.dumps(df, protocol=5), timeout=None)
+        return df
+
+    summary_builder_names.append(builder.__name__)
+    return get_summary
+
+
+def get_summary_cache_key(builder_name, args, kwargs):
+    """
+    Returns the cache key of a summary DataFrame (see cached_summary), or None if it should not be cached, i.e. if a
+    scope argument is not None or a list of ids, or the data version is unavailable (e.g. the cache is down).
+    """
+    scope_args = list(args) + [kwargs[name] for name in sorted(kwargs.keys())]
+    for arg in scope_args:
+        if arg is not None and not (
+            isinstance(arg, (list, tuple)) and all(isinstance(i, int) for i in arg)
+        ):
+            return None
+    data_version = get_data_version()
+    if data_version is None:
+        return None
+    key_data = json.dumps(
+        {
+            "builder": builder_name,
+            "args": [None if arg is None else sorted(arg) for arg in args],
+            "kwargs": {
+                name: None if arg is None else sorted(arg)
+                for name, arg in kwargs.items()
+            },
+            "version": data_version,
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha1(key_data.encode()).hexdigest()
+    return ".".join(["QuerysetToPandasDataFrame", "summary", digest])
 
 
 class QuerysetToPandasDataFrame:
@@ -91,6 +166,21 @@ class QuerysetToPandasDataFrame:
         "msrun_protocol",
     ]
 
+    # columns of the msrun-level summary DataFrames that repeat a small number of distinct (required) names in many
+    # rows, which are stored as categoricals (see optimize_summary_dtypes).  Nullable columns are not included, since
+    # categorical null values are NaN (instead of pd.NA).
+    categorical_column_names = [
+        "study",
+        "animal",
+        "infusate_name",
+        "genotype",
+        "tissue",
+    ]
+
+    # the dtype of the other string columns of the msrun-level summary DataFrames (Arrow-backed, if pyarrow is
+    # installed)
+    string_dtype = pd.StringDtype("python" if pyarrow is None else "pyarrow")
+
     # the string for replacing null value for treatment, infusate, tracer
     # prefer to use "None" as it's consistent with null value displayed on webpage
     null_rpl_str = "None"
@@ -113,6 +203,12 @@ class QuerysetToPandasDataFrame:
         qry_fields = qry_to_df_fields.keys()
         qs1 = qs.values_list(*qry_fields)
         df_with_qry_fields = pd.DataFrame.from_records(qs1, columns=qry_fields)
+        # convert_dtypes() leaves None in a column containing only null values (e.g. in a DataFrame scoped to a single
+        # animal), so replace it with pd.NA, the same as null values in other columns
+        for col in df_with_qry_fields.columns[df_with_qry_fields.isna().all()]:
+            df_with_qry_fields[col] = pd.Series(
+                pd.NA, index=df_with_qry_fields.index, dtype=object
+            )
         # rename columns for df
         renamed_df = df_with_qry_fields.rename(columns=qry_to_df_fields)
         # convert to best possible dtypes
@@ -120,12 +216,77 @@ class QuerysetToPandasDataFrame:
         return out_df
 
     @staticmethod
-    def df_to_list_of_dict(df):
+    def get_animal_scope(study_ids=None, animal_ids=None):
+        """
+        get a queryset of the ids of the animals in the supplied studies and/or animals, for pushing the scope of a
+        summary DataFrame down into its querysets.  None is returned if neither is supplied (i.e. all animals).
+        study_ids and animal_ids can be lists or querysets of ids.
+        """
+        if study_ids is None and animal_ids is None:
+            return None
+        qs = Animal.objects.all()
+        if study_ids is not None:
+            qs = qs.filter(studies__id__in=study_ids)
+        if animal_ids is not None:
+            qs = qs.filter(id__in=animal_ids)
+        return qs.values("id")
+
+    @classmethod
+    def optimize_summary_dtypes(cls, df):
+        """
+        convert the string columns of a msrun-level summary DataFrame, whose rows repeat the names of animals, tissues,
+        protocols, etc., to compact dtypes: the columns of repeated names (see categorical_column_names) to
+        categoricals and the other string columns to string_dtype.  This reduces the memory (and cache) size of the
+        DataFrame and speeds up grouping by and comparing these columns.
+        note that concatenating columns is not supported by categoricals (or by Arrow-backed strings in older pandas
+        versions), so convert the columns (e.g. using astype(str)) before concatenating them
+        """
+        for column in df.columns:
+            if column in cls.categorical_column_names:
+                df[column] = df[column].astype("category")
+            elif df[column].dtype != object and pd.api.types.is_string_dtype(
+                df[column].dtype
+            ):
+                df[column] = df[column].astype(cls.string_dtype)
+        return df
+
+    @classmethod
+    def build_summary_caches(cls):
+        """
+        build (and cache) every cached summary DataFrame (see cached_summary) of all studies/animals/compounds, e.g.
+        after a load, so that the first page views do not have to
+        """
+        for builder_name in summary_builder_names:
+            print(f"Building {builder_name} summary cache")
+            getattr(cls, builder_name)()
+
+    @classmethod
+    def df_to_list_of_dict(cls, df):
         """
         convert Pandas DataFrame into a list of dictionary, each item of the list
         is a dictionary converted from a row of the DataFrame (column_name:column_value)
         The output can be used directly for template rendering
+
+        The values are converted directly from the DataFrame's columns, the same way that df_to_list_of_dict_json
+        (i.e. to_json) converts them:
+            null values (pd.NA, NaN, NaT, None) are None
+            numpy/pandas scalars are python ints, bools, and floats (rounded to 10 decimal places, though to_json's
+                rounding of the last digit can differ)
+            time durations are ISO 8601 duration strings (e.g. "P98DT0H0M0S")
+            dates/datetimes are ISO 8601 strings with nanoseconds (e.g. "2021-04-30T00:00:00.000000000")
+            arrays and lists are lists of converted values
+        """
+        column_names = list(df.columns)
+        columns = [cls.column_to_list(df.iloc[:, i]) for i in range(len(column_names))]
+        return [dict(zip(column_names, row)) for row in zip(*columns)]
+
+    @staticmethod
+    def df_to_list_of_dict_json(df):
+        """
+        convert Pandas DataFrame into a list of dictionary by parsing the DataFrame's JSON records
         need to use "ns" unit to ensure correct value convertion to json for time duration
+        This was the original (slower) implementation of df_to_list_of_dict, kept for comparison (see the
+        profile_summary_records management command)
         """
         # parsing the DataFrame to JSON records.
         json_records = df.to_json(orient="records", date_format="iso", date_unit="ns")
@@ -135,9 +296,183 @@ class QuerysetToPandasDataFrame:
         return data
 
     @classmethod
-    def get_infusate_all_df(cls):
+    def column_to_list(cls, series):
+        """
+        convert the values of a DataFrame column for df_to_list_of_dict
+        """
+        if series.dtype != object and (
+            pd.api.types.is_integer_dtype(series.dtype)
+            or pd.api.types.is_bool_dtype(series.dtype)
+            or pd.api.types.is_string_dtype(series.dtype)
+        ):
+            # Converting to an object array yields python ints, bools, and strs
+            return [
+                None if val is pd.NA else val for val in series.to_numpy(dtype=object)
+            ]
+        if pd.api.types.is_float_dtype(series.dtype):
+            # to_json rounds to 10 decimal places (though its rounding of the last digit can differ)
+            floats = np.round(series.to_numpy(dtype="float64", na_value=np.nan), 10)
+            return [None if val != val else val for val in floats.tolist()]
+        if series.dtype == object:
+            values = series.to_numpy()
+            if pd.api.types.infer_dtype(values, skipna=True) == "mixed":
+                return cls.objects_to_list(values)
+        else:
+            # Durations and dates (factorized without creating an object for every value)
+            values = series
+        # Convert each distinct value (e.g. a date or a duration) only once
+        try:
+            codes, uniques = pd.factorize(values)
+        except TypeError:
+            # Unhashable values
+            return cls.objects_to_list(values)
+        # Null values have code -1
+        converted = [cls.value_to_record_value(val) for val in uniques] + [None]
+        return [converted[code] for code in codes.tolist()]
+
+    @classmethod
+    def objects_to_list(cls, values):
+        """
+        convert a column of (possibly unhashable) python objects, e.g. arrays, for df_to_list_of_dict.  Merged
+        DataFrames repeat the same objects in many rows (e.g. an animal's tracers in every row of its samples), so each
+        distinct object is converted only once (and a copy of the resulting list is returned for each row).
+        """
+        converted = {}
+        records = []
+        for val in values:
+            key = id(val)
+            if key not in converted:
+                converted[key] = cls.value_to_record_value(val)
+            rec_val = converted[key]
+            records.append(list(rec_val) if type(rec_val) is list else rec_val)
+        return records
+
+    @classmethod
+    def value_to_record_value(cls, val):
+        """
+        convert a single DataFrame value (e.g. from a column of python objects) for df_to_list_of_dict
+        """
+        if val is None or val is pd.NA or val is pd.NaT:
+            return None
+        if isinstance(val, str):
+            return str(val)
+        if isinstance(val, (float, np.floating)):
+            return None if np.isnan(val) else float(np.round(val, 10))
+        if isinstance(val, (np.ndarray, list, tuple)):
+            # tolist() yields python scalars, except from arrays of python objects
+            items = val.tolist() if isinstance(val, np.ndarray) else list(val)
+            if all(type(item) is str or type(item) is int for item in items):
+                return items
+            return [cls.value_to_record_value(item) for item in items]
+        if isinstance(val, (bool, np.bool_)):
+            return bool(val)
+        if isinstance(val, (int, np.integer)):
+            return int(val)
+        if isinstance(val, (timedelta, np.timedelta64)):
+            return cls.timedelta_to_iso(val)
+        if isinstance(val, (date, np.datetime64)):
+            return cls.datetime_to_iso(val)
+        return val
+
+    @staticmethod
+    def timedelta_to_iso(val):
+        """
+        format a time duration as an ISO 8601 duration string, the way to_json does, i.e. with the fraction of seconds
+        in groups of 3 digits (e.g. "P0DT2H30M0.500S")
+        """
+        iso = pd.Timedelta(val).isoformat()
+        head, _, frac = iso[:-1].partition(".")
+        if frac == "":
+            return iso
+        digits = -(-len(frac) // 3) * 3
+        return f"{head}.{frac.ljust(digits, '0')}S"
+
+    @staticmethod
+    def datetime_to_iso(val):
+        """
+        format a date or datetime as an ISO 8601 string with nanoseconds, the way to_json does (e.g.
+        "2021-04-30T00:00:00.000000000")
+        """
+        ts = pd.Timestamp(val)
+        return f"{ts.strftime('%Y-%m-%dT%H:%M:%S')}.{ts.microsecond * 1000 + ts.nanosecond:09d}"
+
+    @classmethod
+    def filter_and_sort_df(cls, df, order_by=None, order_dir=None, filters=None):
+        """
+        filter and sort a summary DataFrame for server-side paging of a summary table
+        filters is a dict of column names and search terms.  A row is kept if the displayed text of every filtered
+        column (see value_to_display_text) contains the term (case-insensitive).
+        Rows are sorted by the order_by column ("asc" unless order_dir is "desc"), numerically if its dtype is numeric
+        or temporal, otherwise by displayed text.  Null values are placed last.
+        """
+        if filters:
+            mask = pd.Series(True, index=df.index)
+            for column, term in filters.items():
+                if term is None or str(term).strip() == "":
+                    continue
+                mask &= cls.column_to_display_text(df[column]).str.contains(
+                    str(term).strip(), case=False, regex=False
+                )
+            df = df[mask]
+
+        if order_by is not None:
+            if order_dir not in [None, "asc", "desc"]:
+                raise ValueError(
+                    f"Invalid order direction: {order_dir}.  Must be 'asc' or 'desc'."
+                )
+            df = df.sort_values(
+                by=order_by,
+                ascending=(order_dir != "desc"),
+                kind="mergesort",
+                na_position="last",
+                key=cls.column_to_sort_key,
+            )
+
+        return df
+
+    @classmethod
+    def column_to_sort_key(cls, series):
+        """
+        return the values by which a summary DataFrame column is sorted (see filter_and_sort_df)
+        """
+        if (
+            pd.api.types.is_numeric_dtype(series.dtype)
+            or pd.api.types.is_datetime64_any_dtype(series.dtype)
+            or pd.api.types.is_timedelta64_dtype(series.dtype)
+        ):
+            return series
+        text = cls.column_to_display_text(series).str.lower()
+        # Empty values are sorted last, like nulls
+        return text.mask(text == "")
+
+    @classmethod
+    def column_to_display_text(cls, series):
+        """
+        return the text displayed for each value of a summary DataFrame column (see value_to_display_text)
+        """
+        # categorical columns map their categories (skipping null values), so convert them to objects first
+        return series.astype(object).map(cls.value_to_display_text).astype(str)
+
+    @classmethod
+    def value_to_display_text(cls, val):
         """
-        get joined data for all infusates, including parent compound, labeled element(s),
+        convert a single DataFrame value to the text displayed for it in a summary table, e.g. the names in an id/name
+        list ['30||C16:0', '11||lysine'] are displayed as "C16:0, lysine"
+        """
+        if isinstance(val, (np.ndarray, list, tuple)):
+            return ", ".join(cls.value_to_display_text(item) for item in val)
+        if pd.isna(val):
+            return ""
+        if isinstance(val, str):
+            obj_id, sep, name = val.partition("||")
+            return name if sep != "" and obj_id.isdigit() else val
+        return str(val)
+
+    @classmethod
+    @cached_summary
+    def get_infusate_all_df(cls, infusate_ids=None):
+        """
+        get joined data for all infusates (or those in infusate_ids), including parent compound, labeled element(s),
         concentration for each tracer associated with an infusate
         Notes:
         Infusate.name, Tracer.name, and TracerLabel.name are allowed to be null based on current design.
@@ -150,6 +485,8 @@ class QuerysetToPandasDataFrame:
             .all()
             .order_by("name", "tracers__name", "tracers__labels__element")
         )
+        if infusate_ids is not None:
+            inf_qs = inf_qs.filter(id__in=infusate_ids)
         qry_to_df_fields = {
             "id": "infusate_id",
             "name": "infusate_name",
@@ -178,12 +515,12 @@ class QuerysetToPandasDataFrame:
         return infusate_all_df
 
     @classmethod
-    def get_infusate_gb_tracer_df(cls):
+    def get_infusate_gb_tracer_df(cls, infusate_ids=None):
         """
         get unqiue lists of labeled element(s), element:count grouped by
-        a tracer for each infusate.
+        a tracer for each infusate (optionally only those in infusate_ids).
         """
-        infusate_all_df = cls.get_infusate_all_df()
+        infusate_all_df = cls.get_infusate_all_df(infusate_ids=infusate_ids)
 
         # add a column to join element and count
         infusate_all_df["element_count"] = (
@@ -221,13 +558,14 @@ class QuerysetToPandasDataFrame:
         return infusate_gb_tracer_df
 
     @classmethod
-    def get_infusate_list_df(cls):
+    @cached_summary
+    def get_infusate_list_df(cls, infusate_ids=None):
         """
-        generate a DataFrame to include compound/tracer data grouped by an infusate,
-        which can be retrieved or merged with animal related DataFrames easily
+        generate a DataFrame to include compound/tracer data grouped by an infusate (optionally only those in
+        infusate_ids), which can be retrieved or merged with animal related DataFrames easily
         """
-        infusate_all_df = cls.get_infusate_all_df()
-        infusate_gb_tracer_df = cls.get_infusate_gb_tracer_df()
+        infusate_all_df = cls.get_infusate_all_df(infusate_ids=infusate_ids)
+        infusate_gb_tracer_df = cls.get_infusate_gb_tracer_df(infusate_ids=infusate_ids)
 
         infusate_gb_df1 = infusate_gb_tracer_df.copy()
 
@@ -243,9 +581,9 @@ class QuerysetToPandasDataFrame:
             + infusate_gb_df1["tracer_name"].astype(str)
         )
         # convert array to str before grouping
-        infusate_gb_df1["elements_as_str"] = infusate_gb_df1["labeled_elements"].apply(
-            ",".join
-        )
+        infusate_gb_df1["elements_as_str"] = infusate_gb_df1[
+            "labeled_elements"
+        ].str.join(",")
 
         # groupby infusate
         infusate_list_df1 = (
@@ -272,33 +610,21 @@ class QuerysetToPandasDataFrame:
             right_on="infusate_id",
             how="left",
         )
-        # convert Pandas StringArray to np.array to avoid error for converting to json format
-        infusate_list_df2["tracers"] = infusate_list_df2["tracers"].apply(
-            lambda x: np.array(x)
-        )
-        infusate_list_df2["labeled_elements"] = infusate_list_df2[
-            "labeled_elements"
-        ].apply(lambda x: np.array(x))
-        infusate_list_df2["concentrations"] = infusate_list_df2["concentrations"].apply(
-            lambda x: np.array(x)
-        )
-        infusate_list_df2["compound_id_name_list"] = infusate_list_df2[
-            "compound_id_name_list"
-        ].apply(lambda x: np.array(x))
-        infusate_list_df2["tracer_id_name_list"] = infusate_list_df2[
-            "tracer_id_name_list"
-        ].apply(lambda x: np.array(x))
+        # the list columns are python lists (of python objects) and labeled_elements is a numpy array (of the unique
+        # strings), so they do not need to be converted for the json format
         # convert to best possible dtypes
         infusate_list_df = infusate_list_df2.convert_dtypes()
 
         return infusate_list_df
 
     @classmethod
-    def get_study_list_df(cls):
+    def get_study_list_df(cls, study_ids=None):
         """
-        convert all study records to a DataFrame with defined column names
+        convert all study records (or those in study_ids) to a DataFrame with defined column names
         """
         qs = Study.objects.all()
+        if study_ids is not None:
+            qs = qs.filter(id__in=study_ids)
         qry_to_df_fields = {
             "id": "study_id",
             "name": "study",
@@ -309,12 +635,17 @@ class QuerysetToPandasDataFrame:
         return stud_list_df
 
     @classmethod
-    def get_study_animal_all_df(cls):
+    def get_study_animal_all_df(cls, study_ids=None, animal_ids=None):
         """
         generate a DataFrame for joining all studies and animals based on
-        many-to-many relationships
+        many-to-many relationships, optionally limited to the studies in study_ids and the animals in animal_ids
         """
         qs = Study.objects.all().prefetch_related("animals")
+        if study_ids is not None:
+            qs = qs.filter(id__in=study_ids)
+        if animal_ids is not None:
+            # The values of the animals are retrieved using this filter's join, so other animals are excluded
+            qs = qs.filter(animals__id__in=animal_ids)
         qry_to_df_fields = {
             "id": "study_id",
             "name": "study",
@@ -326,12 +657,17 @@ class QuerysetToPandasDataFrame:
         return all_stud_anim_df
 
     @classmethod
-    def get_animal_list_df(cls):
+    def get_animal_list_df(cls, study_ids=None, animal_ids=None):
         """
-        get all animal records with related fields for infusate and treatments,
-        convert to a DataFrame with defined column names
+        get all animal records (or those in the supplied studies/animals) with related fields for infusate and
+        treatments, convert to a DataFrame with defined column names
         """
         qs = Animal.objects.select_related("protocol").all()
+        infusate_ids = None
+        animal_scope = cls.get_animal_scope(study_ids, animal_ids)
+        if animal_scope is not None:
+            qs = qs.filter(id__in=animal_scope)
+            infusate_ids = qs.values("infusate_id")
         qry_to_df_fields = {
             "id": "animal_id",
             "name": "animal",
@@ -349,7 +685,7 @@ class QuerysetToPandasDataFrame:
         }
         anim_list_df1 = cls.qs_to_df(qs, qry_to_df_fields)
         # infusate data frame
-        infusate_list_df = cls.get_infusate_list_df()
+        infusate_list_df = cls.get_infusate_list_df(infusate_ids=infusate_ids)
         # merge two data frames
         anim_list_df2 = pd.merge(
             anim_list_df1,
@@ -366,13 +702,16 @@ class QuerysetToPandasDataFrame:
         return anim_list_df
 
     @classmethod
-    def get_study_gb_animal_df(cls):
+    def get_study_gb_animal_df(cls, study_ids=None, animal_ids=None):
         """
-        generate a DataFrame for studies grouped by animal_id
+        generate a DataFrame for studies grouped by animal_id (optionally only the animals in the supplied
+        studies/animals, each with all of its studies)
         adding a column named study_id_name_list
         example for data format: ['1||obob_fasted']
         """
-        stud_anim_df = cls.get_study_animal_all_df()
+        stud_anim_df = cls.get_study_animal_all_df(
+            animal_ids=cls.get_animal_scope(study_ids, animal_ids)
+        )
 
         # add a column by joining id and name for each study
         stud_anim_df["study_id_name"] = (
@@ -402,13 +741,17 @@ class QuerysetToPandasDataFrame:
         return stud_gb_anim_df
 
     @classmethod
-    def get_sample_msrun_all_df(cls):
+    def get_sample_msrun_all_df(cls, study_ids=None, animal_ids=None):
         """
-        generate a DataFrame for all sample and MSRun records
+        generate a DataFrame for all sample and MSRun records (optionally only those of the animals in the supplied
+        studies/animals)
         including animal data fields
         Use left join to merge sample and MSRun records, since a sample may not have MSRun data
         """
+        animal_scope = cls.get_animal_scope(study_ids, animal_ids)
         sam_qs = Sample.objects.select_related().all()
+        if animal_scope is not None:
+            sam_qs = sam_qs.filter(animal__id__in=animal_scope)
         qry_to_df_fields = {
             "id": "sample_id",
             "name": "sample",
@@ -423,6 +766,8 @@ class QuerysetToPandasDataFrame:
         all_sam_df = cls.qs_to_df(sam_qs, qry_to_df_fields)
 
         msrun_qs = MSRun.objects.all()
+        if animal_scope is not None:
+            msrun_qs = msrun_qs.filter(sample__animal__id__in=animal_scope)
         qry_to_df_fields = {
             "id": "msrun_id",
             "researcher": "msrun_owner",
@@ -463,14 +808,15 @@ class QuerysetToPandasDataFrame:
         return all_sam_msrun_df
 
     @classmethod
-    def get_animal_msrun_all_df(cls):
+    @cached_summary
+    def get_animal_msrun_all_df(cls, study_ids=None, animal_ids=None):
         """
-        generate a DataFrame for all animals, sample and MSRun records
+        generate a DataFrame for all animals (or those in the supplied studies/animals), sample and MSRun records
         include study list for each animal
         """
-        all_sam_msrun_df = cls.get_sample_msrun_all_df()
-        anim_list_df = cls.get_animal_list_df()
-        stud_gb_anim_df = cls.get_study_gb_animal_df()
+        all_sam_msrun_df = cls.get_sample_msrun_all_df(study_ids, animal_ids)
+        anim_list_df = cls.get_animal_list_df(study_ids, animal_ids)
+        stud_gb_anim_df = cls.get_study_gb_animal_df(study_ids, animal_ids)
 
         # merge DataFrames to get animal based summary data
         all_anim_msrun_df1 = anim_list_df.merge(
@@ -485,17 +831,19 @@ class QuerysetToPandasDataFrame:
         column_names = cls.animal_tissue_sample_msrun_column_names + study_column_names
 
         all_anim_msrun_df = all_anim_msrun_df.reindex(columns=column_names)
-        return all_anim_msrun_df
+        return cls.optimize_summary_dtypes(all_anim_msrun_df)
 
     @classmethod
-    def get_animal_list_stats_df(cls):
+    @cached_summary
+    def get_animal_list_stats_df(cls, study_ids=None, animal_ids=None):
         """
-        generate a DataFrame by adding columns to animal list, including counts
+        generate a DataFrame by adding columns to animal list (optionally only the animals in the supplied
+        studies/animals), including counts
             or unique values for selected data fields grouped by an animal
         """
-        anim_list_df = cls.get_animal_list_df()
-        all_anim_msrun_df = cls.get_animal_msrun_all_df()
-        stud_gb_anim_df = cls.get_study_gb_animal_df()
+        anim_list_df = cls.get_animal_list_df(study_ids, animal_ids)
+        all_anim_msrun_df = cls.get_animal_msrun_all_df(study_ids, animal_ids)
+        stud_gb_anim_df = cls.get_study_gb_animal_df(study_ids, animal_ids)
 
         # get unique count or values for selected fields grouped by animal_id
         anim_gb_df1 = (
@@ -535,13 +883,14 @@ class QuerysetToPandasDataFrame:
         return anim_list_stats_df
 
     @classmethod
-    def get_study_msrun_all_df(cls):
+    @cached_summary
+    def get_study_msrun_all_df(cls, study_ids=None, animal_ids=None):
         """
         generate a DataFrame for study based summary data including animal, sample, and MSRun
-        data fields
+        data fields, optionally limited to the studies in study_ids and the animals in animal_ids
         """
-        all_stud_anim_df = cls.get_study_animal_all_df()
-        all_anim_msrun_df = cls.get_animal_msrun_all_df()
+        all_stud_anim_df = cls.get_study_animal_all_df(study_ids, animal_ids)
+        all_anim_msrun_df = cls.get_animal_msrun_all_df(study_ids, animal_ids)
 
         # all_anim_msrun_df contains columns for studies, drop them
         all_anim_msrun_df1 = all_anim_msrun_df.drop(
@@ -562,52 +911,17 @@ class QuerysetToPandasDataFrame:
         ]
         column_names = study_column_names + cls.animal_tissue_sample_msrun_column_names
         all_stud_msrun_df = all_stud_msrun_df.reindex(columns=column_names)
-        return all_stud_msrun_df
+        return cls.optimize_summary_dtypes(all_stud_msrun_df)
 
     @classmethod
-    def get_study_list_stats_df(cls):
+    @cached_summary
+    def get_study_list_stats_df(cls, study_ids=None):
         """
-        generate a DataFrame to add columns to study list including counts or unique values
-        for selected data fields grouped by a study
+        generate a DataFrame to add columns to study list (optionally only the studies in study_ids) including counts
+        or unique values for selected data fields grouped by a study
         """
-        stud_list_df = cls.get_study_list_df()
-        all_stud_msrun_df = cls.get_study_msrun_all_df()
-        try:
-            # convert values of array columns to strings before grouping
-            all_stud_msrun_df["compounds_as_str"] = all_stud_msrun_df[
-                "compound_id_name_list"
-            ].apply(";".join)
-        except TypeError:
-            # When compound_id_name_list is empty, a TypeError is raised
-            # empty list is not expected, unless tracer data were not loaded for an infusate
-            # keep the code for handling exception just in case
-            all_stud_msrun_df["compounds_as_str"] = cls.null_rpl_str
-        try:
-            all_stud_msrun_df["elements_as_str"] = all_stud_msrun_df[
-                "labeled_elements"
-            ].apply(";".join)
-        except TypeError:
-            # When labeled_elements is empty, a TypeError is raised
-            all_stud_msrun_df["elements_as_str"] = cls.null_rpl_str
-        # drop columns
-        all_stud_msrun_df.drop(columns=["compound_id_name_list", "labeled_elements"])
-        # add a column to join infusate id and name
-        all_stud_msrun_df["infusate_id_name"] = (
-            all_stud_msrun_df["infusate_id"].astype(str)
-            + "||"
-            + all_stud_msrun_df["infusate_name"].astype(str)
-        )
-        # add a column to join treatment_id and treatment
-        # need to handle null value for treatment id and name, since it is optional in Animal model
-        # if treatment_id or treament is pd.NA, concatenated value will be pd.NA
-        all_stud_msrun_df["treatment_id_name"] = (
-            all_stud_msrun_df["treatment_id"].astype(str)
-            + "||"
-            + all_stud_msrun_df["treatment"]
-        )
-        all_stud_msrun_df["treatment_id_name"] = all_stud_msrun_df[
-            "treatment_id_name"
-        ].fillna(cls.null_rpl_str)
+        stud_list_df = cls.get_study_list_df(study_ids)
+        all_stud_msrun_df = cls.get_study_msrun_all_df(study_ids)
 
         # generate a DataFrame containing stats columns grouped by study_id
         stud_gb_df1 = (
@@ -619,43 +933,71 @@ class QuerysetToPandasDataFrame:
                 total_msrun=("msrun_id", "nunique"),
                 sample_owners=("sample_owner", "unique"),
                 genotypes=("genotype", "unique"),
-                infusate_id_name_list=("infusate_id_name", "unique"),
-                compound_id_name_list=("compounds_as_str", "unique"),
-                labeled_elements=("elements_as_str", "unique"),
-                treatment_id_name_list=("treatment_id_name", "unique"),
             )
             .reset_index()
         )
-        # convert StringArray to np.array, do one by one, as got error with applying multiple columns
+        # convert StringArray and Categorical to np.array, do one by one, as got error with applying multiple columns
         stud_gb_df1["sample_owners"] = stud_gb_df1["sample_owners"].apply(
             lambda x: np.array(x)
         )
         stud_gb_df1["genotypes"] = stud_gb_df1["genotypes"].apply(lambda x: np.array(x))
-        stud_gb_df1["infusate_id_name_list"] = stud_gb_df1[
-            "infusate_id_name_list"
-        ].apply(lambda x: np.array(x))
 
-        # get unique list of compound_id_name from nested lists, avoiding using comma
-        stud_gb_df1["compound_id_name_list"] = (
-            stud_gb_df1["compound_id_name_list"]
-            .str.join(";")
-            .str.split(";")
-            .map(np.unique)
-            .map(np.sort)
+        # the infusate and treatment of an animal are the same in all of its rows, so generate their lists from one
+        # row per study and animal (instead of one per MSRun)
+        stud_anim_df = all_stud_msrun_df.drop_duplicates(
+            subset=["study_id", "animal_id"]
+        )[
+            [
+                "study_id",
+                "infusate_id",
+                "infusate_name",
+                "compound_id_name_list",
+                "labeled_elements",
+                "treatment_id",
+                "treatment",
+            ]
+        ]
+        # add a column to join infusate id and name
+        stud_anim_df["infusate_id_name"] = (
+            stud_anim_df["infusate_id"].astype(str)
+            + "||"
+            + stud_anim_df["infusate_name"].astype(str)
         )
-        # get unique list of elements from nested lists
-        stud_gb_df1["labeled_elements"] = (
-            stud_gb_df1["labeled_elements"]
-            .str.join(",")
-            .str.split(",")
-            .map(np.unique)
-            .map(np.sort)
+        # add a column to join treatment_id and treatment
+        # need to handle null value for treatment id and name, since it is optional in Animal model
+        # if treatment_id or treament is pd.NA, concatenated value will be pd.NA
+        stud_anim_df["treatment_id_name"] = (
+            stud_anim_df["treatment_id"].astype(str)
+            + "||"
+            + stud_anim_df["treatment"].astype("string")
+        ).fillna(cls.null_rpl_str)
+        stud_gb_df2 = (
+            stud_anim_df.groupby("study_id")
+            .agg(
+                infusate_id_name_list=("infusate_id_name", "unique"),
+                treatment_id_name_list=("treatment_id_name", "unique"),
+            )
+            .reset_index()
         )
-
-        stud_gb_df1["treatment_id_name_list"] = stud_gb_df1[
+        stud_gb_df2["treatment_id_name_list"] = stud_gb_df2[
             "treatment_id_name_list"
         ].apply(lambda x: np.array(x))
 
+        # get unique lists of compound_id_name and of elements of the (unique) infusates of each study
+        stud_inf_df = stud_anim_df.drop_duplicates(subset=["study_id", "infusate_id"])
+        stud_gb_df3 = cls.get_unique_list_df(
+            stud_inf_df, "study_id", "compound_id_name_list"
+        ).merge(
+            # each tracer's labeled elements are joined with commas
+            cls.get_unique_list_df(
+                stud_inf_df, "study_id", "labeled_elements", sep=","
+            ),
+            on="study_id",
+        )
+
+        stud_gb_df1 = stud_gb_df1.merge(stud_gb_df2, on="study_id").merge(
+            stud_gb_df3, on="study_id"
+        )
         stud_gb_df = stud_gb_df1.convert_dtypes()
 
         # merge DataFrames to add stats to each row of study list
@@ -680,12 +1022,33 @@ class QuerysetToPandasDataFrame:
         stud_list_stats_df = stud_list_stats_df.reindex(columns=column_names)
         return stud_list_stats_df
 
+    @classmethod
+    def get_unique_list_df(cls, df, by, column, sep=None):
+        """
+        generate a DataFrame of the sorted unique values of a list column for each value of the "by" column, e.g. the
+        compounds of the infusates of each study.  If sep is supplied, the list items are strings of separated values,
+        which are split.  Null values (e.g. the compounds of an infusate without tracers) are replaced by the value
+        assigned to "null_rpl_str".
+        """
+        values_df = df[[by, column]].explode(column)
+        if sep is not None:
+            values_df[column] = values_df[column].str.split(sep)
+            values_df = values_df.explode(column)
+        values_df[column] = values_df[column].fillna(cls.null_rpl_str)
+        return (
+            values_df.drop_duplicates()
+            .sort_values([by, column])
+            .groupby(by)
+            .agg({column: list})
+            .reset_index()
+        )
+
     def get_per_study_msrun_df(self, study_id):
         """
         generate a DataFrame for summary data including animal, sample, and MSRun
         data fields for a study
         """
-        all_stud_msrun_df = self.get_study_msrun_all_df()
+        all_stud_msrun_df = self.get_study_msrun_all_df(study_ids=[study_id])
         self.study_id = study_id
         per_stud_msrun_df = all_stud_msrun_df[all_stud_msrun_df["study_id"] == study_id]
         return per_stud_msrun_df
@@ -695,7 +1058,7 @@ class QuerysetToPandasDataFrame:
         generate a DataFrame for summary data including animal, sample, and MSRun
         counts for a study
         """
-        stud_list_stats_df = self.get_study_list_stats_df()
+        stud_list_stats_df = self.get_study_list_stats_df(study_ids=[study_id])
         self.study_id = study_id
         per_stud_stat_df = stud_list_stats_df[
             stud_list_stats_df["study_id"] == study_id
@@ -707,7 +1070,7 @@ class QuerysetToPandasDataFrame:
         generate a DataFrame for summary data including animal, sample, and MSRun
         data fields for an animal
         """
-        all_anim_msrun_df = self.get_animal_msrun_all_df()
+        all_anim_msrun_df = self.get_animal_msrun_all_df(animal_ids=[animal_id])
         self.animal_id = animal_id
         per_anim_msrun_df = all_anim_msrun_df[
             all_anim_msrun_df["animal_id"] == animal_id
@@ -732,6 +1095,7 @@ class QuerysetToPandasDataFrame:
         return all_comp_synonym_df
 
     @classmethod
+    @cached_summary
     def get_compound_list_stats_df(cls):
         """
         generate a DataFrame by adding columns to compound list, including counts
@@ -1,3 +1,4 @@
+import warnings
 from collections import namedtuple
 from datetime import timedelta
 
@@ -150,6 +151,8 @@ class SampleTableLoader:
         disable_autoupdates()
         disable_caching_updates()
         animals_to_uncache = []
+        # Animals whose samples' serum-related maintained fields are computed in bulk at the end of the load
+        animal_ids = []
 
         # Create a list to hold the csv reader data so that iterations from validating cleardoesn't leave the csv reader
         # empty/at-the-end upon the import loop
@@ -237,6 +240,8 @@ class SampleTableLoader:
                 animal, created = Animal.objects.using(self.db).get_or_create(
                     name=name, infusate=infusate
                 )
+                if animal.id not in animal_ids:
+                    animal_ids.append(animal.id)
                 # TODO: See issue #580.  The following hits the default database's cache table even if the validation
                 #       database has been set in the animal object.  This is currently tolerable because the only
                 #       effect is a cache deletion.
@@ -488,9 +493,63 @@ class SampleTableLoader:
         perform_buffered_updates(labels=["name"], using=self.db)
         # Since we only updated some of the buffered items, clear the rest of the buffer
         clear_update_buffer()
+        # The serum sample fields do not depend on peak groups, so they can be computed now, in bulk
+        self.update_serum_sample_fields(animal_ids)
         enable_autoupdates()
         enable_buffering()
 
+    def update_serum_sample_fields(self, animal_ids):
+        """
+        Computes the maintained fields Sample.is_serum_sample and Animal.last_serum_sample for every sample of the
+        supplied animals from a single query and saves them using 1 bulk update per model, instead of a buffered
+        save (and 2 queries) per record.  The last serum sample selection mimics Animal._last_serum_sample.
+        """
+        if len(animal_ids) == 0:
+            return
+
+        samples = list(
+            Sample.objects.using(self.db)
+            .filter(animal__id__in=animal_ids)
+            .select_related("tissue", "animal")
+        )
+        serum_prefix = Tissue.SERUM_TISSUE_PREFIX.lower()
+
+        animals = {}
+        last_serum_samples = {}
+        for sample in samples:
+            sample.is_serum_sample = sample.tissue.is_serum()
+            animal = animals.setdefault(sample.animal_id, sample.animal)
+            # Animal._last_serum_sample matches the tissue prefix case-insensitively
+            if not sample.tissue.name.lower().startswith(serum_prefix):
+                continue
+            # Null time_collected values sort first (see create_is_null_field)
+            key = (
+                sample.time_collected is not None,
+                sample.time_collected or timedelta.min,
+                sample.id,
+            )
+            cur = last_serum_samples.get(animal.id)
+            if cur is None or key > cur[0]:
+                last_serum_samples[animal.id] = (key, sample)
+
+        for animal in animals.values():
+            last_serum_sample = None
+            if animal.id in last_serum_samples:
+                last_serum_sample = last_serum_samples[animal.id][1]
+            if last_serum_sample is None:
+                warnings.warn(f"Animal {animal.name} has no 'serum' samples.")
+            elif not last_serum_sample.time_collected:
+                warnings.warn(
+                    f"The Final serum sample {last_serum_sample} for animal [{animal}] is missing a time_collected "
+                    "value."
+                )
+            animal.last_serum_sample = last_serum_sample
+
+        Sample.objects.using(self.db).bulk_update(samples, ["is_serum_sample"])
+        Animal.objects.using(self.db).bulk_update(
+            list(animals.values()), ["last_serum_sample"]
+        )
+
     def getRowVal(self, row, header, hdr_required=True, val_required=True):
         """
         Gets a value from the row, indexed by the column header.  If the header is not required but the header key is
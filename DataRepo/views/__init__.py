@@ -28,6 +28,7 @@ from .nav import home
 from .search import (
     AdvancedSearchTSVView,
     AdvancedSearchView,
+    search_advanced_count,
     search_basic,
     view_search_results,
 )
@@ -40,6 +41,7 @@ __all__ = [
     "search_basic",
     "view_search_results",
     "AdvancedSearchView",
+    "search_advanced_count",
     "AdvancedSearchTSVView",
     "CompoundListView",
     "CompoundDetailView",
@@ -2,6 +2,7 @@ from django.views.generic import DetailView, ListView
 
 from DataRepo.models import Animal
 from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
+from DataRepo.views.utils import RelationPlanMixin, get_summary_page_context
 
 
 class AnimalListView(ListView):
@@ -12,23 +13,51 @@ class AnimalListView(ListView):
     template_name = "DataRepo/animal_list.html"
     ordering = ["name"]
 
+    # Sortable/filterable column IDs (see animal_list_stats_table.html) and the DataFrame columns they display
+    summary_columns = {
+        "animal": "animal",
+        "studies": "study_id_name_list",
+        "genotype": "genotype",
+        "infusate": "infusate_name",
+        "compounds": "compound_id_name_list",
+        "tracers": "tracer_id_name_list",
+        "concentrations": "concentrations",
+        "labeled_elements": "labeled_elements",
+        "infusion_rate": "infusion_rate",
+        "treatment": "treatment",
+        "body_weight": "body_weight",
+        "age": "age",
+        "sex": "sex",
+        "diet": "diet",
+        "feeding_status": "feeding_status",
+        "sample_owners": "sample_owners",
+        "total_tissue": "total_tissue",
+        "total_sample": "total_sample",
+        "total_msrun": "total_msrun",
+    }
+
     def get_context_data(self, **kwargs):
         # Call the base implementation first to get the context
         context = super(AnimalListView, self).get_context_data(**kwargs)
-        # add data from the DataFrame to the context
+        # add the current page of data from the (cached) DataFrame to the context
         anim_list_stats_df = qs2df.get_animal_list_stats_df()
-
-        # convert DataFrame to a list of dictionary
-        data = qs2df.df_to_list_of_dict(anim_list_stats_df)
-        context["df"] = data
+        context.update(
+            get_summary_page_context(
+                self.request,
+                anim_list_stats_df,
+                self.summary_columns,
+                default_order_by="animal",
+            )
+        )
         return context
 
 
-class AnimalDetailView(DetailView):
+class AnimalDetailView(RelationPlanMixin, DetailView):
     """Generic class-based detail view for an animal"""
 
     model = Animal
     template_name = "DataRepo/animal_detail.html"
+    select_related = ["infusate", "treatment"]
 
     def get_context_data(self, **kwargs):
         # Call the base implementation first to get the context
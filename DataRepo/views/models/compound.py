@@ -1,6 +1,6 @@
 from django.views.generic import DetailView, ListView
 
-from DataRepo.models import Compound, PeakGroup
+from DataRepo.models import Animal, Compound, PeakGroup
 from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
 
 
@@ -33,16 +33,13 @@ class CompoundDetailView(DetailView):
         # Call the base implementation first to get the context
         context = super(CompoundDetailView, self).get_context_data(**kwargs)
         # add data from the DataFrame to the context
-        anim_list_stats_df = qs2df.get_animal_list_stats_df()
-
         pk = self.kwargs.get("pk")
-        # get infusate(s) based on compound
-        infusate_all_df = qs2df.get_infusate_all_df()
-        inf_list = infusate_all_df[infusate_all_df["compound_id"] == pk]["infusate_id"]
-        # animal list filtered by infusate(s)
-        per_comp_anim_list_stats_df = anim_list_stats_df[
-            anim_list_stats_df["infusate_id"].isin(inf_list)
-        ]
+        # animal list of the animals infused with the compound
+        per_comp_anim_list_stats_df = qs2df.get_animal_list_stats_df(
+            animal_ids=Animal.objects.filter(infusate__tracers__compound__id=pk).values(
+                "id"
+            )
+        )
 
         # convert DataFrame to a list of dictionary
         anim_per_comp_data = qs2df.df_to_list_of_dict(per_comp_anim_list_stats_df)
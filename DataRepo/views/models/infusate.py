@@ -14,10 +14,8 @@ class InfusateDetailView(DetailView):
         # Call the base implementation first to get the context
         context = super(InfusateDetailView, self).get_context_data(**kwargs)
         # add data from the DataFrame to the context
-        infusate_all_df = qs2df.get_infusate_all_df()
-
         pk = int(self.kwargs.get("pk"))
-        per_infusate_all_df = infusate_all_df[infusate_all_df["infusate_id"] == pk]
+        per_infusate_all_df = qs2df.get_infusate_all_df(infusate_ids=[pk])
         # convert DataFrame to a list of dictionary
         tracer_data = qs2df.df_to_list_of_dict(per_infusate_all_df)
         context["tracer_df"] = tracer_data
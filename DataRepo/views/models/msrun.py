@@ -1,9 +1,10 @@
 from django.views.generic import DetailView, ListView
 
 from DataRepo.models import MSRun
+from DataRepo.views.utils import RelationPlanMixin
 
 
-class MSRunListView(ListView):
+class MSRunListView(RelationPlanMixin, ListView):
     """Generic class-based view for a list of MS runs"""
 
     model = MSRun
@@ -11,10 +12,12 @@ class MSRunListView(ListView):
     template_name = "DataRepo/msrun_list.html"
     ordering = ["id"]
     paginate_by = 20
+    select_related = ["sample", "protocol"]
 
 
-class MSRunDetailView(DetailView):
+class MSRunDetailView(RelationPlanMixin, DetailView):
     """Generic class-based detail view for a MS run"""
 
     model = MSRun
     template_name = "DataRepo/msrun_detail.html"
+    select_related = ["sample", "protocol"]
@@ -2,9 +2,10 @@ from django.shortcuts import get_object_or_404
 from django.views.generic import ListView
 
 from DataRepo.models import PeakData, PeakGroup
+from DataRepo.views.utils import RelationPlanMixin
 
 
-class PeakDataListView(ListView):
+class PeakDataListView(RelationPlanMixin, ListView):
     """
     Generic class-based view for a list of peak data
     "model = PeakData" is shorthand for queryset = PeakData.objects.all()
@@ -16,6 +17,7 @@ class PeakDataListView(ListView):
     template_name = "DataRepo/peakdata_list.html"
     ordering = ["peak_group_id", "id"]
     paginate_by = 200
+    select_related = ["peak_group"]
 
     # filter peakgdata_list by peak_group_id
     def get_queryset(self):
@@ -24,5 +26,5 @@ class PeakDataListView(ListView):
         peakgroup_pk = self.request.GET.get("peak_group_id", None)
         if peakgroup_pk is not None:
             self.peakgroup = get_object_or_404(PeakGroup, id=peakgroup_pk)
-            queryset = PeakData.objects.filter(peak_group_id=peakgroup_pk)
+            queryset = queryset.filter(peak_group_id=peakgroup_pk)
         return queryset
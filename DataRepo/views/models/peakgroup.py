@@ -2,9 +2,10 @@ from django.shortcuts import get_object_or_404
 from django.views.generic import DetailView, ListView
 
 from DataRepo.models import MSRun, PeakGroup
+from DataRepo.views.utils import RelationPlanMixin
 
 
-class PeakGroupListView(ListView):
+class PeakGroupListView(RelationPlanMixin, ListView):
     """
     Generic class-based view for a list of peak groups
     "model = PeakGroup" is shorthand for queryset = PeakGroup.objects.all()
@@ -16,6 +17,7 @@ class PeakGroupListView(ListView):
     template_name = "DataRepo/peakgroup_list.html"
     ordering = ["msrun_id", "peak_group_set_id", "name"]
     paginate_by = 50
+    select_related = ["msrun__sample", "peak_group_set"]
 
     # filter the peakgroup_list by msrun_id
     def get_queryset(self):
@@ -24,12 +26,14 @@ class PeakGroupListView(ListView):
         msrun_pk = self.request.GET.get("msrun_id", None)
         if msrun_pk is not None:
             self.msrun = get_object_or_404(MSRun, id=msrun_pk)
-            queryset = PeakGroup.objects.filter(msrun_id=msrun_pk)
+            queryset = queryset.filter(msrun_id=msrun_pk)
         return queryset
 
 
-class PeakGroupDetailView(DetailView):
+class PeakGroupDetailView(RelationPlanMixin, DetailView):
     """Generic class-based detail view for a peak group"""
 
     model = PeakGroup
     template_name = "DataRepo/peakgroup_detail.html"
+    select_related = ["msrun__sample", "peak_group_set"]
+    prefetch_related = ["compounds"]
@@ -1,7 +1,7 @@
 import pandas as pd
 from django.views.generic import DetailView, ListView
 
-from DataRepo.models import Protocol
+from DataRepo.models import Protocol, Study
 from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
 
 
@@ -49,27 +49,24 @@ class ProtocolDetailView(DetailView):
         # Call the base implementation first to get the context
         context = super().get_context_data(**kwargs)
         # filter data from DataFrames and then add to the context
-        stud_list_stats_df = qs2df.get_study_list_stats_df()
-        stud_msrun_df = qs2df.get_study_msrun_all_df()
-
         # filter study list by protocol category
         # default protocol display
         proto_display = "Protocol"
         pk = self.kwargs.get("pk")
         if self.object.category == Protocol.ANIMAL_TREATMENT:
             proto_display = "Animal Treatment"
-            study_list = stud_msrun_df[stud_msrun_df["treatment_id"] == pk]["study_id"]
-            per_proto_stud_list_stats_df = stud_list_stats_df[
-                stud_list_stats_df["study_id"].isin(study_list)
-            ]
+            study_list = Study.objects.filter(animals__treatment_id=pk).values("id")
+            per_proto_stud_list_stats_df = qs2df.get_study_list_stats_df(
+                study_ids=study_list
+            )
         elif self.object.category == Protocol.MSRUN_PROTOCOL:
             proto_display = "MSRun Protocol"
-            study_list = stud_msrun_df[stud_msrun_df["msrun_protocol_id"] == pk][
-                "study_id"
-            ]
-            per_proto_stud_list_stats_df = stud_list_stats_df[
-                stud_list_stats_df["study_id"].isin(study_list)
-            ]
+            study_list = Study.objects.filter(
+                animals__samples__msruns__protocol_id=pk
+            ).values("id")
+            per_proto_stud_list_stats_df = qs2df.get_study_list_stats_df(
+                study_ids=study_list
+            )
         else:
             # currenly no plan for other protocol categories
             per_proto_stud_list_stats_df = pd.DataFrame()
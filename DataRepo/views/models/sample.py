@@ -2,9 +2,10 @@ from django.views.generic import DetailView, ListView
 
 from DataRepo.models import Sample
 from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
+from DataRepo.views.utils import RelationPlanMixin
 
 
-class SampleListView(ListView):
+class SampleListView(RelationPlanMixin, ListView):
     """
     Generic class-based view for a list of samples
     "model = Sample" is shorthand for queryset = Sample.objects.all()
@@ -16,6 +17,7 @@ class SampleListView(ListView):
     context_object_name = "sample_list"
     template_name = "DataRepo/sample_list.html"
     ordering = ["animal_id", "name"]
+    select_related = ["animal", "tissue"]
 
     def get_context_data(self, **kwargs):
         # Call the base implementation first to get the context
@@ -30,8 +32,9 @@ class SampleListView(ListView):
         return context
 
 
-class SampleDetailView(DetailView):
+class SampleDetailView(RelationPlanMixin, DetailView):
     """Generic class-based detail view for a sample"""
 
     model = Sample
     template_name = "DataRepo/sample_detail.html"
+    select_related = ["animal__infusate", "tissue"]
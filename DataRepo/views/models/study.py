@@ -3,6 +3,7 @@ from django.views.generic import DetailView, ListView
 
 from DataRepo.models import Study
 from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
+from DataRepo.views.utils import get_summary_page_context
 
 
 class StudyListView(ListView):
@@ -13,14 +14,35 @@ class StudyListView(ListView):
     template_name = "DataRepo/study_list.html"
     ordering = ["name"]
 
+    # Sortable/filterable column IDs (see study_list_stats_table.html) and the DataFrame columns they display
+    summary_columns = {
+        "study": "study",
+        "study_description": "study_description",
+        "genotypes": "genotypes",
+        "infusates": "infusate_id_name_list",
+        "compounds": "compound_id_name_list",
+        "labeled_elements": "labeled_elements",
+        "treatments": "treatment_id_name_list",
+        "sample_owners": "sample_owners",
+        "total_animal": "total_animal",
+        "total_tissue": "total_tissue",
+        "total_sample": "total_sample",
+        "total_msrun": "total_msrun",
+    }
+
     def get_context_data(self, **kwargs):
         # Call the base implementation first to get the context
         context = super(StudyListView, self).get_context_data(**kwargs)
-        # add data from the DataFrame to the context
+        # add the current page of data from the (cached) DataFrame to the context
         stud_list_stats_df = qs2df.get_study_list_stats_df()
-        # convert DataFrame to a list of dictionary
-        data = qs2df.df_to_list_of_dict(stud_list_stats_df)
-        context["df"] = data
+        context.update(
+            get_summary_page_context(
+                self.request,
+                stud_list_stats_df,
+                self.summary_columns,
+                default_order_by="study",
+            )
+        )
         return context
 
 
@@ -47,16 +69,43 @@ class StudyDetailView(DetailView):
         return context
 
 
+# Sortable/filterable column IDs (see study_animal_sample_msrun_table.html) and the DataFrame columns they display
+study_summary_columns = {
+    "study": "study",
+    "study_description": "study_description",
+    "sample": "sample",
+    "animal": "animal",
+    "tissue": "tissue",
+    "genotype": "genotype",
+    "infusate": "infusate_name",
+    "tracers": "tracer_id_name_list",
+    "concentrations": "concentrations",
+    "labeled_elements": "labeled_elements",
+    "infusion_rate": "infusion_rate",
+    "treatment": "treatment",
+    "body_weight": "body_weight",
+    "age": "age",
+    "sex": "sex",
+    "diet": "diet",
+    "feeding_status": "feeding_status",
+    "sample_owner": "sample_owner",
+    "sample_date": "sample_date",
+    "sample_time_collected": "sample_time_collected",
+    "msrun_owner": "msrun_owner",
+    "msrun_date": "msrun_date",
+}
+
+
 def study_summary(request):
     """
     function-based view for studies based summary data, including selected
     data fileds for animal, tissue, sample, and MSRun
-    get DataFrame for summary data, then convert to JSON format
+    get the (cached) DataFrame for summary data, then convert the current page to a list of dictionary
     """
 
     all_stud_msrun_df = qs2df.get_study_msrun_all_df()
 
-    # convert DataFrame to a list of dictionary
-    data = qs2df.df_to_list_of_dict(all_stud_msrun_df)
-    context = {"df": data}
+    context = get_summary_page_context(
+        request, all_stud_msrun_df, study_summary_columns
+    )
     return render(request, "DataRepo/study_summary.html", context)
@@ -1,16 +1,7 @@
 from django.shortcuts import render
 from django.urls import reverse
 
-from DataRepo.models import (
-    Animal,
-    Compound,
-    PeakGroupSet,
-    Protocol,
-    Sample,
-    Study,
-    Tissue,
-)
-from DataRepo.utils import leaderboard_data
+from DataRepo.utils import get_repository_stats, leaderboard_data
 
 
 def home(request):
@@ -18,7 +9,11 @@ def home(request):
     Home page contains 9 cards for browsing data
     keep 8 card attributes in two lists for displaying cards in two rows
     keep card for advanced search in separate row
+    the counts and leaderboards are read from the cached repository stats
     """
+    stats = get_repository_stats()
+    counts = stats["counts"]
+
     card_attrs_list1 = []
     card_attrs_list2 = []
 
@@ -26,7 +21,7 @@ def home(request):
     card_attrs_list1.append(
         {
             "card_bg_color": "bg-card-1",
-            "card_body_title": str(Study.objects.all().count()) + " Studies",
+            "card_body_title": str(counts["studies"]) + " Studies",
             "card_foot_url": reverse("study_list"),
         }
     )
@@ -34,7 +29,7 @@ def home(request):
     card_attrs_list1.append(
         {
             "card_bg_color": "bg-card-1",
-            "card_body_title": str(Animal.objects.all().count()) + " Animals",
+            "card_body_title": str(counts["animals"]) + " Animals",
             "card_foot_url": reverse("animal_list"),
         }
     )
@@ -42,7 +37,7 @@ def home(request):
     card_attrs_list1.append(
         {
             "card_bg_color": "bg-card-1",
-            "card_body_title": str(Tissue.objects.all().count()) + " Tissues",
+            "card_body_title": str(counts["tissues"]) + " Tissues",
             "card_foot_url": reverse("tissue_list"),
         }
     )
@@ -50,7 +45,7 @@ def home(request):
     card_attrs_list1.append(
         {
             "card_bg_color": "bg-card-1",
-            "card_body_title": str(Sample.objects.all().count()) + " Samples",
+            "card_body_title": str(counts["samples"]) + " Samples",
             "card_foot_url": reverse("sample_list"),
         }
     )
@@ -59,20 +54,13 @@ def home(request):
     card_attrs_list2.append(
         {
             "card_bg_color": "bg-card-1",
-            "card_body_title": str(PeakGroupSet.objects.all().count())
-            + " AccuCor Files",
+            "card_body_title": str(counts["accucor_files"]) + " AccuCor Files",
             "card_foot_url": reverse("peakgroupset_list"),
         }
     )
 
-    comp_count = Compound.objects.all().count()
-    tracer_count = (
-        Animal.objects.exclude(infusate__tracers__compound__id__isnull=True)
-        .order_by("infusate__tracers__compound__id")
-        .values_list("infusate__tracers__compound__id")
-        .distinct("infusate__tracers__compound__id")
-        .count()
-    )
+    comp_count = counts["compounds"]
+    tracer_count = counts["tracer_compounds"]
 
     card_attrs_list2.append(
         {
@@ -88,10 +76,7 @@ def home(request):
     card_attrs_list2.append(
         {
             "card_bg_color": "bg-card-1",
-            "card_body_title": str(
-                Protocol.objects.filter(category=Protocol.ANIMAL_TREATMENT).count()
-            )
-            + " Animal Treatments",
+            "card_body_title": str(counts["animal_treatments"]) + " Animal Treatments",
             "card_foot_url": reverse("animal_treatment_list"),
         }
     )
@@ -99,9 +84,7 @@ def home(request):
     card_attrs_list2.append(
         {
             "card_bg_color": "bg-card-1",
-            "card_body_title": str(
-                Protocol.objects.filter(category=Protocol.MSRUN_PROTOCOL).count()
-            )
+            "card_body_title": str(counts["msrun_protocols"])
             + " Mass Spectrometry Protocols",
             "card_foot_url": reverse("msrun_protocol_list"),
         }
@@ -118,6 +101,6 @@ def home(request):
     context = {}
     context["card_rows"] = card_row_list
     context["card_adv_search"] = card_adv_search
-    context["leaderboards"] = leaderboard_data()
+    context["leaderboards"] = leaderboard_data(stats["leaderboard_scores"])
 
     return render(request, "home.html", context)
@@ -1,4 +1,4 @@
-from .advanced import AdvancedSearchView
+from .advanced import AdvancedSearchView, search_advanced_count
 from .basic import search_basic
 from .download import AdvancedSearchTSVView
 from .results import view_search_results
@@ -6,6 +6,7 @@ from .results import view_search_results
 __all__ = [
     "AdvancedSearchTSVView",
     "AdvancedSearchView",
+    "search_advanced_count",
     "search_basic",
     "view_search_results",
 ]
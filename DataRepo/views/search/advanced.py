@@ -1,8 +1,10 @@
 import json
 
 from django.conf import settings
-from django.http import Http404
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_POST
 
+from DataRepo.formats.dataformat_group import EstimatedCount
 from DataRepo.formats.dataformat_group_query import (
     formsetsToDict,
     isQryObjValid,
@@ -52,6 +54,8 @@ class AdvancedSearchView(MultiFormsView):
         rows_per_page_field="rows",
         order_by_field="order_by",
         order_dir_field="order_direction",
+        keyset_field="keyset",
+        count_action="/DataRepo/search_advanced_count/",
     )
 
     #
@@ -149,6 +153,7 @@ class AdvancedSearchView(MultiFormsView):
                 offset=0,
                 order_by=None,
                 order_direction=None,
+                estimate_count=True,
             )
             self.pager.update(
                 other_field_inits={
@@ -159,6 +164,8 @@ class AdvancedSearchView(MultiFormsView):
                 tot=tot,
                 page=1,
                 rows=rows_per_page,
+                keyset=self.basv_metadata.getPageKeyset(res),
+                tot_estimated=isinstance(tot, EstimatedCount),
             )
         else:
             # Log a warning
@@ -272,6 +279,12 @@ class AdvancedSearchView(MultiFormsView):
                 received_stats["show"] = show_stats
 
             offset = (page - 1) * rows
+
+            # Seek to adjacent pages using the keyset of the page the form was submitted from (if any)
+            received_keyset = cform.get("keyset")
+            if isinstance(received_keyset, str):
+                received_keyset = json.loads(received_keyset)
+            seek = self.pager.get_seek(received_keyset, page, rows, order_by, order_dir)
         except Exception as e:
             # Assumes this is an initial query, not a page form submission
             print(
@@ -285,6 +298,7 @@ class AdvancedSearchView(MultiFormsView):
             order_dir = self.pager.order_dir
             show_stats = False
             offset = 0
+            seek = None
 
         # We only need to take the time to generate stats is they are not present and they've been requested
         generate_stats = False
@@ -306,6 +320,9 @@ class AdvancedSearchView(MultiFormsView):
                 order_by=order_by,
                 order_direction=order_dir,
                 generate_stats=generate_stats,
+                keyset=seek,
+                estimate_count=True,
+                snapshot=True,
             )
         else:
             res, tot, stats = self.basv_metadata.getAllBrowseData(
@@ -315,6 +332,9 @@ class AdvancedSearchView(MultiFormsView):
                 order_by=order_by,
                 order_direction=order_dir,
                 generate_stats=generate_stats,
+                keyset=seek,
+                estimate_count=True,
+                snapshot=True,
             )
             # Remake the qry so it will be valid for downloading all data (not entirely sure why this is necessary, but
             # the download form created on the subsequent line doesn't work without doing this.  I suspect that the qry
@@ -337,6 +357,8 @@ class AdvancedSearchView(MultiFormsView):
             rows=rows,
             order_by=order_by,
             order_dir=order_dir,
+            keyset=self.basv_metadata.getPageKeyset(res),
+            tot_estimated=isinstance(tot, EstimatedCount),
         )
 
         root_group = self.basv_metadata.getRootGroup()
@@ -410,6 +432,7 @@ class AdvancedSearchView(MultiFormsView):
                     offset=offset,
                     order_by=self.pager.order_by,
                     order_direction=self.pager.order_dir,
+                    estimate_count=True,
                 )
                 context["pager"] = self.pager.update(
                     other_field_inits={
@@ -418,6 +441,8 @@ class AdvancedSearchView(MultiFormsView):
                         "stats": None,
                     },
                     tot=context["tot"],
+                    keyset=self.basv_metadata.getPageKeyset(context["res"]),
+                    tot_estimated=isinstance(context["tot"], EstimatedCount),
                 )
         elif (
             "qry" in context
@@ -444,3 +469,38 @@ class AdvancedSearchView(MultiFormsView):
                 },
                 tot=context["tot"],
             )
+
+
+@require_POST
+def search_advanced_count(request):
+    """
+    Returns (as json) the exact number of results of the advanced search posted by the paging form (using its qryjson
+    and order_by inputs), so that the page can replace an estimated number of results (see Pager.count_action).  The
+    count is cached, so subsequent page turns of the same search are exact as well.
+    """
+    basv_metadata = SearchGroup()
+
+    try:
+        qry = json.loads(request.POST["qryjson"])
+    except (KeyError, ValueError):
+        raise Http404("Invalid json")
+
+    if not isQryObjValid(qry, basv_metadata.getFormatNames().keys()):
+        print("ERROR: Invalid qry object: ", qry)
+        raise Http404("Invalid json")
+
+    order_by = request.POST.get("order_by")
+    if order_by in ["", "None"]:
+        order_by = None
+
+    # The results are not retrieved, only counted
+    if isValidQryObjPopulated(qry):
+        res, tot, stats = basv_metadata.performQuery(
+            qry, qry["selectedtemplate"], order_by=order_by
+        )
+    else:
+        res, tot, stats = basv_metadata.getAllBrowseData(
+            qry["selectedtemplate"], order_by=order_by
+        )
+
+    return JsonResponse({"count": tot})
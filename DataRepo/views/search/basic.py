@@ -4,6 +4,7 @@ from django.conf import settings
 from django.http import Http404
 from django.shortcuts import render
 
+from DataRepo.formats.dataformat_group import EstimatedCount
 from DataRepo.formats.search_group import SearchGroup
 from DataRepo.forms import (
     AdvSearchDownloadForm,
@@ -41,6 +42,8 @@ def search_basic(request, mdl, fld, cmp, val, fmt, units=None):
         rows_per_page_field="rows",
         order_by_field="order_by",
         order_dir_field="order_direction",
+        keyset_field="keyset",
+        count_action="/DataRepo/search_advanced_count/",
     )
 
     format_template = "DataRepo/search/query.html"
@@ -67,6 +70,7 @@ def search_basic(request, mdl, fld, cmp, val, fmt, units=None):
         qry["selectedtemplate"],
         limit=rows_per_page,
         offset=0,
+        estimate_count=True,
     )
 
     pager.update(
@@ -76,6 +80,8 @@ def search_basic(request, mdl, fld, cmp, val, fmt, units=None):
             "stats": None,
         },
         tot=tot,
+        keyset=basv_metadata.getPageKeyset(res),
+        tot_estimated=isinstance(tot, EstimatedCount),
     )
 
     root_group = basv_metadata.getRootGroup()
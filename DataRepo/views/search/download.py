@@ -3,9 +3,9 @@ from datetime import datetime
 
 from django.conf import settings
 from django.http import Http404, StreamingHttpResponse
-from django.template import loader
 from django.views.generic.edit import FormView
 
+from DataRepo.formats.dataformat_export import iterGzipped
 from DataRepo.formats.dataformat_group_query import (
     isQryObjValid,
     isValidQryObjPopulated,
@@ -17,13 +17,21 @@ from DataRepo.forms import AdvSearchDownloadForm
 # Basis: https://stackoverflow.com/questions/29672477/django-export-current-queryset-to-csv-by-button-click-in-browser
 class AdvancedSearchTSVView(FormView):
     """
-    This is the download view for the advanced search page.
+    This is the download view for the advanced search page.  The results are streamed (see FormatExporter) as
+    delimited text, optionally gzip-compressed, or as a Parquet file or Arrow IPC stream (if pyarrow is installed),
+    optionally zstd-compressed.
     """
 
     form_class = AdvSearchDownloadForm
-    header_template = "DataRepo/search/downloads/download_header.tsv"
-    row_template = "DataRepo/search/downloads/download_row.tsv"
-    content_type = "application/text"
+    # File type: (file extension, content type)
+    filetypes = {
+        "tsv": ("tsv", "text/tab-separated-values"),
+        "csv": ("csv", "text/csv"),
+        "parquet": ("parquet", "application/vnd.apache.parquet"),
+        "arrow": ("arrows", "application/vnd.apache.arrow.stream"),
+    }
+    delimiters = {"tsv": "\t", "csv": ","}
+    default_filetype = "tsv"
     success_url = ""
     basv_metadata = SearchGroup()
 
@@ -53,34 +61,45 @@ class AdvancedSearchTSVView(FormView):
             print("ERROR: Invalid qry object: ", qry)
             raise Http404("Invalid json")
 
+        filetype = cform.get("filetype") or self.default_filetype
+        extension, content_type = self.filetypes[filetype]
+
         now = datetime.now()
         dt_string = now.strftime("%d/%m/%Y %H:%M:%S")
         filename = (
             qry["searches"][qry["selectedtemplate"]]["name"]
             + "_"
             + now.strftime("%d.%m.%Y.%H.%M.%S")
-            + ".tsv"
+            + "."
+            + extension
         )
 
+        # The export's results are not counted (see getQueryExporter)
         if isValidQryObjPopulated(qry):
-            res, tot, stats = self.basv_metadata.performQuery(
-                qry, qry["selectedtemplate"]
+            exporter = self.basv_metadata.getQueryExporter(qry["selectedtemplate"], qry)
+        else:
+            exporter = self.basv_metadata.getQueryExporter(qry["selectedtemplate"])
+
+        if filetype in self.delimiters:
+            preamble = (
+                f"# Download Time: {dt_string}\n# Advanced Search Query: {qry}\n#\n"
             )
+            content = exporter.iterDelimited(
+                delimiter=self.delimiters[filetype], preamble=preamble
+            )
+            if cform.get("compress"):
+                content = iterGzipped(content)
+                content_type = "application/gzip"
+                filename += ".gz"
         else:
-            res, tot, stats = self.basv_metadata.getAllBrowseData(
-                qry["selectedtemplate"]
+            content = exporter.iterArrow(
+                filetype=filetype,
+                metadata={"download_time": dt_string, "query": json.dumps(qry)},
+                compression="zstd" if cform.get("compress") else None,
             )
 
-        headtmplt = loader.get_template(self.header_template)
-        rowtmplt = loader.get_template(self.row_template)
-
         return StreamingHttpResponse(
-            self.tsv_template_iterator(rowtmplt, headtmplt, res, qry, dt_string),
-            content_type=self.content_type,
+            content,
+            content_type=content_type,
             headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
-
-    def tsv_template_iterator(self, rowtmplt, headtmplt, res, qry, dt):
-        yield headtmplt.render({"qry": qry, "dt": dt})
-        for row in res:
-            yield rowtmplt.render({"qry": qry, "row": row})
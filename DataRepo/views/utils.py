@@ -1,2 +1,109 @@
+import math
+
+from DataRepo.forms import SummaryPageForm
+from DataRepo.pager import Pager
+from DataRepo.utils import QuerysetToPandasDataFrame as qs2df
+
+
+class RelationPlanMixin:
+    """
+    Mixin of list and detail views that declares the view's relation plan: the related records that its template
+    displays with each record, which are fetched along with the view's queryset instead of lazily (by a query per row)
+    while rendering.  A page then runs a fixed number of queries, regardless of the number of records displayed.
+
+    select_related is a list of forward (foreign key) relation paths, fetched by joins in the queryset's query.
+    prefetch_related is a list of many-to-many and reverse relation paths, fetched by an additional query each.
+
+    Views that filter the queryset must filter the one returned by super().get_queryset(), so that the plan applies.
+    See DataRepo.middleware.LazyLoadDetectionMiddleware for detecting lazy loads missing from a plan.
+    """
+
+    select_related = []
+    prefetch_related = []
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if len(self.select_related) > 0:
+            queryset = queryset.select_related(*self.select_related)
+        if len(self.prefetch_related) > 0:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
 def get_cookie(request, cookie_name, cookie_default):
     return request.COOKIES.get(cookie_name, cookie_default)
+
+
+def get_summary_page_context(
+    request, df, columns, default_order_by=None, default_rows=25
+):
+    """
+    Returns the template context for a server-side paged summary table: "df" (the current page's records), "pager" (a
+    Pager submitted via GET), and "filters" (the column filter terms, keyed on column ID).  The page, rows per page,
+    sort column and direction, and column filters ("filter-<column ID>") are obtained from the request's GET
+    parameters.  Only the current page's rows are converted to records, so supply a cached (or scoped) summary
+    DataFrame (e.g. from QuerysetToPandasDataFrame.get_study_list_stats_df) to keep the page load proportional to the
+    number of rows displayed.
+
+    columns is a dict mapping the ID of every sortable/filterable column (used as the sortable header div's ID in the
+    template) to the DataFrame column it is sorted/filtered by.
+    """
+    pager = Pager(
+        action=request.path,
+        form_id_field="paging",
+        rows_per_page_choices=SummaryPageForm.ROWS_PER_PAGE_CHOICES,
+        page_form_class=SummaryPageForm,
+        page_field="page",
+        rows_per_page_field="rows",
+        order_by_field="order_by",
+        order_dir_field="order_direction",
+        default_rows=default_rows,
+        method="GET",
+    )
+
+    rows = get_int_param(request, "rows", default_rows)
+    if str(rows) not in [choice[0] for choice in SummaryPageForm.ROWS_PER_PAGE_CHOICES]:
+        rows = default_rows
+    order_by = request.GET.get("order_by")
+    if order_by not in columns:
+        order_by = default_order_by
+    order_dir = request.GET.get("order_direction")
+    if order_dir not in ["asc", "desc"]:
+        order_dir = None
+    filters = {}
+    for column_id in columns.keys():
+        term = request.GET.get(f"filter-{column_id}", "").strip()
+        if term != "":
+            filters[column_id] = term
+
+    df = qs2df.filter_and_sort_df(
+        df,
+        order_by=None if order_by is None else columns[order_by],
+        order_dir=order_dir,
+        filters={columns[column_id]: term for column_id, term in filters.items()},
+    )
+
+    # Requests for pages past the end (e.g. after filtering) get the last page
+    tot = len(df.index)
+    num_pages = max(1, math.ceil(tot / rows))
+    page = min(max(1, get_int_param(request, "page", 1)), num_pages)
+    start_index = (page - 1) * rows
+    end_index = start_index + rows
+
+    return {
+        "df": qs2df.df_to_list_of_dict(df.iloc[start_index:end_index]),
+        "pager": pager.update(
+            tot=tot, page=page, rows=rows, order_by=order_by, order_dir=order_dir
+        ),
+        "filters": filters,
+    }
+
+
+def get_int_param(request, name, default):
+    """
+    Returns the integer value of a GET parameter, or the default if it is missing or not an integer
+    """
+    try:
+        return int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        return default
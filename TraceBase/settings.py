@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from typing import Dict
 
@@ -56,6 +57,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that it profiles the other middleware too.  It is only used if SERVER_TIMING is enabled.
+    "DataRepo.middleware.ServerTimingMiddleware",
+    # Only used if LAZY_LOAD_DETECTION is enabled
+    "DataRepo.middleware.LazyLoadDetectionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -69,7 +74,8 @@ ROOT_URLCONF = "TraceBase.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates, with rendering profiled by DataRepo.middleware.ServerTimingMiddleware
+        "BACKEND": "DataRepo.request_profile.ProfiledDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -213,6 +219,36 @@ elif CACHES_SETTING != "PROD_CACHES":
         "TEST_CACHES and PROD_CACHES."
     )
 
+# Directory where isotopologue cube bundles (memory-mapped .npy arrays of peak data abundances) are persisted, in
+# subdirectories named for their content version.  See DataRepo.utils.isotopologue_cube.
+ISOTOPOLOGUE_CUBE_DIR = env(
+    "ISOTOPOLOGUE_CUBE_DIR",
+    default=os.path.join(tempfile.gettempdir(), "tracebase_isotopologue_cubes"),
+)
+
+# Advanced search result counts are estimated (by the query planner) instead of counted when the estimate exceeds this
+# number of rows, so that the first page of a large search is not delayed by the count.  The exact count is fetched
+# (and cached) separately.  See DataRepo.formats.dataformat_group.FormatGroup.getQueryCount.
+COUNT_ESTIMATE_THRESHOLD = env.int("COUNT_ESTIMATE_THRESHOLD", default=100000)
+
+# Advanced search pages can be served from a cached snapshot of the ordered primary keys of a search's rows, which is
+# only taken if the search has at most this many rows.  See DataRepo.formats.dataformat_group.FormatGroup.
+# getResultSnapshot.
+RESULT_SNAPSHOT_MAX_ROWS = env.int("RESULT_SNAPSHOT_MAX_ROWS", default=250000)
+
+# Per-request profiling (see DataRepo.middleware.ServerTimingMiddleware).  If enabled, each response's Server-Timing
+# header reports the time spent on SQL queries, HierCachedModel cache gets/sets, maintained field updates, summary
+# DataFrames, and template rendering.  If SERVER_TIMING_SLOW_QUERIES is greater than 0, that many of each request's
+# slowest SQL queries are logged.
+SERVER_TIMING = env.bool("SERVER_TIMING", default=False)
+SERVER_TIMING_SLOW_QUERIES = env.int("SERVER_TIMING_SLOW_QUERIES", default=0)
+
+# Lazy load (N+1 query) detection (see DataRepo.middleware.LazyLoadDetectionMiddleware).  If enabled, a warning is
+# logged for every query that is executed repeatedly while rendering a request's templates, e.g. a related record that
+# is loaded once per row of a list view because the view's relation plan (see DataRepo.views.utils.RelationPlanMixin)
+# does not include it.
+LAZY_LOAD_DETECTION = env.bool("LAZY_LOAD_DETECTION", default=DEBUG)
+
 # Logging settings
 # This logging level was added to show the number of SQL queries in the server console
 # Left this commented code here to prompt a conversation about how we should control this debug mode activation